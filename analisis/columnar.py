@@ -0,0 +1,535 @@
+"""
+Motor columnar de análisis en memoria (NumPy).
+
+Cada línea de venta (VentaItem con su Venta, Producto y Categoría) se guarda
+como una fila en columnas de NumPy de tipo fijo: id de venta, día y hora
+local, estado, producto, trabajador, turno, cantidad, monto y costo. Las
+columnas viven en disco como archivos .npy (ANALISIS_COLUMNAR_DIR) y se
+abren con memmap, así que cargarlas no lee todo el archivo.
+
+- actualizar() agrega solo las líneas que no estaban cargadas, en un
+  segmento nuevo (una carpeta con un .npy por columna). Cuando hay más de
+  MAX_SEGMENTOS se juntan en uno. Las ventas anuladas o confirmadas desde la
+  última revisión solo cambian la columna de estado, que es chica y se
+  reescribe entera.
+- Tabla.agrupar() filtra y agrupa con máscaras, np.unique y np.bincount,
+  sin tocar la BD salvo para los nombres del catálogo.
+
+La categoría se lee del producto al consultar (no se guarda por línea); el
+costo es el de la línea (VentaItem.costo_unitario), igual que en los
+resúmenes diarios.
+
+En PostgreSQL los ids no llegan en orden de commit: una venta con id menor
+puede quedar visible después que otra mayor. Por eso cada actualización
+vuelve a leer las últimas VENTANA_IDS líneas bajo la marca y descarta las
+que ya están cargadas (por id de línea).
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+COLUMNAS = {
+    "item": np.int64,
+    "venta": np.int64,
+    "dia": np.int32,        # date.toordinal() DEL DÍA LOCAL
+    "hora": np.int8,        # HORA LOCAL
+    "estado": np.int8,      # POSICIÓN EN ESTADOS
+    "producto": np.int32,
+    "trabajador": np.int32,  # -1 SIN TRABAJADOR
+    "turno": np.int8,       # POSICIÓN EN TURNOS
+    "cantidad": np.int32,
+    "monto": np.float64,
+    "costo": np.float64,    # CANTIDAD × COSTO UNITARIO DE LA LÍNEA
+}
+ESTADOS = ["PENDIENTE", "CONFIRMADA", "ANULADA"]
+TURNOS = ["", "DIA", "NOCHE"]
+
+# DIMENSIONES POR LAS QUE SE PUEDE AGRUPAR O FILTRAR
+DIMENSIONES = [
+    "dia", "semana", "mes", "hora", "dia_semana",
+    "producto", "categoria", "trabajador", "turno",
+]
+# MÉTRICAS: SUMAS DE COLUMNAS, MARGEN Y CONTEOS
+METRICAS = ["ventas", "lineas", "unidades", "monto", "margen"]
+
+MAX_SEGMENTOS = 8
+VENTANA_IDS = 2000            # LÍNEAS BAJO LA MARCA QUE SE VUELVEN A LEER
+FILAS_POR_LECTURA = 20000
+ACTUALIZAR_CADA = 60          # SEGUNDOS ENTRE REVISIONES DESDE LAS VISTAS
+MARGEN_ANULACIONES = 300      # SEGUNDOS HACIA ATRÁS AL BUSCAR ANULACIONES
+BLOQUEO_VENCE = 600           # UN BLOQUEO MÁS VIEJO QUE ESTO SE DA POR ABANDONADO
+
+_DIA_1970 = date(1970, 1, 1).toordinal()
+
+_lock = threading.Lock()
+_tabla = None            # Tabla CARGADA EN ESTE PROCESO
+_revisado = 0.0          # time.monotonic() DE LA ÚLTIMA REVISIÓN
+
+
+def directorio_por_defecto():
+    return os.fspath(settings.ANALISIS_COLUMNAR_DIR)
+
+
+# LECTURA DESDE LA BD
+
+def _dia_y_hora(fechas):
+    """Día local (ordinal) y hora local de cada fecha UTC, vectorizado."""
+    segundos = np.fromiter((f.timestamp() for f in fechas), dtype=np.int64, count=len(fechas))
+    # LOS CAMBIOS DE HORARIO SON A HORA EN PUNTO: BASTA EL DESFASE DE CADA HORA UTC
+    horas_utc, inversa = np.unique(segundos // 3600, return_inverse=True)
+    zona = timezone.get_default_timezone()
+    desfases = np.array(
+        [datetime.fromtimestamp(int(h) * 3600, zona).utcoffset().total_seconds() for h in horas_utc],
+        dtype=np.int64,
+    )
+    locales = segundos + desfases[inversa.reshape(-1)]
+    return locales // 86400 + _DIA_1970, (locales % 86400) // 3600
+
+
+def _leer_lineas(desde_item):
+    """Columnas de las líneas con id mayor a desde_item, en orden de id."""
+    from ventas.models import VentaItem
+
+    filas = (
+        VentaItem.objects.filter(id__gt=desde_item)
+        .order_by("id")
+        .values_list(
+            "id", "venta_id", "venta__fecha", "venta__estado", "producto_id",
+            "venta__trabajador_id", "venta__turno__turno_tipo", "cantidad",
+            "subtotal", "costo_unitario",
+        )
+        .iterator(chunk_size=FILAS_POR_LECTURA)
+    )
+    codigo_estado = {e: i for i, e in enumerate(ESTADOS)}
+    codigo_turno = {t: i for i, t in enumerate(TURNOS)}
+
+    partes = {c: [] for c in COLUMNAS}
+    tanda = []
+
+    def volcar():
+        (item, venta, fecha, estado, producto, trabajador, turno,
+         cantidad, subtotal, costo) = zip(*tanda)
+        dia, hora = _dia_y_hora(fecha)
+        cantidades = np.array(cantidad, dtype=np.int32)
+        nuevas = {
+            "item": item,
+            "venta": venta,
+            "dia": dia,
+            "hora": hora,
+            "estado": [codigo_estado[e] for e in estado],
+            "producto": producto,
+            "trabajador": [-1 if t is None else t for t in trabajador],
+            "turno": [codigo_turno.get(t or "", 0) for t in turno],
+            "cantidad": cantidades,
+            "monto": np.array(subtotal, dtype=np.float64),
+            "costo": cantidades * np.array(costo, dtype=np.float64),
+        }
+        for columna, tipo in COLUMNAS.items():
+            partes[columna].append(np.asarray(nuevas[columna], dtype=tipo))
+        tanda.clear()
+
+    for fila in filas:
+        tanda.append(fila)
+        if len(tanda) == FILAS_POR_LECTURA:
+            volcar()
+    if tanda:
+        volcar()
+
+    return {
+        c: np.concatenate(partes[c]) if partes[c] else np.empty(0, dtype=tipo)
+        for c, tipo in COLUMNAS.items()
+    }
+
+
+# ARCHIVOS
+
+def _leer_meta(directorio):
+    try:
+        with open(os.path.join(directorio, "meta.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"segmentos": [], "ultimo_item": 0, "revisado_en": None}
+
+
+def _escribir_meta(directorio, meta):
+    # SE ESCRIBE APARTE Y SE REEMPLAZA: LOS LECTORES VEN EL META VIEJO O EL NUEVO
+    temporal = os.path.join(directorio, "meta.json.tmp")
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(temporal, os.path.join(directorio, "meta.json"))
+
+
+def _guardar_segmento(directorio, columnas):
+    """Escribe las columnas en una carpeta nueva y devuelve su nombre."""
+    nombre = f"s{int(columnas['item'][-1]):012d}-{len(columnas['item'])}"
+    temporal = os.path.join(directorio, nombre + ".tmp")
+    shutil.rmtree(temporal, ignore_errors=True)
+    os.makedirs(temporal)
+    for columna, valores in columnas.items():
+        np.save(os.path.join(temporal, f"{columna}.npy"), valores)
+    final = os.path.join(directorio, nombre)
+    shutil.rmtree(final, ignore_errors=True)
+    os.replace(temporal, final)
+    return nombre
+
+
+def _abrir_segmento(directorio, nombre):
+    carpeta = os.path.join(directorio, nombre)
+    columnas = {
+        # MEMMAP: SE LEE DEL DISCO SOLO LO QUE SE USA
+        c: np.load(os.path.join(carpeta, f"{c}.npy"), mmap_mode="r")
+        for c in COLUMNAS if c != "estado"
+    }
+    # EL ESTADO CAMBIA CON LAS ANULACIONES: EN MEMORIA PARA PODER REEMPLAZAR EL ARCHIVO
+    columnas["estado"] = np.load(os.path.join(carpeta, "estado.npy"))
+    return columnas
+
+
+def _items_cargados(directorio, segmentos, desde_item):
+    """Ids de línea mayores a desde_item que ya están en los segmentos."""
+    partes = []
+    for nombre in segmentos:
+        items = np.load(os.path.join(directorio, nombre, "item.npy"), mmap_mode="r")
+        partes.append(np.asarray(items[items > desde_item]))
+    return np.concatenate(partes) if partes else np.empty(0, dtype=np.int64)
+
+
+def _borrar_sobrantes(directorio, segmentos):
+    for nombre in os.listdir(directorio):
+        ruta = os.path.join(directorio, nombre)
+        if nombre.startswith("s") and os.path.isdir(ruta) and nombre not in segmentos:
+            # EN WINDOWS FALLA SI OTRO PROCESO AÚN LO TIENE ABIERTO: SE REINTENTA LA PRÓXIMA VEZ
+            shutil.rmtree(ruta, ignore_errors=True)
+
+
+class _Bloqueo:
+    """Un solo proceso actualiza a la vez (archivo creado en exclusiva)."""
+
+    def __init__(self, directorio):
+        self.ruta = os.path.join(directorio, "actualizando.lock")
+        self.tomado = False
+
+    def __enter__(self):
+        try:
+            if time.time() - os.path.getmtime(self.ruta) > BLOQUEO_VENCE:
+                os.remove(self.ruta)
+        except OSError:
+            pass
+        try:
+            os.close(os.open(self.ruta, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            self.tomado = True
+        except FileExistsError:
+            self.tomado = False
+        return self.tomado
+
+    def __exit__(self, *exc):
+        if self.tomado:
+            os.remove(self.ruta)
+
+
+# ACTUALIZACIÓN
+
+def actualizar(directorio=None, reconstruir=False):
+    """
+    Pone al día los archivos con las ventas de la BD. Devuelve
+    (líneas nuevas, ventas con estado cambiado), o None si otro proceso ya
+    está actualizando.
+    """
+    from ventas.models import Venta
+
+    directorio = directorio or directorio_por_defecto()
+    os.makedirs(directorio, exist_ok=True)
+
+    with _Bloqueo(directorio) as tomado:
+        if not tomado:
+            return None
+
+        meta = _leer_meta(directorio)
+        if reconstruir:
+            meta = {"segmentos": [], "ultimo_item": 0, "revisado_en": None}
+        ahora = timezone.now()
+
+        # 1) LÍNEAS NUEVAS AL FINAL, EN UN SEGMENTO APARTE. SE RELEE UNA
+        # VENTANA BAJO LA MARCA (IDS QUE SE CONFIRMARON TARDE) Y SE QUITAN
+        # LAS LÍNEAS QUE YA ESTABAN
+        segmentos = list(meta["segmentos"])
+        desde_item = max(0, meta["ultimo_item"] - VENTANA_IDS) if segmentos else 0
+        nuevas = _leer_lineas(desde_item)
+        if len(nuevas["item"]) and segmentos:
+            faltan = ~np.isin(nuevas["item"], _items_cargados(directorio, segmentos, desde_item))
+            nuevas = {c: valores[faltan] for c, valores in nuevas.items()}
+        if len(nuevas["item"]):
+            segmentos.append(_guardar_segmento(directorio, nuevas))
+            meta["ultimo_item"] = max(meta["ultimo_item"], int(nuevas["item"].max()))
+
+        if len(segmentos) > MAX_SEGMENTOS:
+            partes = [_abrir_segmento(directorio, s) for s in segmentos]
+            juntas = {c: np.concatenate([p[c] for p in partes]) for c in COLUMNAS}
+            del partes
+            segmentos = [_guardar_segmento(directorio, juntas)]
+
+        # 2) VENTAS QUE CAMBIARON DE ESTADO DESDE LA ÚLTIMA REVISIÓN
+        cambios = 0
+        if meta["revisado_en"] and meta["segmentos"]:
+            desde = datetime.fromisoformat(meta["revisado_en"]) - timedelta(seconds=MARGEN_ANULACIONES)
+            abiertos = [_abrir_segmento(directorio, s) for s in segmentos]
+            pendientes = set()
+            for columnas in abiertos:
+                pendientes.update(np.unique(columnas["venta"][columnas["estado"] == 0]).tolist())
+
+            estados = dict(
+                Venta.objects.filter(anulada_en__gte=desde).values_list("id", "estado")
+            )
+            if pendientes:
+                estados.update(
+                    Venta.objects.filter(id__in=pendientes).exclude(estado="PENDIENTE")
+                    .values_list("id", "estado")
+                )
+            if estados:
+                ids = np.array(sorted(estados), dtype=np.int64)
+                codigos = np.array([ESTADOS.index(estados[i]) for i in ids.tolist()], dtype=np.int8)
+                for nombre, columnas in zip(segmentos, abiertos):
+                    posiciones = np.searchsorted(ids, columnas["venta"])
+                    posiciones[posiciones == len(ids)] = 0
+                    tocadas = ids[posiciones] == columnas["venta"]
+                    if not tocadas.any():
+                        continue
+                    estado = columnas["estado"].copy()
+                    estado[tocadas] = codigos[posiciones[tocadas]]
+                    temporal = os.path.join(directorio, nombre, "estado.tmp.npy")
+                    np.save(temporal, estado)
+                    os.replace(temporal, os.path.join(directorio, nombre, "estado.npy"))
+                    cambios += int(tocadas.sum())
+            del abiertos
+
+        meta["segmentos"] = segmentos
+        meta["revisado_en"] = ahora.isoformat()
+        _escribir_meta(directorio, meta)
+        _borrar_sobrantes(directorio, segmentos)
+
+    return len(nuevas["item"]), cambios
+
+
+# CONSULTAS
+
+def _catalogo():
+    """Categoría de cada producto (vector por id) y nombres de las dimensiones."""
+    from inventario.models import Categoria, Producto
+    from ventas.models import Trabajador
+
+    productos = list(Producto.objects.values_list("id", "categoria_id", "nombre"))
+    tope = max((p[0] for p in productos), default=0) + 1
+    categoria_de = np.full(tope, -1, dtype=np.int32)
+    for pid, cid, _ in productos:
+        if cid is not None:
+            categoria_de[pid] = cid
+    nombres = {
+        "producto": {pid: nombre for pid, _, nombre in productos},
+        "categoria": dict(Categoria.objects.values_list("id", "nombre")),
+        "trabajador": dict(Trabajador.objects.values_list("id", "nombre")),
+    }
+    return categoria_de, nombres
+
+
+class Tabla:
+    """Líneas de venta cargadas desde los archivos de un directorio."""
+
+    def __init__(self, directorio=None):
+        self.directorio = directorio or directorio_por_defecto()
+        meta = _leer_meta(self.directorio)
+        self.segmentos = [_abrir_segmento(self.directorio, s) for s in meta["segmentos"]]
+        self.ultimo_item = meta["ultimo_item"]
+        self.categoria_de, self.nombres = _catalogo()
+
+    def __len__(self):
+        return sum(len(s["item"]) for s in self.segmentos)
+
+    def _dimension(self, columnas, nombre):
+        if nombre == "dia":
+            return columnas["dia"]
+        if nombre == "semana":
+            # EL ORDINAL 1 (0001-01-01) FUE LUNES
+            return columnas["dia"] - (columnas["dia"] - 1) % 7
+        if nombre == "mes":
+            dias = (columnas["dia"] - _DIA_1970).astype("datetime64[D]")
+            return dias.astype("datetime64[M]").astype(np.int32)
+        if nombre == "dia_semana":
+            return (columnas["dia"] - 1) % 7
+        if nombre == "categoria":
+            producto = np.asarray(columnas["producto"])
+            fuera = producto >= len(self.categoria_de)
+            return np.where(fuera, -1, self.categoria_de[np.where(fuera, 0, producto)])
+        if nombre in ("hora", "producto", "trabajador", "turno"):
+            return columnas[nombre]
+        raise ValueError(f"Dimensión desconocida: {nombre}")
+
+    def _valor(self, nombre, codigo):
+        """Código de la columna -> valor legible en el resultado."""
+        if nombre in ("dia", "semana"):
+            return date.fromordinal(codigo)
+        if nombre == "mes":
+            return date(1970 + codigo // 12, codigo % 12 + 1, 1)
+        if nombre == "turno":
+            return TURNOS[codigo]
+        if nombre in ("producto", "categoria", "trabajador"):
+            return None if codigo < 0 else codigo
+        return codigo
+
+    def _mascara(self, columnas, estado, filtros):
+        mascara = columnas["estado"] == ESTADOS.index(estado)
+        for clave, valor in filtros.items():
+            nombre, _, operador = clave.partition("__")
+            codigos = self._dimension(columnas, nombre)
+            if operador == "in":
+                mascara &= np.isin(codigos, list(valor))
+            elif not operador:
+                mascara &= codigos == valor
+            else:
+                raise ValueError(f"Filtro desconocido: {clave}")
+        return mascara
+
+    @staticmethod
+    def _en_dias(columnas, mascara, desde, hasta):
+        if desde is not None:
+            mascara = mascara & (columnas["dia"] >= desde.toordinal())
+        if hasta is not None:
+            mascara = mascara & (columnas["dia"] <= hasta.toordinal())
+        return mascara
+
+    def agrupar(self, por=(), metricas=("monto",), desde=None, hasta=None,
+                estado="CONFIRMADA", periodos=None, **filtros):
+        """
+        Agrupa las líneas del estado pedido (ventas confirmadas por omisión)
+        entre los días locales desde y hasta (inclusive) por las dimensiones
+        `por` y suma las `metricas`. Los filtros son por dimensión, con
+        igualdad o `__in` (p. ej. categoria=3, trabajador__in=[1, 2]).
+
+        Con `periodos` (lista de pares desde, hasta) se calculan todos en la
+        misma pasada y se puede agrupar por "periodo" (su posición en la
+        lista); una línea cuenta en cada periodo que la contenga.
+
+        Devuelve una lista de dicts ordenada por las dimensiones, con
+        `<dimension>__nombre` para producto, categoría y trabajador.
+        """
+        por = list(por)
+        for nombre in por:
+            if nombre not in DIMENSIONES and not (nombre == "periodo" and periodos is not None):
+                raise ValueError(f"Dimensión desconocida: {nombre}")
+        for nombre in metricas:
+            if nombre not in METRICAS:
+                raise ValueError(f"Métrica desconocida: {nombre}")
+
+        # 1) SE FILTRA CADA SEGMENTO Y SE JUNTAN SOLO LAS FILAS QUE SIRVEN
+        claves = [[] for _ in por]
+        valores = {"venta": [], "cantidad": [], "monto": [], "costo": []}
+        rangos = list(periodos) if periodos is not None else [(desde, hasta)]
+        for columnas in self.segmentos:
+            base = self._mascara(columnas, estado, filtros)
+            dimensiones = {}
+            for posicion, (inicio, fin) in enumerate(rangos):
+                mascara = self._en_dias(columnas, base, inicio, fin)
+                filas = int(mascara.sum())
+                if not filas:
+                    continue
+                for i, nombre in enumerate(por):
+                    if nombre == "periodo":
+                        claves[i].append(np.full(filas, posicion, dtype=np.int64))
+                        continue
+                    if nombre not in dimensiones:
+                        dimensiones[nombre] = np.asarray(self._dimension(columnas, nombre))
+                    claves[i].append(dimensiones[nombre][mascara].astype(np.int64))
+                for columna in valores:
+                    valores[columna].append(columnas[columna][mascara])
+
+        if not valores["venta"]:
+            return []
+        valores = {c: np.concatenate(v) for c, v in valores.items()}
+        filas = len(valores["venta"])
+
+        # 2) UNA CLAVE ENTERA POR GRUPO (BASE MIXTA) -> ÍNDICE DE GRUPO
+        if por:
+            columnas_clave = [np.concatenate(c) for c in claves]
+            minimos = [c.min() for c in columnas_clave]
+            clave = np.zeros(filas, dtype=np.int64)
+            for c, minimo in zip(columnas_clave, minimos):
+                clave = clave * int(c.max() - minimo + 1) + (c - minimo)
+            unicas, grupo = np.unique(clave, return_inverse=True)
+            grupo = grupo.reshape(-1)
+            n_grupos = len(unicas)
+            # SE DESARMA LA CLAVE PARA RECUPERAR CADA DIMENSIÓN
+            codigos = []
+            resto = unicas
+            for c, minimo in reversed(list(zip(columnas_clave, minimos))):
+                base = int(c.max() - minimo + 1)
+                codigos.append(resto % base + minimo)
+                resto = resto // base
+            codigos.reverse()
+        else:
+            grupo = np.zeros(filas, dtype=np.int64)
+            n_grupos = 1
+            codigos = []
+
+        # 3) SUMAS POR GRUPO
+        resultado = {}
+        for nombre in metricas:
+            if nombre == "ventas":
+                # VENTAS DISTINTAS POR GRUPO: PARES (GRUPO, VENTA) ÚNICOS
+                base = int(valores["venta"].max()) + 1
+                pares = np.unique(grupo * base + valores["venta"])
+                resultado[nombre] = np.bincount(pares // base, minlength=n_grupos)
+            elif nombre == "lineas":
+                resultado[nombre] = np.bincount(grupo, minlength=n_grupos)
+            elif nombre == "unidades":
+                resultado[nombre] = np.bincount(grupo, weights=valores["cantidad"], minlength=n_grupos)
+            elif nombre == "monto":
+                resultado[nombre] = np.bincount(grupo, weights=valores["monto"], minlength=n_grupos)
+            else:
+                resultado[nombre] = np.bincount(
+                    grupo, weights=valores["monto"] - valores["costo"], minlength=n_grupos
+                )
+
+        salida = []
+        for g in range(n_grupos):
+            fila = {}
+            for nombre, codigo in zip(por, codigos):
+                valor = self._valor(nombre, int(codigo[g]))
+                fila[nombre] = valor
+                if nombre in self.nombres:
+                    fila[f"{nombre}__nombre"] = self.nombres[nombre].get(valor)
+            for nombre in metricas:
+                valor = resultado[nombre][g]
+                if nombre in ("ventas", "lineas", "unidades"):
+                    fila[nombre] = int(round(valor))
+                else:
+                    fila[nombre] = round(float(valor), 2)
+            salida.append(fila)
+        return salida
+
+
+def tabla(directorio=None):
+    """
+    Tabla de este proceso, revisando la BD como mucho cada ACTUALIZAR_CADA
+    segundos (solo se leen las líneas nuevas y las anulaciones).
+    """
+    global _tabla, _revisado
+    with _lock:
+        if _tabla is None or time.monotonic() - _revisado > ACTUALIZAR_CADA:
+            actualizar(directorio)
+            _tabla = Tabla(directorio)
+            _revisado = time.monotonic()
+        return _tabla
+
+
+def limpiar():
+    """Olvida la tabla cargada; la próxima consulta revisa la BD."""
+    global _tabla, _revisado
+    with _lock:
+        _tabla = None
+        _revisado = 0.0
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from analisis.columnar import actualizar
+
+
+class Command(BaseCommand):
+    help = (
+        "Agrega las líneas de venta nuevas (y las anulaciones) a las columnas "
+        "del motor de análisis en ANALISIS_COLUMNAR_DIR."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reconstruir",
+            action="store_true",
+            help="Vuelve a cargar todas las líneas desde cero.",
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        resultado = actualizar(reconstruir=options["reconstruir"])
+        if resultado is None:
+            raise CommandError("Otro proceso está actualizando el motor de análisis.")
+        nuevas, cambios = resultado
+        self.stdout.write(self.style.SUCCESS(
+            f"{nuevas} líneas nuevas, {cambios} con estado cambiado "
+            f"({time.monotonic() - inicio:.1f} s)."
+        ))
@@ -0,0 +1,204 @@
+import random
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate, TruncWeek
+from django.utils import timezone
+
+from analisis.columnar import Tabla, actualizar
+from inventario.models import Categoria, Producto
+from ventas.models import Trabajador, Turno, Venta, VentaItem
+from ventas.periodos import filtro_dias
+
+VENTAS_POR_TANDA = 20000
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara las consultas de análisis agrupando línea a línea en la BD (ORM) "
+        "versus el motor columnar de NumPy, con datos generados. Se revierte todo al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lineas", type=int, default=1_000_000, help="Líneas de venta a generar.")
+        parser.add_argument("--productos", type=int, default=500, help="Productos del catálogo.")
+        parser.add_argument("--dias", type=int, default=365, help="Días de historia.")
+        parser.add_argument("--repeticiones", type=int, default=3, help="Veces que se repite cada consulta.")
+
+    def medir(self, funcion, repeticiones):
+        """Mejor tiempo de `repeticiones` ejecuciones, en segundos."""
+        mejor = None
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            duracion = time.perf_counter() - inicio
+            mejor = duracion if mejor is None else min(mejor, duracion)
+        return mejor
+
+    def generar(self, n_lineas, n_productos, n_dias):
+        azar = random.Random(1)
+        categorias = Categoria.objects.bulk_create([
+            Categoria(nombre=f"Bench categoría {i}") for i in range(12)
+        ])
+        productos = Producto.objects.bulk_create([
+            Producto(
+                sku=f"BENCH-AN-{i:05d}",
+                nombre=f"Producto benchmark {i}",
+                categoria=categorias[i % len(categorias)],
+                costo=Decimal(600 + i % 7 * 100),
+                precio_unitario=Decimal(1000 + i % 7 * 150),
+                stock=10 ** 6,
+            )
+            for i in range(n_productos)
+        ])
+        trabajadores = Trabajador.objects.bulk_create([
+            Trabajador(nombre=f"Bench {i}", turno_base="DIA" if i % 2 else "NOCHE") for i in range(8)
+        ])
+        turnos = Turno.objects.bulk_create([
+            Turno(trabajador=t, turno_tipo=t.turno_base) for t in trabajadores
+        ])
+
+        # LA FECHA DE LA VENTA ES auto_now_add: SE DESACTIVA PARA REPARTIR LAS VENTAS EN EL PASADO
+        campo_fecha = Venta._meta.get_field("fecha")
+        campo_fecha.auto_now_add = False
+        try:
+            ahora = timezone.now()
+            restantes = n_lineas
+            while restantes > 0:
+                lineas_por_venta = [azar.randint(1, 5) for _ in range(VENTAS_POR_TANDA)]
+                ventas = []
+                for _ in lineas_por_venta:
+                    turno = azar.choice(turnos)
+                    ventas.append(Venta(
+                        fecha=ahora - timedelta(seconds=azar.randrange(n_dias * 86400)),
+                        estado="CONFIRMADA",
+                        trabajador_id=turno.trabajador_id,
+                        turno=turno,
+                    ))
+                ventas = Venta.objects.bulk_create(ventas)
+
+                items = []
+                for venta, n in zip(ventas, lineas_por_venta):
+                    for producto in azar.sample(productos, n):
+                        cantidad = azar.randint(1, 4)
+                        items.append(VentaItem(
+                            venta=venta,
+                            producto=producto,
+                            cantidad=cantidad,
+                            precio_unitario=producto.precio_unitario,
+                            costo_unitario=producto.costo,
+                            subtotal=cantidad * producto.precio_unitario,
+                        ))
+                        restantes -= 1
+                        if restantes == 0:
+                            break
+                    if restantes == 0:
+                        break
+                VentaItem.objects.bulk_create(items, batch_size=5000)
+        finally:
+            campo_fecha.auto_now_add = True
+
+    def handle(self, *args, **options):
+        n_lineas = options["lineas"]
+        repeticiones = options["repeticiones"]
+        directorio = tempfile.mkdtemp(prefix="bench-analisis-")
+        zona = timezone.get_default_timezone()
+        hasta = timezone.localdate()
+        desde = hasta - timedelta(days=options["dias"])
+
+        self.stdout.write(f"Base de datos: {connection.vendor}")
+        self.stdout.write(f"{n_lineas} líneas, {options['productos']} productos, {options['dias']} días")
+
+        confirmadas = VentaItem.objects.filter(
+            filtro_dias(desde, hasta, campo="venta__fecha"), venta__estado="CONFIRMADA"
+        )
+        margen = ExpressionWrapper(
+            F("subtotal") - F("cantidad") * F("costo_unitario"),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        )
+        # MISMAS PREGUNTAS EN LOS DOS MOTORES
+        consultas = [
+            (
+                "monto por día",
+                lambda: list(
+                    confirmadas.annotate(dia=TruncDate("venta__fecha", tzinfo=zona))
+                    .values("dia").annotate(monto=Sum("subtotal")).order_by()
+                ),
+                lambda t: t.agrupar(["dia"], ["monto"], desde, hasta),
+            ),
+            (
+                "margen por categoría y semana",
+                lambda: list(
+                    confirmadas.annotate(semana=TruncWeek("venta__fecha", tzinfo=zona))
+                    .values("producto__categoria", "semana").annotate(ganancia=Sum(margen)).order_by()
+                ),
+                lambda t: t.agrupar(["categoria", "semana"], ["margen"], desde, hasta),
+            ),
+            (
+                "unidades por trabajador y producto",
+                lambda: list(
+                    confirmadas.values("venta__trabajador", "producto")
+                    .annotate(unidades=Sum("cantidad")).order_by()
+                ),
+                lambda t: t.agrupar(["trabajador", "producto"], ["unidades"], desde, hasta),
+            ),
+            (
+                "ventas y monto por turno",
+                lambda: list(
+                    confirmadas.values("venta__trabajador", "venta__turno__turno_tipo")
+                    .annotate(n_ventas=Count("venta", distinct=True), monto=Sum("subtotal")).order_by()
+                ),
+                lambda t: t.agrupar(["trabajador", "turno"], ["ventas", "monto"], desde, hasta),
+            ),
+        ]
+
+        try:
+            with transaction.atomic():
+                inicio = time.perf_counter()
+                self.generar(n_lineas, options["productos"], options["dias"])
+                self.stdout.write(f"Datos generados en {time.perf_counter() - inicio:.1f} s")
+
+                inicio = time.perf_counter()
+                actualizar(directorio)
+                carga = time.perf_counter() - inicio
+                inicio = time.perf_counter()
+                tabla = Tabla(directorio)
+                apertura = time.perf_counter() - inicio
+                self.stdout.write(f"Carga inicial a columnas: {carga:.2f} s; abrir: {apertura * 1000:.1f} ms")
+
+                self.stdout.write(f"{'consulta':<36} {'ORM':>10} {'columnar':>10} {'veces':>8}")
+                for nombre, orm, col in consultas:
+                    t_orm = self.medir(orm, repeticiones)
+                    t_col = self.medir(lambda: col(tabla), repeticiones)
+                    self.stdout.write(
+                        f"{nombre:<36} {t_orm * 1000:>8.0f}ms {t_col * 1000:>8.0f}ms {t_orm / t_col:>7.1f}x"
+                    )
+
+                # ACTUALIZACIÓN INCREMENTAL: UNA TANDA CHICA DE VENTAS NUEVAS Y ANULACIONES
+                producto = Producto.objects.filter(sku__startswith="BENCH-AN-").first()
+                for _ in range(100):
+                    venta = Venta.objects.create(estado="CONFIRMADA")
+                    VentaItem.objects.create(venta=venta, producto=producto, cantidad=1,
+                                             precio_unitario=producto.precio_unitario)
+                Venta.objects.filter(id__in=Venta.objects.order_by("-id").values("id")[:10]).update(
+                    estado="ANULADA", anulada_en=timezone.now()
+                )
+                inicio = time.perf_counter()
+                nuevas, cambios = actualizar(directorio)
+                self.stdout.write(
+                    f"Actualización incremental ({nuevas} líneas nuevas, {cambios} anuladas): "
+                    f"{(time.perf_counter() - inicio) * 1000:.0f} ms"
+                )
+
+                del tabla
+                transaction.set_rollback(True)
+        finally:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+        self.stdout.write(self.style.SUCCESS("Benchmark terminado, no se guardaron datos."))
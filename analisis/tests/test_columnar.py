@@ -0,0 +1,203 @@
+import shutil
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from analisis import columnar
+from inventario.models import Categoria, Producto
+from ventas import mapa_horario
+from ventas.anulacion import anular_ventas
+from ventas.checkout import registrar_venta
+from ventas.models import Trabajador, Turno, Venta, VentaItem
+from ventas.resumenes import agregar, reemplazar
+
+SANTIAGO = ZoneInfo("America/Santiago")
+
+
+class ColumnarTests(TestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio, ignore_errors=True)
+        ajustes = override_settings(ANALISIS_COLUMNAR_DIR=self.directorio)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        columnar.limpiar()
+        self.addCleanup(columnar.limpiar)
+        mapa_horario.limpiar()
+
+        self.cervezas = Categoria.objects.create(nombre="Cervezas")
+        self.cerveza = Producto.objects.create(
+            sku="CO-1", nombre="Cerveza", categoria=self.cervezas,
+            costo=Decimal("600"), precio_unitario=Decimal("1000"), stock=1000,
+        )
+        self.vino = Producto.objects.create(
+            sku="CO-2", nombre="Vino", costo=Decimal("3000"), precio_unitario=Decimal("5000"), stock=1000
+        )
+        self.ana = Trabajador.objects.create(nombre="Ana", turno_base="DIA")
+        self.turno = Turno.objects.create(trabajador=self.ana, turno_tipo="DIA")
+
+    def vender(self, cuando, items, trabajador=None):
+        venta = registrar_venta(
+            [{"id": p.id, "cantidad": c} for p, c in items],
+            trabajador=trabajador,
+            turno=self.turno if trabajador else None,
+        )
+        Venta.objects.filter(id=venta.id).update(fecha=cuando)
+        return venta
+
+    def test_agrupa_por_dia_local_y_categoria(self):
+        # 23:30 DEL LUNES EN SANTIAGO YA ES MARTES EN UTC
+        self.vender(datetime(2025, 3, 3, 23, 30, tzinfo=SANTIAGO), [(self.cerveza, 2), (self.vino, 1)])
+        self.vender(datetime(2025, 3, 4, 10, 0, tzinfo=SANTIAGO), [(self.cerveza, 1)])
+        columnar.actualizar(self.directorio)
+        tabla = columnar.Tabla(self.directorio)
+
+        self.assertEqual(len(tabla), 3)
+        self.assertEqual(
+            tabla.agrupar(["dia"], ["ventas", "unidades", "monto"]),
+            [
+                {"dia": date(2025, 3, 3), "ventas": 1, "unidades": 3, "monto": 7000.0},
+                {"dia": date(2025, 3, 4), "ventas": 1, "unidades": 1, "monto": 1000.0},
+            ],
+        )
+        self.assertEqual(
+            tabla.agrupar(["categoria"], ["margen"]),
+            [
+                {"categoria": None, "categoria__nombre": None, "margen": 2000.0},
+                {"categoria": self.cervezas.id, "categoria__nombre": "Cervezas", "margen": 1200.0},
+            ],
+        )
+        self.assertEqual(
+            tabla.agrupar(["dia_semana", "hora"], ["unidades"], producto=self.cerveza.id),
+            [{"dia_semana": 0, "hora": 23, "unidades": 2}, {"dia_semana": 1, "hora": 10, "unidades": 1}],
+        )
+        self.assertEqual(
+            tabla.agrupar(["semana"], ["lineas"], desde=date(2025, 3, 4), hasta=date(2025, 3, 31)),
+            [{"semana": date(2025, 3, 3), "lineas": 1}],
+        )
+
+    def test_varios_periodos_en_una_pasada(self):
+        self.vender(datetime(2025, 3, 3, 12, 0, tzinfo=SANTIAGO), [(self.cerveza, 2)])
+        self.vender(datetime(2025, 3, 10, 12, 0, tzinfo=SANTIAGO), [(self.vino, 1)])
+        columnar.actualizar(self.directorio)
+        tabla = columnar.Tabla(self.directorio)
+
+        # LOS PERIODOS SE TOPAN EL 2025-03-03: ESA LÍNEA CUENTA EN AMBOS
+        self.assertEqual(
+            tabla.agrupar(
+                ["periodo", "producto"], ["unidades"],
+                periodos=[(date(2025, 3, 1), date(2025, 3, 5)), (date(2025, 3, 3), date(2025, 3, 31))],
+            ),
+            [
+                {"periodo": 0, "producto": self.cerveza.id, "producto__nombre": "Cerveza", "unidades": 2},
+                {"periodo": 1, "producto": self.cerveza.id, "producto__nombre": "Cerveza", "unidades": 2},
+                {"periodo": 1, "producto": self.vino.id, "producto__nombre": "Vino", "unidades": 1},
+            ],
+        )
+        with self.assertRaises(ValueError):
+            tabla.agrupar(["periodo"], ["unidades"])
+
+    def test_actualizacion_incremental_y_anulaciones(self):
+        primera = self.vender(datetime(2025, 3, 3, 12, 0, tzinfo=SANTIAGO), [(self.cerveza, 1)])
+        self.assertEqual(columnar.actualizar(self.directorio), (1, 0))
+
+        self.vender(datetime(2025, 3, 3, 13, 0, tzinfo=SANTIAGO), [(self.vino, 1)], trabajador=self.ana)
+        anular_ventas([primera.id])
+        # SOLO LA LÍNEA NUEVA SE LEE; LA ANULADA CAMBIA DE ESTADO
+        self.assertEqual(columnar.actualizar(self.directorio), (1, 1))
+        self.assertEqual(len(columnar._leer_meta(self.directorio)["segmentos"]), 2)
+
+        tabla = columnar.Tabla(self.directorio)
+        self.assertEqual(
+            tabla.agrupar(["trabajador", "turno"], ["ventas", "monto"]),
+            [{"trabajador": self.ana.id, "trabajador__nombre": "Ana", "turno": "DIA", "ventas": 1, "monto": 5000.0}],
+        )
+        self.assertEqual(tabla.agrupar([], ["ventas"], estado="ANULADA"), [{"ventas": 1}])
+
+    def test_linea_confirmada_tarde_con_id_menor(self):
+        self.vender(datetime(2025, 3, 3, 12, 0, tzinfo=SANTIAGO), [(self.cerveza, 1)])
+        tarde = self.vender(datetime(2025, 3, 3, 12, 5, tzinfo=SANTIAGO), [(self.vino, 1)])
+        self.vender(datetime(2025, 3, 3, 12, 10, tzinfo=SANTIAGO), [(self.cerveza, 1)])
+        # LA LÍNEA DEL MEDIO AÚN NO ERA VISIBLE AL ACTUALIZAR (COMMIT PENDIENTE)
+        item = tarde.items.get()
+        VentaItem.objects.filter(id=item.id).delete()
+        self.assertEqual(columnar.actualizar(self.directorio), (2, 0))
+
+        VentaItem.objects.bulk_create([item])
+        self.assertLess(item.id, columnar._leer_meta(self.directorio)["ultimo_item"])
+        self.assertEqual(columnar.actualizar(self.directorio), (1, 0))
+        self.assertEqual(columnar.actualizar(self.directorio), (0, 0))
+
+        tabla = columnar.Tabla(self.directorio)
+        self.assertEqual(len(tabla), 3)
+        self.assertEqual(tabla.agrupar([], ["ventas", "monto"]), [{"ventas": 3, "monto": 7000.0}])
+
+    def test_junta_segmentos(self):
+        for i in range(columnar.MAX_SEGMENTOS + 1):
+            self.vender(datetime(2025, 3, 3, 12, i, tzinfo=SANTIAGO), [(self.cerveza, 1)])
+            columnar.actualizar(self.directorio)
+
+        self.assertEqual(len(columnar._leer_meta(self.directorio)["segmentos"]), 1)
+        tabla = columnar.Tabla(self.directorio)
+        self.assertEqual(tabla.agrupar([], ["ventas"]), [{"ventas": columnar.MAX_SEGMENTOS + 1}])
+
+    def test_nombres_repetidos_se_agrupan_por_id_en_ambos_motores(self):
+        self.client.force_login(get_user_model().objects.create_superuser("duenio", password="x"))
+        otra_cerveza = Producto.objects.create(
+            sku="CO-3", nombre="Cerveza", costo=Decimal("600"), precio_unitario=Decimal("1000"), stock=1000
+        )
+        otra_ana = Trabajador.objects.create(nombre="Ana", turno_base="DIA")
+        self.vender(datetime(2025, 3, 4, 12, 0, tzinfo=SANTIAGO), [(self.cerveza, 3)], self.ana)
+        self.vender(datetime(2025, 3, 5, 12, 0, tzinfo=SANTIAGO), [(otra_cerveza, 2)], otra_ana)
+        reemplazar(None, None, agregar())
+        rango = {"desde": "2025-03-01", "hasta": "2025-03-31"}
+
+        for motor in ("orm", "columnar"):
+            r = self.client.get(reverse("analisis:index"), {**rango, "motor": motor})
+            self.assertEqual(r.context["top_labels"], ["Cerveza", "Cerveza"], motor)
+            self.assertEqual(r.context["top_data"], [3, 2], motor)
+            self.assertEqual(
+                [(f["trabajador__nombre"], f["total_ventas"]) for f in r.context["stats_trabajadores"]],
+                [("Ana", 1), ("Ana", 1)],
+                motor,
+            )
+
+    def test_panel_con_motor_columnar_igual_al_orm(self):
+        self.client.force_login(get_user_model().objects.create_superuser("duenio", password="x"))
+        self.vender(datetime(2025, 3, 3, 23, 30, tzinfo=SANTIAGO), [(self.cerveza, 2), (self.vino, 1)], self.ana)
+        self.vender(datetime(2025, 3, 5, 12, 0, tzinfo=SANTIAGO), [(self.cerveza, 4)])
+        # DEL PERIODO ANTERIOR (2025-01-29..02-28; EL 2 DE FEBRERO VA CON EL 5 DE MARZO) Y DEL AÑO PASADO
+        self.vender(datetime(2025, 2, 2, 12, 0, tzinfo=SANTIAGO), [(self.cerveza, 4)], self.ana)
+        self.vender(datetime(2024, 3, 3, 12, 0, tzinfo=SANTIAGO), [(self.vino, 2)], self.ana)
+        # LOS RESÚMENES DEL ORM SE ARMARON CON LA FECHA DE HOY: SE RECALCULAN
+        reemplazar(None, None, agregar())
+        rango = {"desde": "2025-03-01", "hasta": "2025-03-31", "mapa": "unidades"}
+
+        orm = self.client.get(reverse("analisis:index"), rango)
+        col = self.client.get(reverse("analisis:index"), {**rango, "motor": "columnar"})
+
+        self.assertEqual(col.context["motor"], "columnar")
+        for clave in (
+            "vd_labels", "vd_data", "vd_anterior", "vd_anio",
+            "top_labels", "top_data", "top_anterior", "top_anio",
+            "cat_labels", "cat_data", "cat_anterior", "cat_anio",
+        ):
+            self.assertEqual(col.context[clave], orm.context[clave], clave)
+        self.assertEqual(len(col.context["vd_labels"]), 31)
+        self.assertEqual(col.context["vd_anterior"][4], 4000.0)
+        self.assertEqual(sum(col.context["vd_anterior"]), 4000.0)
+        self.assertEqual(
+            [(f["trabajador__nombre"], f["turno_tipo"], f["total_ventas"], f["var_anterior"], f["var_anio"])
+             for f in col.context["stats_trabajadores"]],
+            [(f["trabajador__nombre"], f["turno_tipo"], f["total_ventas"], f["var_anterior"], f["var_anio"])
+             for f in orm.context["stats_trabajadores"]],
+        )
+        self.assertEqual(
+            [[c["etiqueta"] for c in f["celdas"]] for f in col.context["mapa_filas"]],
+            [[c["etiqueta"] for c in f["celdas"]] for f in orm.context["mapa_filas"]],
+        )
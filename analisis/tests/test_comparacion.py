@@ -0,0 +1,78 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from inventario.models import Categoria, Producto
+from ventas.models import ResumenDiario, ResumenDiarioProducto, ResumenDiarioTrabajador, Trabajador
+
+
+class ComparacionPeriodosTests(TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_superuser("duenio", password="x"))
+        cervezas = Categoria.objects.create(nombre="Cervezas")
+        self.cerveza = Producto.objects.create(
+            sku="CP-1", nombre="Cerveza", categoria=cervezas, precio_unitario=Decimal("1000"), stock=10
+        )
+        self.ana = Trabajador.objects.create(nombre="Ana", turno_base="DIA")
+        # ACTUAL 2025-03-01..10, ANTERIOR 2025-02-19..28, AÑO PASADO 2024-03-01..10
+        for fecha, monto in [(date(2025, 3, 2), 3000), (date(2025, 2, 20), 2000), (date(2024, 3, 2), 1500)]:
+            ResumenDiario.objects.create(fecha=fecha, ventas=1, total=Decimal(monto))
+            ResumenDiarioProducto.objects.create(
+                fecha=fecha, producto=self.cerveza, cantidad=monto // 1000, monto=Decimal(monto)
+            )
+            ResumenDiarioTrabajador.objects.create(
+                fecha=fecha, trabajador=self.ana, turno_tipo="DIA", ventas=1, total=Decimal(monto)
+            )
+        # DÍA DEL PERIODO ANTERIOR SIN CONTRAPARTE CON VENTAS EN EL ACTUAL (VA AL 2025-03-07)
+        ResumenDiario.objects.create(fecha=date(2025, 2, 25), ventas=1, total=Decimal("500"))
+        # FUERA DE LOS TRES PERIODOS: NO CUENTA
+        ResumenDiario.objects.create(fecha=date(2025, 1, 5), ventas=1, total=Decimal("99999"))
+
+    def test_paneles_comparan_con_periodo_anterior_y_anio_pasado(self):
+        r = self.client.get(reverse("analisis:index"), {"desde": "2025-03-01", "hasta": "2025-03-10"})
+
+        # TODOS LOS DÍAS DEL RANGO, TENGAN O NO VENTAS EN EL PERIODO ACTUAL
+        self.assertEqual(r.context["vd_labels"], [f"2025-03-{d:02d}" for d in range(1, 11)])
+        self.assertEqual(r.context["dias_con_ventas"], 1)
+        self.assertEqual(r.context["vd_data"][1], 3000.0)
+        # EL 2 DE MARZO SE COMPARA CON EL 20 DE FEBRERO (10 DÍAS ANTES) Y EL 2024-03-02
+        self.assertEqual(r.context["vd_anterior"][1], 2000.0)
+        self.assertEqual(r.context["vd_anterior"][6], 500.0)
+        self.assertEqual(r.context["vd_anio"][1], 1500.0)
+        self.assertEqual(
+            [(c["total"], c["variacion"]) for c in r.context["comparacion"]],
+            [(3000.0, None), (2500.0, 20.0), (1500.0, 100.0)],
+        )
+        # LAS SERIES DEL GRÁFICO SUMAN LO MISMO QUE LOS TOTALES
+        self.assertEqual(
+            [sum(r.context[clave]) for clave in ("vd_data", "vd_anterior", "vd_anio")],
+            [c["total"] for c in r.context["comparacion"]],
+        )
+
+        self.assertEqual(
+            (r.context["top_data"], r.context["top_anterior"], r.context["top_anio"]), ([3], [2], [1])
+        )
+        self.assertEqual(
+            (r.context["cat_data"], r.context["cat_anterior"], r.context["cat_anio"]),
+            ([3000.0], [2000.0], [1500.0]),
+        )
+        fila = r.context["stats_trabajadores"][0]
+        self.assertEqual((fila["total_ventas"], fila["monto_total"]), (1, Decimal("3000")))
+        self.assertEqual((fila["var_anterior"], fila["var_anio"]), (50.0, 100.0))
+
+    def test_una_consulta_por_panel(self):
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(reverse("analisis:index"), {"desde": "2025-03-01", "hasta": "2025-03-10"})
+
+        tablas = [ResumenDiario, ResumenDiarioProducto, ResumenDiarioTrabajador]
+        resumenes = [
+            q["sql"] for q in consultas.captured_queries
+            if any(f'"{m._meta.db_table}"' in q["sql"] for m in tablas)
+        ]
+        # DÍAS, TRABAJADORES, TOP Y CATEGORÍAS: LOS TRES PERIODOS VAN EN CADA UNA
+        self.assertEqual(len(resumenes), 4, resumenes)
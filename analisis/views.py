@@ -1,13 +1,28 @@
-from datetime import datetime, timedelta
+from datetime import timedelta
 
-from django.db.models import Sum, F, DecimalField, ExpressionWrapper, Count
-from django.db.models.functions import TruncDate
+from django.conf import settings
+from django.db.models import F, Q, Sum
 from django.shortcuts import render
-from django.utils import timezone
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponseForbidden
 
-from ventas.models import Venta, VentaItem, Trabajador, Turno
+from ventas.mapa_horario import DIAS_SEMANA, mapa_horario
+from ventas.models import ResumenDiario, ResumenDiarioProducto, ResumenDiarioTrabajador
+from ventas.periodos import leer_rango, periodos_comparados, un_anio_despues
+
+from . import columnar
+
+# MÉTRICAS DEL MAPA DE CALOR: (POSICIÓN EN LA CELDA, NOMBRE)
+METRICAS_MAPA = {"ventas": (0, "Ventas"), "unidades": (1, "Unidades"), "total": (2, "Monto")}
+
+MOTORES = ["orm", "columnar"]
+
+# PERIODOS CONTRA LOS QUE SE COMPARA CADA PANEL (ventas.periodos.periodos_comparados)
+PERIODOS_COMPARADOS = {
+    "actual": "Periodo actual",
+    "anterior": "Periodo anterior",
+    "anio": "Mismo periodo del año pasado",
+}
 
 
 # Solo el dueño
@@ -18,106 +33,275 @@ def duenio_required(view_func):
         return view_func(request, *args, **kwargs)
     return wrapper
 
-@login_required
-@duenio_required
-def index(request):
+
+def variacion(actual, anterior):
+    """Variación porcentual de actual sobre anterior; None si no hay base."""
+    if not anterior:
+        return None
+    return round((float(actual or 0) - float(anterior)) / float(anterior) * 100, 1)
+
+
+def _serie_alineada(totales, desde, hasta, a_dia_actual):
     """
-    Módulo de análisis avanzado del negocio.
-    Genera:
-    - Ventas diarias
-    - Top productos más vendidos
-    - Monto por categoría
-    - Rendimiento por trabajador/turno
-    - Filtro por rango de fechas
+    Totales {fecha: total} de un periodo comparado, puestos en el día del
+    rango [desde, hasta] que les corresponde. Ningún día se pierde: el 29 de
+    febrero del año pasado se suma al 28 y lo que cae fuera queda en el borde.
     """
+    serie = [0.0] * ((hasta - desde).days + 1)
+    for fecha, total in totales.items():
+        dia = min(max(a_dia_actual(fecha), desde), hasta)
+        serie[(dia - desde).days] += float(total or 0)
+    return serie
 
-    hoy = timezone.localdate()
 
-#Esto es de los GET
-    ds = request.GET.get("desde")
-    hs = request.GET.get("hasta")
+def _datos_orm(periodos):
+    """
+    Ventas diarias, trabajadores, top productos y categorías desde los
+    resúmenes diarios. Cada panel lee los tres periodos en la misma consulta
+    (Sum con filter=Q(...) por periodo), no una consulta por periodo.
+    """
+    filtros = {
+        clave: Q(fecha__gte=desde, fecha__lte=hasta) for clave, (desde, hasta) in periodos.items()
+    }
+    cualquiera = Q()
+    for filtro in filtros.values():
+        cualquiera |= filtro
+    actual, anterior, anio = filtros["actual"], filtros["anterior"], filtros["anio"]
 
-    def parse_date(s, fallback):
-        try:
-            return datetime.strptime(s, "%Y-%m-%d").date() if s else fallback
-        except ValueError:
-            return fallback
+    resumen_productos = ResumenDiarioProducto.objects.filter(cualquiera)
 
-    desde = parse_date(ds, hoy - timedelta(days=30))
-    hasta = parse_date(hs, hoy)
+    # LOS PERIODOS PUEDEN TOPARSE (RANGOS DE MÁS DE UN AÑO): UN DÍA VA A
+    # CADA PERIODO QUE LO CONTENGA
+    dias = {clave: {} for clave in periodos}
+    for fila in (
+        ResumenDiario.objects.filter(cualquiera, ventas__gt=0)
+        .values("fecha", "total")
+        .order_by("fecha")
+    ):
+        for clave, (desde, hasta) in periodos.items():
+            if desde <= fila["fecha"] <= hasta:
+                dias[clave][fila["fecha"]] = fila["total"]
 
-#Ventas Confirmadas
-    ventas_qs = Venta.objects.filter(
-        estado="CONFIRMADA",
-        fecha__date__gte=desde,
-        fecha__date__lte=hasta,
+    stats_trabajadores = (
+        ResumenDiarioTrabajador.objects.filter(cualquiera)
+        # POR ID: DOS TRABAJADORES PUEDEN LLAMARSE IGUAL
+        .values("trabajador_id", "trabajador__nombre", "turno_tipo")
+        .annotate(
+            total_ventas=Sum("ventas", filter=actual),
+            monto_total=Sum("total", filter=actual),
+            monto_anterior=Sum("total", filter=anterior),
+            monto_anio=Sum("total", filter=anio),
+        )
+        .filter(total_ventas__gt=0)
+        .order_by("-monto_total", "trabajador_id", "turno_tipo")
     )
 
-# Ventas diarias
-    ventas_diarias = (
-        ventas_qs
-        .annotate(dia=TruncDate("fecha"))
-        .values("dia")
-        .annotate(monto_total=Sum("total"))
-        .order_by("dia")
+    top = (
+        resumen_productos
+        .values("producto_id", nombre=F("producto__nombre"))
+        .annotate(
+            cantidad_total=Sum("cantidad", filter=actual),
+            cantidad_anterior=Sum("cantidad", filter=anterior),
+            cantidad_anio=Sum("cantidad", filter=anio),
+        )
+        .filter(cantidad_total__gt=0)
+        .order_by("-cantidad_total", "producto_id")[:5]
     )
 
-    vd_labels = [v["dia"].strftime("%Y-%m-%d") for v in ventas_diarias]
-    vd_data = [float(v["monto_total"] or 0) for v in ventas_diarias]
-
-# Ventas x trabajador
-    ventas_trabajador_qs = ventas_qs.filter(trabajador__isnull=False)
-
-    stats_trabajadores = (
-        ventas_trabajador_qs
-        .values("trabajador__nombre", "turno__turno_tipo")
+    categorias = (
+        resumen_productos
+        .values(cat=F("producto__categoria__nombre"))
+        # EL ALIAS monto TAPA AL CAMPO: LAS COMPARACIONES VAN ANTES
         .annotate(
-            total_ventas=Count("id"),
-            monto_total=Sum("total"),
+            monto_anterior=Sum("monto", filter=anterior),
+            monto_anio=Sum("monto", filter=anio),
+            monto=Sum("monto", filter=actual),
         )
-        .order_by("-monto_total")
+        .filter(monto__gt=0)
+        .order_by("-monto")
     )
 
+    return dias, list(stats_trabajadores), list(top), list(categorias)
 
-#Top productos
 
-    top = (
-        VentaItem.objects.filter(
-            venta__estado="CONFIRMADA",
-            venta__fecha__date__gte=desde,
-            venta__fecha__date__lte=hasta,
-        )
-        .annotate(nombre=F("producto__nombre"))
-        .values("nombre")
-        .annotate(cantidad_total=Sum("cantidad"))
-        .order_by("-cantidad_total")[:5]
-    )
+def _datos_columnar(periodos):
+    """Lo mismo que _datos_orm, agrupando las líneas de venta en memoria en una pasada."""
+    tabla = columnar.tabla()
+    claves = list(periodos)
+    rangos = list(periodos.values())
 
-    top_labels = [t["nombre"] for t in top]
-    top_data = [int(t["cantidad_total"] or 0) for t in top]
+    def por_periodo(por, metricas):
+        # {clave del grupo: {periodo: fila}}
+        grupos = {}
+        for f in tabla.agrupar(["periodo", *por], metricas, periodos=rangos):
+            grupo = tuple(f[nombre] for nombre in por)
+            grupos.setdefault(grupo, {})[claves[f["periodo"]]] = f
+        return grupos
 
+    def valor(filas, periodo, metrica):
+        return filas[periodo][metrica] if periodo in filas else None
 
-#Monto x categoria
+    dias = {clave: {} for clave in claves}
+    for (dia,), filas in por_periodo(["dia"], ["monto"]).items():
+        for clave, f in filas.items():
+            dias[clave][dia] = f["monto"]
 
-    monto_expr = ExpressionWrapper(
-        F("cantidad") * F("precio_unitario"),
-        output_field=DecimalField(max_digits=12, decimal_places=2),
+    stats_trabajadores = sorted(
+        (
+            {
+                "trabajador_id": trabajador,
+                "trabajador__nombre": filas["actual"]["trabajador__nombre"],
+                "turno_tipo": turno,
+                "total_ventas": filas["actual"]["ventas"],
+                "monto_total": filas["actual"]["monto"],
+                "monto_anterior": valor(filas, "anterior", "monto"),
+                "monto_anio": valor(filas, "anio", "monto"),
+            }
+            for (trabajador, turno), filas in por_periodo(["trabajador", "turno"], ["ventas", "monto"]).items()
+            if trabajador is not None and "actual" in filas
+        ),
+        key=lambda f: (-f["monto_total"], f["trabajador_id"], f["turno_tipo"]),
     )
 
-    categorias = (
-        VentaItem.objects.filter(
-            venta__estado="CONFIRMADA",
-            venta__fecha__date__gte=desde,
-            venta__fecha__date__lte=hasta,
-        )
-        .annotate(cat=F("producto__categoria__nombre"))
-        .values("cat")
-        .annotate(monto=Sum(monto_expr))
-        .order_by("-monto")
+    top = sorted(
+        (
+            {
+                "producto_id": producto,
+                "nombre": filas["actual"]["producto__nombre"],
+                "cantidad_total": filas["actual"]["unidades"],
+                "cantidad_anterior": valor(filas, "anterior", "unidades"),
+                "cantidad_anio": valor(filas, "anio", "unidades"),
+            }
+            for (producto,), filas in por_periodo(["producto"], ["unidades"]).items()
+            if "actual" in filas and filas["actual"]["unidades"] > 0
+        ),
+        key=lambda f: (-f["cantidad_total"], f["producto_id"]),
+    )[:5]
+
+    categorias = sorted(
+        (
+            {
+                "cat": filas["actual"]["categoria__nombre"],
+                "monto": filas["actual"]["monto"],
+                "monto_anterior": valor(filas, "anterior", "monto"),
+                "monto_anio": valor(filas, "anio", "monto"),
+            }
+            for filas in por_periodo(["categoria"], ["monto"]).values()
+            if "actual" in filas and filas["actual"]["monto"] > 0
+        ),
+        key=lambda f: -f["monto"],
+    )
+
+    return dias, stats_trabajadores, top, categorias
+
+
+def mapa_horario_columnar(desde, hasta):
+    """Misma matriz de 7 × 24 que ventas.mapa_horario, desde el motor columnar."""
+    matriz = [[[0, 0, 0] for _ in range(24)] for _ in range(7)]
+    celdas = columnar.tabla().agrupar(
+        ["dia_semana", "hora"], ["ventas", "unidades", "monto"], desde, hasta
     )
+    for f in celdas:
+        matriz[f["dia_semana"]][f["hora"]] = [f["ventas"], f["unidades"], f["monto"]]
+    return matriz
+
+
+@login_required
+@duenio_required
+def index(request):
+    """
+    Módulo de análisis avanzado del negocio.
+    Genera:
+    - Ventas diarias
+    - Top productos más vendidos
+    - Monto por categoría
+    - Rendimiento por trabajador/turno
+    - Comparación con el periodo anterior y el mismo periodo del año pasado
+    - Mapa de calor por hora y día de la semana
+    - Filtro por rango de fechas
+    """
+
+#Esto es de los GET (días locales)
+    desde, hasta = leer_rango(request.GET, dias=30)
+
+#Datos del motor elegido: resúmenes en la BD (orm) o columnas en memoria (columnar)
+    motor = request.GET.get("motor", settings.ANALISIS_MOTOR)
+    if motor not in MOTORES:
+        motor = settings.ANALISIS_MOTOR
+    periodos = periodos_comparados(desde, hasta)
+    if motor == "columnar":
+        dias, stats_trabajadores, top, categorias = _datos_columnar(periodos)
+    else:
+        dias, stats_trabajadores, top, categorias = _datos_orm(periodos)
+
+#Cada día del rango se compara con el mismo día del periodo anterior y del año pasado
+#(todos los días del rango, aunque alguno no tenga ventas en el periodo actual)
+    salto = desde - periodos["anterior"][0]
+    fechas = [desde + timedelta(days=i) for i in range((hasta - desde).days + 1)]
+    vd_labels = [f.strftime("%Y-%m-%d") for f in fechas]
+    vd_data = [float(dias["actual"].get(f) or 0) for f in fechas]
+    vd_anterior = _serie_alineada(dias["anterior"], desde, hasta, lambda d: d + salto)
+    vd_anio = _serie_alineada(dias["anio"], desde, hasta, un_anio_despues)
+
+    top_labels = [t["nombre"] for t in top]
+    top_data = [int(t["cantidad_total"] or 0) for t in top]
+    top_anterior = [int(t["cantidad_anterior"] or 0) for t in top]
+    top_anio = [int(t["cantidad_anio"] or 0) for t in top]
 
     cat_labels = [c["cat"] or "Sin categoría" for c in categorias]
     cat_data = [float(c["monto"] or 0) for c in categorias]
+    cat_anterior = [float(c["monto_anterior"] or 0) for c in categorias]
+    cat_anio = [float(c["monto_anio"] or 0) for c in categorias]
+
+    for fila in [*stats_trabajadores, *categorias]:
+        actual = fila["monto_total"] if "monto_total" in fila else fila["monto"]
+        fila["var_anterior"] = variacion(actual, fila["monto_anterior"])
+        fila["var_anio"] = variacion(actual, fila["monto_anio"])
+
+    totales = {clave: sum(float(t or 0) for t in dias[clave].values()) for clave in periodos}
+    comparacion = [
+        {
+            "nombre": nombre,
+            "desde": periodos[clave][0].strftime("%Y-%m-%d"),
+            "hasta": periodos[clave][1].strftime("%Y-%m-%d"),
+            "total": totales[clave],
+            "variacion": None if clave == "actual" else variacion(totales["actual"], totales[clave]),
+        }
+        for clave, nombre in PERIODOS_COMPARADOS.items()
+    ]
+
+
+# Mapa de calor hora x día de la semana (hora local)
+
+    metrica = request.GET.get("mapa", "ventas")
+    if metrica not in METRICAS_MAPA:
+        metrica = "ventas"
+    posicion = METRICAS_MAPA[metrica][0]
+
+    matriz = mapa_horario_columnar(desde, hasta) if motor == "columnar" else mapa_horario(desde, hasta)
+    maximo = max((celda[posicion] for fila in matriz for celda in fila), default=0) or 1
+    mapa_filas = [
+        {
+            "dia": DIAS_SEMANA[i],
+            "celdas": [
+                {
+                    # EL MONTO SE MUESTRA EN MILES PARA QUE QUEPA EN LA CELDA
+                    "etiqueta": (
+                        "" if not celda[posicion]
+                        else f"{celda[posicion] / 1000:.0f}k" if metrica == "total"
+                        else celda[posicion]
+                    ),
+                    "ventas": celda[0],
+                    "unidades": celda[1],
+                    "total": celda[2],
+                    # OPACIDAD DEL COLOR SEGÚN EL MÁXIMO DEL RANGO
+                    "intensidad": round(float(celda[posicion]) / float(maximo), 2),
+                }
+                for celda in fila
+            ],
+        }
+        for i, fila in enumerate(matriz)
+    ]
 
 
 # Contexto templates
@@ -126,13 +310,26 @@ def index(request):
         "desde": desde.strftime("%Y-%m-%d"),
         "hasta": hasta.strftime("%Y-%m-%d"),
         "vd_labels": vd_labels,
+        "dias_con_ventas": len(dias["actual"]),
         "vd_data": vd_data,
+        "vd_anterior": vd_anterior,
+        "vd_anio": vd_anio,
         "top_labels": top_labels,
         "top_data": top_data,
+        "top_anterior": top_anterior,
+        "top_anio": top_anio,
         "cat_labels": cat_labels,
         "cat_data": cat_data,
+        "cat_anterior": cat_anterior,
+        "cat_anio": cat_anio,
+        "comparacion": comparacion,
         "categorias_tabla": categorias,
         "stats_trabajadores": stats_trabajadores,
+        "mapa_filas": mapa_filas,
+        "mapa_horas": range(24),
+        "mapa_metrica": metrica,
+        "mapa_metricas": [(clave, nombre) for clave, (_, nombre) in METRICAS_MAPA.items()],
+        "motor": motor,
     }
 
     return render(request, "analisis/index.html", ctx)
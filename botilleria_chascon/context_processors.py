@@ -1,3 +1,4 @@
+from inventario import stock_bajo
 from ventas.models import Trabajador, Turno
 
 def trabajador_context(request):
@@ -23,3 +24,8 @@ def trabajador_context(request):
         "trabajador_sesion": trabajador,
         "turno_sesion": turno,
     }
+
+
+def stock_bajo_context(request):
+    # CONTADOR EN CACHÉ: EL MENÚ LO MUESTRA EN CADA PÁGINA SIN CONSULTAR LA BD
+    return {"total_stock_bajo": stock_bajo.total()}
@@ -39,6 +39,7 @@ TEMPLATES = [{
     "OPTIONS": {
         "context_processors": [
             "botilleria_chascon.context_processors.trabajador_context",
+            "botilleria_chascon.context_processors.stock_bajo_context",
             "django.template.context_processors.debug",
             "django.template.context_processors.request",
             "django.contrib.auth.context_processors.auth",
@@ -89,4 +90,16 @@ LOGIN_URL = "/admin/login/"
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 from pathlib import Path
-BASE_DIR = Path(__file__).resolve().parent.parent
\ No newline at end of file
+BASE_DIR = Path(__file__).resolve().parent.parent
+# ARCHIVOS SUBIDOS (CSV DE LAS IMPORTACIONES EN SEGUNDO PLANO)
+MEDIA_ROOT = BASE_DIR / "media"
+
+# True: las importaciones se procesan en un hilo del mismo servidor.
+# False: solo las procesa `manage.py procesar_importaciones` (proceso aparte).
+IMPORTACIONES_EN_HILO = True
+
+# MOTOR DE analisis:index: "orm" (resúmenes diarios en la BD) o "columnar"
+# (columnas de NumPy en ANALISIS_COLUMNAR_DIR, ver analisis/columnar.py).
+# Se puede probar el otro con ?motor= en la URL.
+ANALISIS_MOTOR = "orm"
+ANALISIS_COLUMNAR_DIR = MEDIA_ROOT / "analitica"
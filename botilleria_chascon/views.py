@@ -2,10 +2,11 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.urls import reverse
 from django.utils import timezone
-from django.db.models import F
-from inventario.models import Producto
-from ventas.models import Trabajador, Turno, Venta
-from django.db.models import Sum, Count
+from inventario import stock_bajo
+from ventas import cierres
+from ventas.models import CierreTurno, Trabajador, Turno, Venta
+from ventas.periodos import PERIODOS, filtro_rango
+from django.db.models import F, Sum, Count, Q
 from django.http import HttpResponseForbidden
 from django.contrib.auth.decorators import login_required
 from decimal import Decimal
@@ -34,17 +35,13 @@ def landing(request):
     request.session.pop("trabajador_id", None)
     request.session.pop("turno_id", None)
 
-    # Productos con stock crítico
-    stock_bajo = Producto.objects.filter(
-        activo=True,
-        stock_minimo__gt=0,
-        stock__lte=F("stock_minimo"),
-    )
+    # Productos con stock crítico (contador en caché)
+    total_stock_bajo = stock_bajo.total()
 
     contexto = {
         "hide_menu": True,
-        "hay_stock_bajo": stock_bajo.exists(),
-        "total_stock_bajo": stock_bajo.count(),
+        "hay_stock_bajo": total_stock_bajo > 0,
+        "total_stock_bajo": total_stock_bajo,
     }
 
     return render(request, "landing.html", contexto)
@@ -129,24 +126,69 @@ def lista_trabajadores(request):
     # LISTADO DE LOS TRABAJADORES
     trabajadores = Trabajador.objects.all().order_by("nombre")
 
-    # VENTAS X TRABAJADOR
-    estadisticas = (
+    # VENTAS X TRABAJADOR (HOY, SEMANA, MES O TODO) DESDE LOS CIERRES DE TURNO
+    # SIN PARÁMETRO SE VE TODO EL HISTORIAL, COMO ANTES DEL FILTRO
+    periodo = request.GET.get("periodo", "todo")
+    if periodo in PERIODOS:
+        inicio, fin = PERIODOS[periodo](timezone.localdate())
+        rango = Q(fecha__gte=timezone.localdate(inicio), fecha__lt=timezone.localdate(fin))
+        rango_ventas = filtro_rango(inicio, fin)
+    else:
+        periodo, rango, rango_ventas = "todo", Q(), Q()
+
+    turnos = Turno.objects.filter(rango)
+    cerrados = (
+        CierreTurno.objects.filter(turno__in=turnos)
+        .values("turno__trabajador_id", "turno__trabajador__nombre")
+        .annotate(ventas_n=Sum("ventas"), monto=Sum("total"))
+    )
+    # LOS TURNOS ABIERTOS AÚN NO TIENEN CIERRE: SE SUMAN SUS VENTAS EN VIVO
+    abiertos = (
         Venta.objects.filter(
+            turno__in=turnos.filter(cierre__isnull=True),
             estado="CONFIRMADA",
+        )
+        .values("turno__trabajador_id", "turno__trabajador__nombre")
+        .annotate(ventas_n=Count("id"), monto=Sum("total"))
+    )
+    # VENTAS CON TRABAJADOR PERO SIN TURNO: NO TIENEN CIERRE, SE CUENTAN POR Venta.trabajador
+    sin_turno = (
+        Venta.objects.filter(
+            rango_ventas,
+            turno__isnull=True,
             trabajador__isnull=False,
+            estado="CONFIRMADA",
         )
-        .values("trabajador_id", "trabajador__nombre")
-        .annotate(
-            trabajador_nombre=F("trabajador__nombre"),
-            total_ventas=Count("id"),
-            total_monto=Sum("total"),
+        .values(
+            turno__trabajador_id=F("trabajador_id"),
+            turno__trabajador__nombre=F("trabajador__nombre"),
         )
-        .order_by("-total_monto")
+        .annotate(ventas_n=Count("id"), monto=Sum("total"))
+    )
+
+    por_trabajador = {}
+    for fila in [*cerrados, *abiertos, *sin_turno]:
+        e = por_trabajador.setdefault(fila["turno__trabajador_id"], {
+            "trabajador_nombre": fila["turno__trabajador__nombre"],
+            "total_ventas": 0,
+            "total_monto": Decimal("0"),
+        })
+        e["total_ventas"] += fila["ventas_n"]
+        e["total_monto"] += fila["monto"] or 0
+    estadisticas = sorted(por_trabajador.values(), key=lambda e: e["total_monto"], reverse=True)
+
+    # ÚLTIMOS CIERRES DE CAJA DEL PERIODO
+    ultimos_cierres = (
+        CierreTurno.objects.filter(turno__in=turnos)
+        .select_related("turno__trabajador")
+        .order_by("-turno__hora_fin")[:20]
     )
 
     context = {
         "trabajadores": trabajadores,
         "estadisticas": estadisticas,
+        "ultimos_cierres": ultimos_cierres,
+        "periodo": periodo,
     }
     return render(request, "trabajadores/lista_trabajadores.html", context)
 
@@ -262,6 +304,8 @@ def menu_trabajador(request):
     context = {
         "trabajador": trabajador,
         "turno": turno,
+        # RESUMEN EN VIVO DEL TURNO ABIERTO
+        "resumen": cierres.resumen_turno(turno),
         "hide_menu": False,
     }
     return render(request, "menu_trabajador.html", context)
@@ -269,8 +313,8 @@ def menu_trabajador(request):
 
 def cerrar_turno(request):
     """
-    Cierra el turno actual del trabajador, registrando la hora de salida
-    y limpiando la sesión.
+    Cierra el turno actual del trabajador: guarda el resumen de caja,
+    registra la hora de salida y limpia la sesión.
     """
     trabajador_id = request.session.get("trabajador_id")
     turno_id = request.session.get("turno_id")
@@ -280,12 +324,13 @@ def cerrar_turno(request):
         return redirect("inicio_trabajador")
 
     turno = get_object_or_404(Turno, id=turno_id, activo=True)
-    turno.hora_fin = timezone.now()
-    turno.activo = False
-    turno.save()
+    cierre = cierres.cerrar_turno(turno)
 
     request.session.pop("trabajador_id", None)
     request.session.pop("turno_id", None)
 
-    messages.success(request, "Turno cerrado correctamente.")
+    messages.success(
+        request,
+        f"Turno cerrado correctamente: {cierre.ventas} ventas por ${cierre.total:,.0f}.".replace(",", "."),
+    )
     return redirect("inicio")
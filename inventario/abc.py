@@ -0,0 +1,138 @@
+"""
+Clasificación ABC (Pareto) del catálogo.
+
+Los productos activos se ordenan por ventas (y aparte por margen) en una
+ventana de días y se reparten según su participación acumulada:
+
+- A: los que suman el primer CORTE_A (80 %) del total;
+- B: los que siguen hasta CORTE_B (95 %);
+- C: el resto, incluidos los que no vendieron.
+
+Se lee una sola consulta agregada sobre los resúmenes diarios (no sobre
+VentaItem) y el acumulado se calcula con NumPy para todo el catálogo de
+una vez. clasificar() solo escribe los productos cuya clase cambió.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from .models import Producto
+
+DIAS_ABC = 90
+CORTE_A = 0.80
+CORTE_B = 0.95
+IDS_POR_UPDATE = 500
+
+
+def ventana(dias=DIAS_ABC):
+    """Últimos `dias` días cerrados (hasta ayer)."""
+    hasta = timezone.localdate() - timedelta(days=1)
+    return hasta - timedelta(days=dias - 1), hasta
+
+
+def clases(valores, corte_a=CORTE_A, corte_b=CORTE_B):
+    """
+    Recibe un vector de valores (ventas o margen por producto) y devuelve
+    (clase, participacion, acumulado) en el mismo orden. Un producto es A
+    si lo acumulado ANTES de él no llega a corte_a: el que cruza el corte
+    también es A. Los valores <= 0 son siempre C.
+    """
+    valores = np.asarray(valores, dtype=float)
+    orden = np.argsort(-valores, kind="stable")
+    positivos = np.clip(valores[orden], 0, None)
+    total = positivos.sum()
+
+    participacion = positivos / total if total > 0 else np.zeros_like(positivos)
+    acumulado = np.cumsum(participacion)
+    previo = acumulado - participacion
+
+    clase_ordenada = np.where(
+        positivos <= 0, "C",
+        np.where(previo < corte_a, "A", np.where(previo < corte_b, "B", "C")),
+    )
+
+    # DE VUELTA AL ORDEN ORIGINAL
+    clase = np.empty(len(valores), dtype="<U1")
+    clase[orden] = clase_ordenada
+    en_orden = np.empty_like(participacion)
+    en_orden[orden] = participacion
+    acumulado_en_orden = np.empty_like(acumulado)
+    acumulado_en_orden[orden] = acumulado
+    return clase, en_orden, acumulado_en_orden
+
+
+def calcular(desde, hasta):
+    """
+    Ventas, margen y clases de cada producto activo entre desde y hasta
+    (días locales, inclusive). Devuelve un dict de vectores alineados con
+    `ids`, más las clases que tienen guardadas hoy los productos.
+    """
+    en_rango = Q(resumenes_diarios__fecha__gte=desde, resumenes_diarios__fecha__lte=hasta)
+    filas = list(
+        Producto.objects.filter(activo=True)
+        .order_by("id")
+        .values_list("id", "clase_abc", "clase_abc_margen")
+        .annotate(
+            monto=Sum("resumenes_diarios__monto", filter=en_rango),
+            ganancia=Sum("resumenes_diarios__margen", filter=en_rango),
+        )
+    )
+
+    monto = np.array([float(f[3] or 0) for f in filas])
+    margen = np.array([float(f[4] or 0) for f in filas])
+    clase, participacion, acumulado = clases(monto)
+    clase_margen, participacion_margen, acumulado_margen = clases(margen)
+
+    return {
+        "ids": [f[0] for f in filas],
+        "monto": monto,
+        "margen": margen,
+        "clase": clase,
+        "participacion": participacion,
+        "acumulado": acumulado,
+        "clase_margen": clase_margen,
+        "participacion_margen": participacion_margen,
+        "acumulado_margen": acumulado_margen,
+        "guardada": [f[1] for f in filas],
+        "guardada_margen": [f[2] for f in filas],
+    }
+
+
+def clasificar(desde=None, hasta=None):
+    """
+    Guarda en cada producto su clase por ventas y por margen. Por omisión
+    usa los últimos DIAS_ABC días cerrados. Solo se actualizan los
+    productos cuya clase cambió, con un UPDATE por clase (y por tanda de
+    ids). Devuelve (productos clasificados, productos cambiados).
+    """
+    if desde is None or hasta is None:
+        desde, hasta = ventana()
+
+    r = calcular(desde, hasta)
+
+    # (CAMPO, CLASE) -> IDS A CAMBIAR
+    cambios = defaultdict(list)
+    cambiados = set()
+    for campo, nuevas, guardadas in (
+        ("clase_abc", r["clase"], r["guardada"]),
+        ("clase_abc_margen", r["clase_margen"], r["guardada_margen"]),
+    ):
+        for pid, nueva, guardada in zip(r["ids"], nuevas.tolist(), guardadas):
+            if nueva != guardada:
+                cambios[(campo, nueva)].append(pid)
+                cambiados.add(pid)
+
+    with transaction.atomic():
+        for (campo, clase), ids in cambios.items():
+            for inicio in range(0, len(ids), IDS_POR_UPDATE):
+                Producto.objects.filter(id__in=ids[inicio:inicio + IDS_POR_UPDATE]).update(**{campo: clase})
+        # LOS DESACTIVADOS QUEDAN SIN CLASE
+        Producto.objects.filter(activo=False).exclude(clase_abc="", clase_abc_margen="").update(
+            clase_abc="", clase_abc_margen=""
+        )
+
+    return len(r["ids"]), len(cambiados)
@@ -1,8 +1,36 @@
 from django.contrib import admin
-from .models import Producto
+from .alertas import evaluar_alertas
+from .models import Importacion, Producto, Pronostico
 
 @admin.register(Producto)
 class ProductoAdmin(admin.ModelAdmin):
-    list_display = ("sku", "nombre", "categoria", "precio_unitario", "stock", "stock_minimo", "activo")
+    list_display = (
+        "sku", "nombre", "categoria", "precio_unitario", "stock", "stock_minimo", "activo", "clase_abc",
+    )
     search_fields = ("sku", "nombre", "categoria")
-    list_filter = ("categoria", "activo")
+    list_filter = ("categoria", "activo", "clase_abc")
+    # LAS CALCULA manage.py clasificar_abc
+    readonly_fields = ("clase_abc", "clase_abc_margen")
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        evaluar_alertas([obj.pk])
+
+
+@admin.register(Importacion)
+class ImportacionAdmin(admin.ModelAdmin):
+    list_display = (
+        "id", "creado_en", "usuario", "estado", "filas_procesadas",
+        "total_filas", "creados", "actualizados", "total_errores",
+    )
+    list_filter = ("estado",)
+
+
+@admin.register(Pronostico)
+class PronosticoAdmin(admin.ModelAdmin):
+    list_display = (
+        "producto", "demanda_diaria", "dias_cobertura", "punto_reorden",
+        "cantidad_sugerida", "calculado_en",
+    )
+    list_select_related = ("producto",)
+    search_fields = ("producto__sku", "producto__nombre")
@@ -0,0 +1,64 @@
+"""
+Alertas de stock crítico.
+
+Se evalúan una vez por operación (venta, edición de stock, importación o
+anulación) sobre el conjunto de productos afectados: las alertas nuevas se
+insertan en un solo INSERT y las abiertas de productos que volvieron sobre
+el mínimo se cierran en un solo UPDATE. El índice único parcial
+alerta_abierta_unica garantiza una alerta abierta por producto, así que el
+INSERT no necesita leer antes las que ya existen.
+"""
+from django.db.models import F, Q, QuerySet
+
+from . import stock_bajo
+from .models import AlertaStock, Producto
+
+# SIN STOCK MÍNIMO (0) EL PRODUCTO NUNCA ALERTA
+CRITICO = Q(stock_minimo__gt=0, stock__lte=F("stock_minimo"))
+
+
+def es_critico(stock, stock_minimo):
+    return stock_minimo > 0 and stock <= stock_minimo
+
+
+def abrir_alertas(criticos):
+    """
+    Inserta las alertas de [(producto_id, stock, stock_minimo)] que no
+    tengan una abierta. Los productos que ya la tienen chocan con el índice
+    único parcial y se ignoran.
+    """
+    if not criticos:
+        return
+    stock_bajo.invalidar()
+    AlertaStock.objects.bulk_create([
+        AlertaStock(
+            producto_id=pid,
+            mensaje=f"Stock crítico: {stock} unidades (mínimo {minimo})",
+        )
+        for pid, stock, minimo in criticos
+    ], ignore_conflicts=True)
+
+
+def cerrar_alertas(productos):
+    """
+    Cierra las alertas abiertas de los productos (queryset) que ya no están
+    en stock crítico. Devuelve cuántas se cerraron.
+    """
+    stock_bajo.invalidar()
+    return AlertaStock.objects.filter(
+        atendida=False,
+        producto__in=productos.exclude(CRITICO).values("id"),
+    ).update(atendida=True)
+
+
+def evaluar_alertas(productos):
+    """
+    Abre y cierra las alertas de los productos (queryset o ids) según su
+    stock actual, con un número fijo de consultas.
+    """
+    if not isinstance(productos, QuerySet):
+        productos = Producto.objects.filter(id__in=list(productos))
+    cerrar_alertas(productos)
+    abrir_alertas(list(
+        productos.filter(CRITICO).order_by().values_list("id", "stock", "stock_minimo")
+    ))
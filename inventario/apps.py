@@ -0,0 +1,22 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def reparar_indices_busqueda(sender, using, **kwargs):
+    # En SQLite algunas migraciones recrean la tabla de productos y se llevan
+    # los triggers del índice FTS; aquí se vuelven a instalar.
+    from django.db import connections
+
+    from .busqueda import instalar_indices
+
+    instalar_indices(connections[using])
+
+
+class InventarioConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "inventario"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        post_migrate.connect(reparar_indices_busqueda, sender=self)
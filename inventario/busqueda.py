@@ -0,0 +1,219 @@
+"""
+Búsqueda de productos por nombre o SKU.
+
+Cada motor de base de datos tiene su propio backend:
+
+- PostgreSQL: índice GIN con pg_trgm sobre el nombre normalizado,
+  ordenado por similitud.
+- SQLite: tabla FTS5 (tokenizer trigram) sincronizada con triggers.
+- Otros: LIKE sobre el nombre normalizado.
+
+Todos buscan sobre Producto.nombre_busqueda (minúsculas y sin tildes),
+así "pisco" encuentra "Písco", y además aceptan prefijos de SKU.
+Se puede forzar un backend con settings.BUSQUEDA_PRODUCTOS_BACKEND.
+"""
+import unicodedata
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.db.models import Case, F, FloatField, Func, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+TABLA_FTS = "inventario_producto_fts"
+
+
+def normalizar(texto):
+    """Minúsculas y sin tildes: 'Písco Añejo' -> 'pisco anejo'."""
+    texto = unicodedata.normalize("NFD", texto or "")
+    return "".join(c for c in texto if not unicodedata.combining(c)).lower().strip()
+
+
+class BusquedaSimple:
+    """
+    LIKE '%termino%' sobre el nombre normalizado. Sirve en cualquier motor,
+    pero recorre la tabla completa.
+    """
+
+    def condicion_nombre(self, terminos):
+        condicion = Q()
+        for t in terminos:
+            condicion &= Q(nombre_busqueda__contains=t)
+        return condicion
+
+    def orden(self, queryset, terminos):
+        return queryset, []
+
+    def buscar(self, queryset, q):
+        q = (q or "").strip()
+        terminos = normalizar(q).split()
+        if not terminos:
+            return queryset
+
+        queryset = queryset.filter(
+            self.condicion_nombre(terminos) | Q(sku__istartswith=q)
+        ).annotate(
+            # PRIMERO LOS QUE CALZAN POR SKU (LECTOR DE CÓDIGOS), LUEGO POR NOMBRE
+            prioridad_busqueda=Case(
+                When(sku__istartswith=q, then=Value(0)),
+                When(nombre_busqueda__startswith=terminos[0], then=Value(1)),
+                default=Value(2),
+                output_field=IntegerField(),
+            )
+        )
+        queryset, orden = self.orden(queryset, terminos)
+        return queryset.order_by("prioridad_busqueda", *orden, "nombre")
+
+
+class BusquedaPostgres(BusquedaSimple):
+    """
+    El LIKE '%termino%' usa el índice GIN gin_trgm_ops y el resultado se
+    ordena por similitud de trigramas con la búsqueda.
+    """
+
+    def orden(self, queryset, terminos):
+        queryset = queryset.annotate(
+            similitud=Func(
+                F("nombre_busqueda"),
+                Value(" ".join(terminos)),
+                function="similarity",
+                output_field=FloatField(),
+            )
+        )
+        return queryset, ["-similitud"]
+
+
+class BusquedaSQLite(BusquedaSimple):
+    """
+    Los términos de 3 o más letras se resuelven con la tabla FTS5 trigram;
+    los más cortos no tienen trigramas y se filtran con LIKE.
+    """
+
+    def condicion_nombre(self, terminos):
+        if not fts_instalado():
+            return super().condicion_nombre(terminos)
+
+        largos = [t for t in terminos if len(t) >= 3]
+        cortos = [t for t in terminos if len(t) < 3]
+
+        condicion = super().condicion_nombre(cortos)
+        if largos:
+            match = " AND ".join('"%s"' % t.replace('"', '""') for t in largos)
+            condicion &= Q(id__in=RawSQL(
+                f"SELECT rowid FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH %s", [match]
+            ))
+        return condicion
+
+
+BACKENDS = {
+    "postgresql": BusquedaPostgres,
+    "sqlite": BusquedaSQLite,
+}
+
+
+def get_backend():
+    ruta = getattr(settings, "BUSQUEDA_PRODUCTOS_BACKEND", None)
+    if ruta:
+        return import_string(ruta)()
+    return BACKENDS.get(connection.vendor, BusquedaSimple)()
+
+
+def buscar(queryset, q):
+    """
+    Filtra y ordena por relevancia un queryset de Producto según el texto buscado.
+    """
+    return get_backend().buscar(queryset, q)
+
+
+# INSTALACIÓN DE ÍNDICES (MIGRACIONES Y post_migrate)
+
+@lru_cache(maxsize=None)
+def _fts_instalado(nombre_bd):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [TABLA_FTS]
+        )
+        return cursor.fetchone() is not None
+
+
+def fts_instalado():
+    return _fts_instalado(str(connection.settings_dict["NAME"]))
+
+
+SQL_TRIGGERS_FTS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ai AFTER INSERT ON inventario_producto BEGIN
+        INSERT INTO {TABLA_FTS}(rowid, nombre_busqueda) VALUES (new.id, new.nombre_busqueda);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ad AFTER DELETE ON inventario_producto BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, nombre_busqueda)
+        VALUES ('delete', old.id, old.nombre_busqueda);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_au AFTER UPDATE OF nombre_busqueda ON inventario_producto BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, nombre_busqueda)
+        VALUES ('delete', old.id, old.nombre_busqueda);
+        INSERT INTO {TABLA_FTS}(rowid, nombre_busqueda) VALUES (new.id, new.nombre_busqueda);
+    END
+    """,
+]
+
+
+def _instalar_sqlite(cursor):
+    cursor.execute(
+        "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+        [f"{TABLA_FTS}_%"],
+    )
+    triggers = cursor.fetchone()[0]
+
+    # PREFIJO DE SKU SIN DISTINGUIR MAYÚSCULAS (LIKE 'abc%' USA ESTE ÍNDICE)
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS inventario_producto_sku_nocase "
+        "ON inventario_producto (sku COLLATE NOCASE)"
+    )
+
+    try:
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_FTS} USING fts5("
+            "nombre_busqueda, content='inventario_producto', content_rowid='id', "
+            "tokenize='trigram')"
+        )
+    except OperationalError:
+        # SQLITE SIN FTS5 O SIN TRIGRAM (< 3.34): QUEDA LA BÚSQUEDA SIMPLE
+        return
+
+    for sql in SQL_TRIGGERS_FTS:
+        cursor.execute(sql)
+
+    # Al recrear la tabla en una migración SQLite se pierden los triggers:
+    # se reconstruye el índice para no dejar filas desincronizadas.
+    if triggers < len(SQL_TRIGGERS_FTS):
+        cursor.execute(f"INSERT INTO {TABLA_FTS}({TABLA_FTS}) VALUES ('rebuild')")
+
+
+def _instalar_postgres(cursor):
+    cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS inventario_producto_busqueda_trgm "
+        "ON inventario_producto USING gin (nombre_busqueda gin_trgm_ops)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS inventario_producto_sku_trgm "
+        "ON inventario_producto USING gin ((UPPER(sku::text)) gin_trgm_ops)"
+    )
+
+
+def instalar_indices(conexion):
+    """
+    Crea (o repara) los índices de búsqueda del motor en uso. Es idempotente.
+    """
+    with conexion.cursor() as cursor:
+        if conexion.vendor == "sqlite":
+            _instalar_sqlite(cursor)
+        elif conexion.vendor == "postgresql":
+            _instalar_postgres(cursor)
+    _fts_instalado.cache_clear()
@@ -0,0 +1,72 @@
+"""
+Caché en memoria del proceso para buscar productos por SKU exacto
+(lector de código de barras).
+
+Se invalida con las señales post_save/post_delete de Producto. Los
+cambios hechos con .update() o bulk_update() no disparan señales, por
+eso quien los haga debe llamar a invalidar() o limpiar(). Cada entrada
+vence además a los TTL_SEGUNDOS, para que los otros procesos del
+servidor (que no ven las señales de este) también se pongan al día.
+
+No guarda el stock: cambia en cada venta y la venta lo valida en la BD.
+"""
+import threading
+import time
+
+from .models import Producto
+
+TTL_SEGUNDOS = 60
+
+_lock = threading.Lock()
+_por_sku = {}     # sku -> (vence, datos o None)
+_sku_por_id = {}  # id -> sku, para invalidar cuando cambia el SKU
+
+
+def _datos(producto):
+    return {
+        "id": producto.id,
+        "sku": producto.sku,
+        "nombre": producto.nombre,
+        "precio": float(producto.precio_unitario),
+        "activo": producto.activo,
+        "bloqueado": producto.bloqueado,
+    }
+
+
+def obtener(sku):
+    """
+    Datos del producto con ese SKU exacto, o None si no existe.
+    Con la entrada en caché no consulta la base de datos.
+    """
+    sku = (sku or "").strip()
+    if not sku:
+        return None
+
+    entrada = _por_sku.get(sku)
+    if entrada is not None and entrada[0] > time.monotonic():
+        return entrada[1]
+
+    producto = Producto.objects.filter(sku=sku).first()
+    datos = _datos(producto) if producto else None
+
+    with _lock:
+        # LOS SKU INEXISTENTES TAMBIÉN SE GUARDAN (LECTURAS ERRÓNEAS REPETIDAS)
+        _por_sku[sku] = (time.monotonic() + TTL_SEGUNDOS, datos)
+        if datos:
+            _sku_por_id[datos["id"]] = sku
+
+    return datos
+
+
+def invalidar(producto_id=None, sku=None):
+    with _lock:
+        if producto_id is not None:
+            _por_sku.pop(_sku_por_id.pop(producto_id, None), None)
+        if sku is not None:
+            _por_sku.pop(sku, None)
+
+
+def limpiar():
+    with _lock:
+        _por_sku.clear()
+        _sku_por_id.clear()
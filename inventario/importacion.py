@@ -0,0 +1,366 @@
+"""
+Importación masiva de productos desde CSV.
+
+El archivo se decodifica de a poco (no se carga entero en memoria) y se
+procesa en lotes: por lote se leen de una vez los SKU que ya existen y se
+escribe con un bulk_create con update_conflicts (INSERT ... ON CONFLICT),
+en vez de 2 a 4 consultas por fila.
+Las filas con errores no se importan y se devuelven en el reporte con su
+número de línea.
+
+bulk_create no llama a save() ni dispara señales: aquí se
+completan nombre_busqueda y actualizado_en, y se invalida la caché de SKU.
+"""
+import csv
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import cache_sku
+from .alertas import evaluar_alertas
+from .busqueda import normalizar
+from .models import Categoria, Importacion, Producto
+
+logger = logging.getLogger(__name__)
+
+TAMANO_LOTE = 1000
+
+COLUMNAS = ["sku", "nombre", "categoria", "precio_unitario", "stock", "stock_minimo", "activo"]
+VERDADEROS = {"1", "true", "sí", "si", "y", "yes"}
+
+CAMPOS_ACTUALIZABLES = [
+    "nombre", "nombre_busqueda", "categoria", "precio_unitario",
+    "stock", "stock_minimo", "activo", "actualizado_en",
+]
+
+
+class FilaInvalida(Exception):
+    pass
+
+
+class ArchivoInvalido(Exception):
+    """El archivo completo no se puede leer: no se importa nada."""
+
+
+def leer_csv(binario):
+    """
+    Recorre un archivo binario (upload o archivo en disco) como CSV,
+    decodificándolo a medida que se lee. Entrega (número_de_línea, fila).
+    """
+    texto = io.TextIOWrapper(binario, encoding="utf-8-sig", newline="")
+    lector = csv.DictReader(texto)
+    try:
+        if "sku" not in (lector.fieldnames or []):
+            raise ArchivoInvalido("El archivo no tiene la columna 'sku' (usa la plantilla).")
+        for fila in lector:
+            yield lector.line_num, fila
+    except UnicodeDecodeError:
+        raise ArchivoInvalido(
+            f"El archivo no está en UTF-8 (cerca de la línea {lector.line_num + 1})."
+        )
+    except csv.Error as e:
+        raise ArchivoInvalido(f"CSV mal formado en la línea {lector.line_num}: {e}")
+    finally:
+        # SUELTA EL ARCHIVO SIN CERRARLO: ES DE QUIEN LLAMA
+        texto.detach()
+
+
+def _decimal(fila, campo):
+    valor = (fila.get(campo) or "").strip().replace(",", ".")
+    if not valor:
+        return Decimal("0")
+    try:
+        numero = Decimal(valor)
+    except InvalidOperation:
+        raise FilaInvalida(f"{campo} no es un número: {valor!r}")
+    if not numero.is_finite() or numero < 0:
+        raise FilaInvalida(f"{campo} inválido: {valor!r}")
+    return numero.quantize(Decimal("0.01"))
+
+
+def _entero(fila, campo):
+    valor = (fila.get(campo) or "").strip()
+    if not valor:
+        return 0
+    try:
+        numero = int(valor)
+    except ValueError:
+        raise FilaInvalida(f"{campo} no es un entero: {valor!r}")
+    if numero < 0:
+        raise FilaInvalida(f"{campo} no puede ser negativo: {valor!r}")
+    return numero
+
+
+def parsear_fila(fila):
+    """Valida una fila del CSV y la convierte a valores de Producto."""
+    sku = (fila.get("sku") or "").strip()
+    nombre = (fila.get("nombre") or "").strip()
+    categoria = (fila.get("categoria") or "").strip()
+
+    if not sku:
+        raise FilaInvalida("Falta el SKU.")
+    if len(sku) > 50:
+        raise FilaInvalida("El SKU tiene más de 50 caracteres.")
+    if not nombre:
+        raise FilaInvalida("Falta el nombre.")
+    if len(nombre) > 200:
+        raise FilaInvalida("El nombre tiene más de 200 caracteres.")
+    if len(categoria) > 100:
+        raise FilaInvalida("La categoría tiene más de 100 caracteres.")
+
+    datos = {
+        "sku": sku,
+        "nombre": nombre,
+        "categoria": categoria,
+        "precio_unitario": _decimal(fila, "precio_unitario"),
+        "stock": _entero(fila, "stock"),
+        "stock_minimo": _entero(fila, "stock_minimo"),
+        "activo": str(fila.get("activo") or "1").strip().lower() in VERDADEROS,
+    }
+    # COLUMNA OPCIONAL (LISTAS DE PRECIOS DE PROVEEDORES)
+    if (fila.get("costo") or "").strip():
+        datos["costo"] = _decimal(fila, "costo")
+    return datos
+
+
+def _categorias(nombres, cache):
+    """Completa el caché nombre -> Categoria creando las que falten en un solo INSERT."""
+    faltantes = {n for n in nombres if n and n not in cache}
+    if faltantes:
+        Categoria.objects.bulk_create(
+            [Categoria(nombre=n) for n in faltantes], ignore_conflicts=True
+        )
+        cache.update(
+            (c.nombre, c) for c in Categoria.objects.filter(nombre__in=faltantes)
+        )
+
+
+def importar_lote(filas, categorias):
+    """
+    Escribe un lote de filas ya validadas con un INSERT ... ON CONFLICT (sku)
+    DO UPDATE: crea los SKU nuevos y actualiza los existentes en la misma
+    sentencia. Si un SKU se repite dentro del lote, gana la última fila.
+    Las alertas de stock del lote se evalúan juntas al final.
+    Devuelve (creados, actualizados).
+    """
+    por_sku = {}
+    for datos in filas:
+        por_sku[datos["sku"]] = datos
+
+    _categorias({d["categoria"] for d in por_sku.values()}, categorias)
+    existentes = set(
+        Producto.objects.filter(sku__in=list(por_sku)).values_list("sku", flat=True)
+    )
+    ahora = timezone.now()
+
+    productos = []
+    campos = set(CAMPOS_ACTUALIZABLES)
+    for sku, datos in por_sku.items():
+        producto = Producto(
+            sku=sku,
+            nombre=datos["nombre"],
+            nombre_busqueda=normalizar(datos["nombre"]),
+            categoria=categorias.get(datos["categoria"]),
+            precio_unitario=datos["precio_unitario"],
+            stock=datos["stock"],
+            stock_minimo=datos["stock_minimo"],
+            activo=datos["activo"],
+            actualizado_en=ahora,
+        )
+        if "costo" in datos:
+            producto.costo = datos["costo"]
+            campos.add("costo")
+        productos.append(producto)
+
+    # LOS CAMPOS QUE NO VIENEN EN EL CSV (costo, bloqueado, proveedor,
+    # creado_en) NO SE TOCAN EN LOS PRODUCTOS QUE YA EXISTÍAN
+    Producto.objects.bulk_create(
+        productos,
+        update_conflicts=True,
+        unique_fields=["sku"],
+        update_fields=sorted(campos),
+    )
+
+    skus = list(por_sku)
+    evaluar_alertas(Producto.objects.filter(sku__in=skus))
+
+    def invalidar():
+        for sku in skus:
+            cache_sku.invalidar(sku=sku)
+
+    invalidar()
+    transaction.on_commit(invalidar)
+
+    actualizados = len(existentes)
+    return len(por_sku) - actualizados, actualizados
+
+
+def importar_csv(binario, tamano_lote=TAMANO_LOTE):
+    """
+    Importa un CSV completo en una sola transacción, escribiendo de a
+    `tamano_lote` filas. Lanza ArchivoInvalido (sin guardar nada) si el
+    archivo no se puede leer. Devuelve un diccionario con creados, actualizados,
+    filas leídas y la lista de errores [{"linea", "sku", "error"}].
+    """
+    resultado = {"creados": 0, "actualizados": 0, "filas": 0, "errores": []}
+    categorias = {c.nombre: c for c in Categoria.objects.all()}
+    lote = []
+
+    def escribir():
+        creados, actualizados = importar_lote(lote, categorias)
+        resultado["creados"] += creados
+        resultado["actualizados"] += actualizados
+        lote.clear()
+
+    with transaction.atomic():
+        for linea, fila in leer_csv(binario):
+            resultado["filas"] += 1
+            try:
+                lote.append(parsear_fila(fila))
+            except FilaInvalida as e:
+                resultado["errores"].append({
+                    "linea": linea,
+                    "sku": (fila.get("sku") or "").strip(),
+                    "error": str(e),
+                })
+                continue
+
+            if len(lote) >= tamano_lote:
+                escribir()
+
+        if lote:
+            escribir()
+
+    return resultado
+
+
+# IMPORTACIÓN EN SEGUNDO PLANO (SIN BROKER: HILO LOCAL O manage.py procesar_importaciones)
+
+TAMANO_TRAMO = 2000
+MAX_ERRORES_GUARDADOS = 1000
+VENCIMIENTO_LATIDO = timedelta(minutes=2)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def reclamar(importacion_id=None):
+    """
+    Toma una importación pendiente, o una en proceso cuyo worker dejó de
+    dar señales, y la marca como PROCESANDO. Devuelve None si no hay.
+    """
+    ahora = timezone.now()
+    disponibles = Importacion.objects.filter(
+        Q(estado="PENDIENTE")
+        | Q(estado="PROCESANDO", latido__lt=ahora - VENCIMIENTO_LATIDO)
+    )
+    if importacion_id is not None:
+        disponibles = disponibles.filter(id=importacion_id)
+
+    for pk in disponibles.order_by("creado_en").values_list("id", flat=True)[:10]:
+        # UPDATE CONDICIONAL: SI OTRO WORKER LA TOMÓ ANTES, NO TOCA NINGUNA FILA
+        if disponibles.filter(id=pk).update(estado="PROCESANDO", latido=ahora):
+            return Importacion.objects.get(id=pk)
+    return None
+
+
+def _confirmar_tramo(importacion, lote, errores, leidas, categorias):
+    with transaction.atomic():
+        creados, actualizados = importar_lote(lote, categorias) if lote else (0, 0)
+
+        importacion.filas_procesadas = leidas
+        importacion.creados += creados
+        importacion.actualizados += actualizados
+        importacion.total_errores += len(errores)
+        importacion.errores = (importacion.errores + errores)[:MAX_ERRORES_GUARDADOS]
+        importacion.latido = timezone.now()
+        importacion.save(update_fields=[
+            "filas_procesadas", "creados", "actualizados",
+            "total_errores", "errores", "latido",
+        ])
+
+
+def procesar(importacion, tamano_tramo=TAMANO_TRAMO):
+    """
+    Procesa una importación ya reclamada, continuando desde
+    filas_procesadas. Cada tramo se escribe y se registra en la misma
+    transacción. Si el archivo no se puede leer queda FALLIDA; ante otros
+    errores queda PROCESANDO y otro worker la retoma al vencer el latido.
+    """
+    try:
+        with importacion.archivo.open("rb") as archivo:
+            if importacion.total_filas is None:
+                # EL CONTEO RECORRE TODO EL ARCHIVO: UN CSV ILEGIBLE FALLA
+                # AQUÍ, ANTES DE ESCRIBIR EL PRIMER TRAMO
+                importacion.total_filas = sum(1 for _ in leer_csv(archivo))
+                importacion.save(update_fields=["total_filas"])
+                archivo.seek(0)
+
+            categorias = {c.nombre: c for c in Categoria.objects.all()}
+            ya_procesadas = importacion.filas_procesadas
+            lote, errores, leidas = [], [], 0
+
+            for linea, fila in leer_csv(archivo):
+                leidas += 1
+                if leidas <= ya_procesadas:
+                    continue
+                try:
+                    lote.append(parsear_fila(fila))
+                except FilaInvalida as e:
+                    errores.append({
+                        "linea": linea,
+                        "sku": (fila.get("sku") or "").strip(),
+                        "error": str(e),
+                    })
+
+                if leidas - importacion.filas_procesadas >= tamano_tramo:
+                    _confirmar_tramo(importacion, lote, errores, leidas, categorias)
+                    lote, errores = [], []
+
+            _confirmar_tramo(importacion, lote, errores, leidas, categorias)
+    except ArchivoInvalido as e:
+        importacion.estado = "FALLIDA"
+        importacion.mensaje = str(e)[:255]
+    else:
+        importacion.estado = "TERMINADA"
+
+    importacion.terminado_en = timezone.now()
+    importacion.save(update_fields=["estado", "mensaje", "terminado_en"])
+    return importacion
+
+
+def _procesar_en_hilo(importacion_id):
+    try:
+        importacion = reclamar(importacion_id)
+        if importacion:
+            procesar(importacion)
+    except Exception:
+        logger.exception("Falló la importación #%s; se reintentará.", importacion_id)
+    finally:
+        # EL HILO TIENE SU PROPIA CONEXIÓN: SE CIERRA AL TERMINAR
+        connection.close()
+
+
+def encolar(importacion):
+    """
+    Con settings.IMPORTACIONES_EN_HILO, procesa la importación en un hilo
+    del servidor apenas se confirme la transacción que la creó. Un solo
+    hilo: las importaciones se procesan de a una.
+    """
+    global _pool
+    if not getattr(settings, "IMPORTACIONES_EN_HILO", True):
+        return
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="importacion")
+
+    transaction.on_commit(lambda: _pool.submit(_procesar_en_hilo, importacion.pk))
@@ -0,0 +1,100 @@
+import csv
+import io
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from inventario.importacion import COLUMNAS, TAMANO_LOTE, importar_csv
+from inventario.models import Categoria, Producto
+
+
+def _generar_csv(destino, filas):
+    texto = io.TextIOWrapper(destino, encoding="utf-8", newline="", write_through=True)
+    writer = csv.writer(texto)
+    writer.writerow(COLUMNAS)
+    for i in range(filas):
+        writer.writerow([
+            f"BENCH-{i:07d}", f"Producto benchmark {i}", f"Categoría {i % 40}",
+            "1990,00", i % 500, 5, 1,
+        ])
+    texto.detach()
+    destino.seek(0)
+
+
+def _importar_fila_a_fila(binario):
+    """El importador anterior (get_or_create + update_or_create por fila), como referencia."""
+    reader = csv.DictReader(io.TextIOWrapper(binario, encoding="utf-8", newline=""))
+    for row in reader:
+        categoria, _ = Categoria.objects.get_or_create(nombre=row["categoria"])
+        Producto.objects.update_or_create(
+            sku=row["sku"],
+            defaults={
+                "nombre": row["nombre"],
+                "categoria": categoria,
+                "precio_unitario": row["precio_unitario"].replace(",", "."),
+                "stock": int(row["stock"]),
+                "stock_minimo": int(row["stock_minimo"]),
+                "activo": True,
+            },
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la importación CSV de productos (alta y actualización) según la "
+        "cantidad de filas. Todo se ejecuta dentro de una transacción que se "
+        "revierte al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tamanos",
+            nargs="+",
+            type=int,
+            default=[1000, 10000, 100000],
+            help="Cantidad de filas del CSV a medir.",
+        )
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=TAMANO_LOTE,
+            help="Filas por lote de bulk_create/bulk_update.",
+        )
+        parser.add_argument(
+            "--comparar",
+            type=int,
+            default=10000,
+            help="Mide también el importador fila a fila hasta este tamaño (0 = no).",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Base de datos: {connection.vendor}, lote: {options['lote']}")
+        self.stdout.write(
+            f"{'filas':>8} {'modo':>14} {'segundos':>9} {'filas/s':>9}"
+        )
+
+        for tamano in options["tamanos"]:
+            with tempfile.TemporaryFile() as archivo:
+                _generar_csv(archivo, tamano)
+
+                modos = [
+                    ("alta", lambda: importar_csv(archivo, tamano_lote=options["lote"])),
+                    ("actualización", lambda: importar_csv(archivo, tamano_lote=options["lote"])),
+                ]
+                if tamano <= options["comparar"]:
+                    modos.append(("fila a fila", lambda: _importar_fila_a_fila(archivo)))
+
+                with transaction.atomic():
+                    for modo, importar in modos:
+                        archivo.seek(0)
+                        inicio = time.perf_counter()
+                        importar()
+                        segundos = time.perf_counter() - inicio
+                        self.stdout.write(
+                            f"{tamano:>8} {modo:>14} {segundos:>9.2f} {tamano / segundos:>9.0f}"
+                        )
+                    transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS("Benchmark terminado, no se guardaron datos."))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventario.abc import DIAS_ABC, clasificar, ventana
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula la clase ABC (por ventas y por margen) de cada producto activo "
+        "desde los resúmenes diarios (para cron, una vez por noche)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dias",
+            type=int,
+            default=DIAS_ABC,
+            help="Días de historia (cerrados, hasta ayer) a considerar.",
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        productos, cambiados = clasificar(*ventana(options["dias"]))
+        self.stdout.write(self.style.SUCCESS(
+            f"{productos} productos clasificados, {cambiados} cambiaron de clase "
+            f"({time.monotonic() - inicio:.1f} s)."
+        ))
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventario.importacion import procesar, reclamar
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker de importaciones CSV: procesa las pendientes y retoma las que "
+        "quedaron a medias desde su último tramo guardado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--una-vez",
+            action="store_true",
+            help="Procesa lo pendiente y termina (para cron).",
+        )
+        parser.add_argument(
+            "--espera",
+            type=float,
+            default=2.0,
+            help="Segundos entre revisiones cuando no hay trabajo.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            importacion = reclamar()
+            if importacion is None:
+                if options["una_vez"]:
+                    return
+                time.sleep(options["espera"])
+                continue
+
+            inicio = time.monotonic()
+            self.stdout.write(
+                f"Importación #{importacion.id}: desde la fila {importacion.filas_procesadas}..."
+            )
+            procesar(importacion)
+            self.stdout.write(
+                f"Importación #{importacion.id} {importacion.estado.lower()}: "
+                f"{importacion.creados} creados, {importacion.actualizados} actualizados, "
+                f"{importacion.total_errores} errores en {time.monotonic() - inicio:.1f} s."
+            )
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventario.pronostico import COBERTURA_DIAS, DIAS_HISTORIA, PLAZO_DIAS, pronosticar
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula la demanda diaria, el punto de reorden y la cantidad a pedir "
+        "de cada producto activo (para cron, una vez por noche)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dias",
+            type=int,
+            default=DIAS_HISTORIA,
+            help="Días de historia (cerrados, hasta ayer) a considerar.",
+        )
+        parser.add_argument(
+            "--plazo",
+            type=int,
+            default=PLAZO_DIAS,
+            help="Días que tarda en llegar un pedido.",
+        )
+        parser.add_argument(
+            "--cobertura",
+            type=int,
+            default=COBERTURA_DIAS,
+            help="Días de venta que debe cubrir lo que se pide.",
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        productos, con_sugerencia = pronosticar(
+            dias=options["dias"], plazo=options["plazo"], cobertura=options["cobertura"]
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{productos} productos pronosticados, {con_sugerencia} para pedir "
+            f"({time.monotonic() - inicio:.1f} s)."
+        ))
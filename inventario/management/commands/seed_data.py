@@ -2,6 +2,7 @@ from datetime import timedelta
 from decimal import Decimal
 import random
 
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.contrib.auth import get_user_model
@@ -130,4 +131,6 @@ class Command(BaseCommand):
                     venta.total = total_venta
                     venta.save()
 
+        call_command("reconstruir_resumenes", stdout=self.stdout)
+
         self.stdout.write(self.style.SUCCESS("Datos de ejemplo generados con éxito."))
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.9 on 2026-10-17 22:32
+
+import unicodedata
+
+from django.db import OperationalError, migrations, models
+
+# COPIA CONGELADA DE inventario.busqueda AL MOMENTO DE ESTA MIGRACIÓN: SI EL
+# MÓDULO CAMBIA, LA MIGRACIÓN SIGUE HACIENDO LO MISMO
+TABLA_FTS = "inventario_producto_fts"
+
+SQL_SQLITE = [
+    "CREATE INDEX IF NOT EXISTS inventario_producto_sku_nocase "
+    "ON inventario_producto (sku COLLATE NOCASE)",
+]
+
+SQL_FTS = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLA_FTS} USING fts5("
+    "nombre_busqueda, content='inventario_producto', content_rowid='id', "
+    "tokenize='trigram')",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ai AFTER INSERT ON inventario_producto BEGIN
+        INSERT INTO {TABLA_FTS}(rowid, nombre_busqueda) VALUES (new.id, new.nombre_busqueda);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_ad AFTER DELETE ON inventario_producto BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, nombre_busqueda)
+        VALUES ('delete', old.id, old.nombre_busqueda);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLA_FTS}_au AFTER UPDATE OF nombre_busqueda ON inventario_producto BEGIN
+        INSERT INTO {TABLA_FTS}({TABLA_FTS}, rowid, nombre_busqueda)
+        VALUES ('delete', old.id, old.nombre_busqueda);
+        INSERT INTO {TABLA_FTS}(rowid, nombre_busqueda) VALUES (new.id, new.nombre_busqueda);
+    END
+    """,
+    f"INSERT INTO {TABLA_FTS}({TABLA_FTS}) VALUES ('rebuild')",
+]
+
+SQL_POSTGRES = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS inventario_producto_busqueda_trgm "
+    "ON inventario_producto USING gin (nombre_busqueda gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS inventario_producto_sku_trgm "
+    "ON inventario_producto USING gin ((UPPER(sku::text)) gin_trgm_ops)",
+]
+
+
+def normalizar(texto):
+    texto = unicodedata.normalize("NFD", texto or "")
+    return "".join(c for c in texto if not unicodedata.combining(c)).lower().strip()
+
+
+def rellenar_nombre_busqueda(apps, schema_editor):
+    Producto = apps.get_model("inventario", "Producto")
+    productos = list(Producto.objects.only("id", "nombre"))
+    for p in productos:
+        p.nombre_busqueda = normalizar(p.nombre)
+    Producto.objects.bulk_update(productos, ["nombre_busqueda"], batch_size=500)
+
+
+def crear_indices_busqueda(apps, schema_editor):
+    conexion = schema_editor.connection
+    with conexion.cursor() as cursor:
+        if conexion.vendor == "sqlite":
+            for sql in SQL_SQLITE:
+                cursor.execute(sql)
+            try:
+                cursor.execute(SQL_FTS[0])
+            except OperationalError:
+                # SQLITE SIN FTS5 O SIN TRIGRAM (< 3.34): QUEDA LA BÚSQUEDA SIMPLE
+                return
+            for sql in SQL_FTS[1:]:
+                cursor.execute(sql)
+        elif conexion.vendor == "postgresql":
+            for sql in SQL_POSTGRES:
+                cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='nombre_busqueda',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200),
+        ),
+        migrations.RunPython(rellenar_nombre_busqueda, migrations.RunPython.noop),
+        migrations.RunPython(crear_indices_busqueda, migrations.RunPython.noop),
+    ]
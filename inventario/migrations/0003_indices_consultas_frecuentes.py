@@ -0,0 +1,42 @@
+# Generated by Django 5.2.9 on 2026-10-17 22:34
+
+from django.db import migrations, models
+
+
+def cerrar_alertas_duplicadas(apps, schema_editor):
+    # Deja solo la alerta abierta más reciente de cada producto
+    AlertaStock = apps.get_model("inventario", "AlertaStock")
+    vistas = set()
+    duplicadas = []
+    for alerta in AlertaStock.objects.filter(atendida=False).order_by("producto_id", "-creado_en", "-id"):
+        if alerta.producto_id in vistas:
+            duplicadas.append(alerta.id)
+        vistas.add(alerta.producto_id)
+    AlertaStock.objects.filter(id__in=duplicadas).update(atendida=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0002_producto_nombre_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alertastock',
+            index=models.Index(condition=models.Q(('atendida', False)), fields=['-creado_en'], name='alerta_abierta_creado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('activo', True), ('bloqueado', False)), fields=['nombre'], name='producto_vendible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('activo', True), ('stock__lte', models.F('stock_minimo')), ('stock_minimo__gt', 0)), fields=['stock'], name='producto_stock_bajo_idx'),
+        ),
+        migrations.RunPython(cerrar_alertas_duplicadas, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='alertastock',
+            constraint=models.UniqueConstraint(condition=models.Q(('atendida', False)), fields=('producto',), name='alerta_abierta_unica'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.9 on 2026-10-17 23:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0004_importaciones'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='producto',
+            name='producto_stock_bajo_idx',
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='stock_bajo',
+            field=models.GeneratedField(db_persist=True, expression=models.Q(('activo', True), ('stock__lte', models.F('stock_minimo')), ('stock_minimo__gt', 0)), output_field=models.BooleanField()),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('stock_bajo', True)), fields=['stock'], name='producto_stock_bajo_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.9 on 2026-10-17 23:08
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0005_producto_stock_bajo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Pronostico',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('demanda_diaria', models.FloatField(default=0)),
+                ('desviacion', models.FloatField(default=0)),
+                ('dias_cobertura', models.FloatField(blank=True, null=True)),
+                ('punto_reorden', models.PositiveIntegerField(default=0)),
+                ('cantidad_sugerida', models.PositiveIntegerField(default=0)),
+                ('calculado_en', models.DateTimeField(default=django.utils.timezone.now)),
+                ('producto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='pronostico', to='inventario.producto')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('cantidad_sugerida__gt', 0)), fields=['dias_cobertura'], name='pronostico_sugerencia_idx')],
+            },
+        ),
+    ]
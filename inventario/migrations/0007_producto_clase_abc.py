@@ -0,0 +1,27 @@
+# Generated by Django 5.2.9 on 2026-10-17 23:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0006_pronostico'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='producto',
+            name='clase_abc',
+            field=models.CharField(blank=True, choices=[('A', 'A'), ('B', 'B'), ('C', 'C')], default='', max_length=1),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='clase_abc_margen',
+            field=models.CharField(blank=True, choices=[('A', 'A'), ('B', 'B'), ('C', 'C')], default='', max_length=1),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['clase_abc', 'nombre'], name='producto_clase_abc_idx'),
+        ),
+    ]
@@ -1,6 +1,9 @@
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
+from .busqueda import normalizar
+
 
 class Categoria(models.Model):
     nombre = models.CharField(max_length=100, unique=True)
@@ -25,6 +28,9 @@ class Producto(models.Model):
     sku = models.CharField(max_length=50, unique=True)
     nombre = models.CharField(max_length=200)
 
+    # NOMBRE EN MINÚSCULAS Y SIN TILDES, INDEXADO PARA EL BUSCADOR
+    nombre_busqueda = models.CharField(max_length=200, blank=True, default="", editable=False)
+
     categoria = models.ForeignKey(
         Categoria,
         on_delete=models.PROTECT,
@@ -64,11 +70,48 @@ class Producto(models.Model):
         help_text="Si está bloqueado, no puede venderse"
     )
 
+    # LO CALCULA LA BD EN CADA INSERT/UPDATE, VENGA DE DONDE VENGA EL CAMBIO
+    # (VENTA, ANULACIÓN, IMPORTACIÓN, ADMIN), ASÍ QUE NUNCA QUEDA DESFASADO
+    stock_bajo = models.GeneratedField(
+        expression=models.Q(activo=True, stock_minimo__gt=0, stock__lte=models.F("stock_minimo")),
+        output_field=models.BooleanField(),
+        db_persist=True,
+    )
+
+    # CLASIFICACIÓN ABC (PARETO) POR VENTAS Y POR MARGEN; LA ACTUALIZA
+    # inventario/abc.py DESDE LOS RESÚMENES DIARIOS. VACÍO: SIN CLASIFICAR
+    CLASES_ABC = [("A", "A"), ("B", "B"), ("C", "C")]
+    clase_abc = models.CharField(max_length=1, choices=CLASES_ABC, blank=True, default="")
+    clase_abc_margen = models.CharField(max_length=1, choices=CLASES_ABC, blank=True, default="")
+
     creado_en = models.DateTimeField(default=timezone.now)
     actualizado_en = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["nombre"]
+        indexes = [
+            # BUSCADOR Y LISTADOS: SOLO VENDIBLES, YA ORDENADOS POR NOMBRE
+            models.Index(
+                fields=["nombre"],
+                condition=models.Q(activo=True, bloqueado=False),
+                name="producto_vendible_idx",
+            ),
+            # STOCK BAJO: SOLO LAS FILAS MARCADAS, ORDENADAS POR STOCK
+            models.Index(
+                fields=["stock"],
+                condition=models.Q(stock_bajo=True),
+                name="producto_stock_bajo_idx",
+            ),
+            # FILTRO POR CLASE ABC EN LISTADOS ORDENADOS POR NOMBRE
+            models.Index(fields=["clase_abc", "nombre"], name="producto_clase_abc_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.nombre_busqueda = normalizar(self.nombre)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "nombre" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "nombre_busqueda"}
+        super().save(*args, **kwargs)
 
     def margen(self):
         """Retorna el margen bruto de ganancia."""
@@ -93,6 +136,105 @@ class AlertaStock(models.Model):
 
     class Meta:
         ordering = ["-creado_en"]
+        indexes = [
+            models.Index(
+                fields=["-creado_en"],
+                condition=models.Q(atendida=False),
+                name="alerta_abierta_creado_idx",
+            ),
+        ]
+        constraints = [
+            # UNA SOLA ALERTA ABIERTA POR PRODUCTO; TAMBIÉN ES EL ÍNDICE
+            # PARA BUSCAR LAS ALERTAS ABIERTAS DE UN PRODUCTO
+            models.UniqueConstraint(
+                fields=["producto"],
+                condition=models.Q(atendida=False),
+                name="alerta_abierta_unica",
+            ),
+        ]
 
     def __str__(self):
         return f"Alerta {self.producto.nombre}: {self.mensaje}"
+
+
+class Pronostico(models.Model):
+    """
+    Demanda estimada y punto de reposición de un producto. Lo recalcula
+    cada noche manage.py pronosticar_demanda; reportes solo lo lee.
+    """
+    producto = models.OneToOneField(
+        Producto,
+        on_delete=models.CASCADE,
+        related_name="pronostico",
+    )
+    # UNIDADES POR DÍA (PROMEDIO SUAVIZADO) Y SU DESVIACIÓN
+    demanda_diaria = models.FloatField(default=0)
+    desviacion = models.FloatField(default=0)
+    # DÍAS QUE ALCANZA EL STOCK; VACÍO SI NO HAY DEMANDA
+    dias_cobertura = models.FloatField(null=True, blank=True)
+    punto_reorden = models.PositiveIntegerField(default=0)
+    cantidad_sugerida = models.PositiveIntegerField(default=0)
+    calculado_en = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # SUGERENCIAS DE COMPRA: SOLO LO QUE HAY QUE PEDIR, LO MÁS URGENTE PRIMERO
+            models.Index(
+                fields=["dias_cobertura"],
+                condition=models.Q(cantidad_sugerida__gt=0),
+                name="pronostico_sugerencia_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.producto}: {self.demanda_diaria:.1f}/día, pedir {self.cantidad_sugerida}"
+
+
+class Importacion(models.Model):
+    """
+    Importación de un CSV de productos procesada en segundo plano, por
+    tramos. Cada tramo se confirma junto con filas_procesadas, así un
+    worker que se reinicia continúa desde el último tramo guardado.
+    """
+
+    ESTADOS = [
+        ("PENDIENTE", "Pendiente"),
+        ("PROCESANDO", "Procesando"),
+        ("TERMINADA", "Terminada"),
+        ("FALLIDA", "Fallida"),
+    ]
+
+    archivo = models.FileField(upload_to="importaciones/%Y/%m/")
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+    )
+    estado = models.CharField(max_length=12, choices=ESTADOS, default="PENDIENTE")
+    mensaje = models.CharField(max_length=255, blank=True, default="")
+
+    # PROGRESO: FILAS DE DATOS LEÍDAS Y YA CONFIRMADAS EN LA BD
+    total_filas = models.PositiveIntegerField(null=True, blank=True)
+    filas_procesadas = models.PositiveIntegerField(default=0)
+    creados = models.PositiveIntegerField(default=0)
+    actualizados = models.PositiveIntegerField(default=0)
+    total_errores = models.PositiveIntegerField(default=0)
+    errores = models.JSONField(default=list, blank=True)
+
+    creado_en = models.DateTimeField(default=timezone.now)
+    # LO RENUEVA EL WORKER EN CADA TRAMO; SI SE DETIENE, OTRO LA RETOMA
+    latido = models.DateTimeField(null=True, blank=True)
+    terminado_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-creado_en"]
+
+    def __str__(self):
+        return f"Importación #{self.id} ({self.estado})"
+
+    @property
+    def porcentaje(self):
+        if not self.total_filas:
+            return 100 if self.estado == "TERMINADA" else 0
+        return min(100, round(100 * self.filas_procesadas / self.total_filas))
@@ -0,0 +1,156 @@
+"""
+Pronóstico de demanda y punto de reposición por producto.
+
+Las ventas diarias de cada producto (resúmenes diarios) se cargan en una
+matriz de NumPy de productos × días y todo se calcula de una vez para el
+catálogo completo:
+
+- demanda diaria: promedio con pesos exponenciales (los días recientes
+  pesan más), como un producto matriz × vector;
+- desviación: la misma ponderación sobre los cuadrados de las diferencias;
+- stock de seguridad = Z_SERVICIO × desviación × √plazo;
+- punto de reorden = demanda × plazo + seguridad (nunca bajo el mínimo);
+- cantidad sugerida: lo que falta para cubrir plazo + días de cobertura
+  cuando el stock ya está en el punto de reorden o bajo él.
+
+Se guarda en Pronostico; las vistas no importan este módulo ni NumPy.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from ventas.models import ResumenDiarioProducto
+
+from .models import Producto, Pronostico
+
+DIAS_HISTORIA = 90
+PLAZO_DIAS = 3          # DÍAS QUE TARDA EN LLEGAR UN PEDIDO
+COBERTURA_DIAS = 7      # DÍAS QUE DEBE DURAR LO PEDIDO
+SUAVIZADO = 0.1         # PESO DEL ÚLTIMO DÍA (0 A 1)
+Z_SERVICIO = 1.65       # ~95 % DE LOS DÍAS SIN QUIEBRE DE STOCK
+FILAS_POR_LOTE = 500
+
+
+def series_diarias(producto_ids, desde, hasta):
+    """
+    Matriz (productos × días) de unidades vendidas, con ceros en los días
+    sin ventas. Una sola consulta sobre los resúmenes diarios.
+    """
+    dias = (hasta - desde).days + 1
+    fila_de = {pid: i for i, pid in enumerate(producto_ids)}
+    series = np.zeros((len(producto_ids), dias))
+
+    filas = (
+        ResumenDiarioProducto.objects.filter(fecha__gte=desde, fecha__lte=hasta)
+        .values_list("producto_id", "fecha", "cantidad")
+        .iterator(chunk_size=5000)
+    )
+    indices_fila, indices_dia, cantidades = [], [], []
+    for producto_id, fecha, cantidad in filas:
+        fila = fila_de.get(producto_id)
+        if fila is None:
+            continue
+        indices_fila.append(fila)
+        indices_dia.append((fecha - desde).days)
+        cantidades.append(cantidad)
+    np.add.at(series, (indices_fila, indices_dia), cantidades)
+    return series
+
+
+def calcular(series, stock, stock_minimo, plazo=PLAZO_DIAS, cobertura=COBERTURA_DIAS,
+             suavizado=SUAVIZADO, z=Z_SERVICIO):
+    """
+    Recibe las series (productos × días, la última columna es el día más
+    reciente) y los vectores de stock y mínimo. Devuelve un dict de
+    vectores: demanda, desviacion, dias_cobertura (nan sin demanda),
+    punto_reorden y cantidad_sugerida.
+    """
+    dias = series.shape[1]
+    pesos = suavizado * (1 - suavizado) ** np.arange(dias - 1, -1, -1)
+    pesos /= pesos.sum()
+
+    demanda = series @ pesos
+    desviacion = np.sqrt(((series - demanda[:, None]) ** 2) @ pesos)
+
+    seguridad = z * desviacion * np.sqrt(plazo)
+
+    def redondear_arriba(x):
+        # SIN EL ERROR DE PUNTO FLOTANTE: 12.0000001 NO DEBE SUBIR A 13
+        return np.ceil(np.round(x, 6))
+
+    punto_reorden = np.maximum(redondear_arriba(demanda * plazo + seguridad), stock_minimo)
+
+    objetivo = redondear_arriba(demanda * (plazo + cobertura) + seguridad)
+    objetivo = np.maximum(objetivo, stock_minimo + 1)
+    cantidad = np.where(stock <= punto_reorden, np.maximum(objetivo - stock, 0), 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dias_cobertura = np.where(demanda > 0, stock / demanda, np.nan)
+
+    # SIN VENTAS Y SIN MÍNIMO NO HAY NADA QUE PEDIR
+    cantidad = np.where((demanda == 0) & (stock_minimo == 0), 0, cantidad)
+
+    return {
+        "demanda": demanda,
+        "desviacion": desviacion,
+        "dias_cobertura": dias_cobertura,
+        "punto_reorden": punto_reorden.astype(int),
+        "cantidad_sugerida": cantidad.astype(int),
+    }
+
+
+def pronosticar(dias=DIAS_HISTORIA, plazo=PLAZO_DIAS, cobertura=COBERTURA_DIAS):
+    """
+    Recalcula el pronóstico de todos los productos activos con la historia
+    de los últimos `dias` días cerrados (hasta ayer). Devuelve
+    (productos, con_sugerencia).
+    """
+    hasta = timezone.localdate() - timedelta(days=1)
+    desde = hasta - timedelta(days=dias - 1)
+
+    productos = list(
+        Producto.objects.filter(activo=True)
+        .order_by("id")
+        .values_list("id", "stock", "stock_minimo")
+    )
+    if not productos:
+        Pronostico.objects.all().delete()
+        return 0, 0
+
+    ids = [p[0] for p in productos]
+    stock = np.array([p[1] for p in productos], dtype=float)
+    minimo = np.array([p[2] for p in productos], dtype=float)
+
+    r = calcular(series_diarias(ids, desde, hasta), stock, minimo, plazo, cobertura)
+
+    ahora = timezone.now()
+    pronosticos = [
+        Pronostico(
+            producto_id=pid,
+            demanda_diaria=round(float(r["demanda"][i]), 3),
+            desviacion=round(float(r["desviacion"][i]), 3),
+            dias_cobertura=None if np.isnan(r["dias_cobertura"][i]) else round(float(r["dias_cobertura"][i]), 1),
+            punto_reorden=int(r["punto_reorden"][i]),
+            cantidad_sugerida=int(r["cantidad_sugerida"][i]),
+            calculado_en=ahora,
+        )
+        for i, pid in enumerate(ids)
+    ]
+
+    with transaction.atomic():
+        Pronostico.objects.bulk_create(
+            pronosticos,
+            update_conflicts=True,
+            unique_fields=["producto"],
+            update_fields=[
+                "demanda_diaria", "desviacion", "dias_cobertura",
+                "punto_reorden", "cantidad_sugerida", "calculado_en",
+            ],
+            batch_size=FILAS_POR_LOTE,
+        )
+        # PRODUCTOS DESACTIVADOS DESDE LA ÚLTIMA VEZ
+        Pronostico.objects.exclude(calculado_en=ahora).delete()
+
+    return len(pronosticos), int((r["cantidad_sugerida"] > 0).sum())
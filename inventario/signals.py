@@ -0,0 +1,24 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache_sku, stock_bajo
+from .models import Producto
+
+
+@receiver(post_save, sender=Producto)
+@receiver(post_delete, sender=Producto)
+def invalidar_cache_sku(sender, instance, **kwargs):
+    # Por id (si le cambiaron el SKU) y por SKU (si estaba guardado como inexistente).
+    # Se repite al confirmar por si otra petición leyó la fila vieja entremedio.
+    def invalidar():
+        cache_sku.invalidar(producto_id=instance.pk, sku=instance.sku)
+
+    invalidar()
+    transaction.on_commit(invalidar)
+
+
+@receiver(post_save, sender=Producto)
+@receiver(post_delete, sender=Producto)
+def invalidar_stock_bajo(sender, instance, **kwargs):
+    stock_bajo.invalidar()
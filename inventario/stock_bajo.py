@@ -0,0 +1,50 @@
+"""
+Conjunto y contador de productos con stock bajo.
+
+El conjunto sale del campo generado Producto.stock_bajo, que la BD
+mantiene en cada escritura, y de su índice parcial producto_stock_bajo_idx.
+El total se guarda en memoria del proceso para la portada y el menú: se
+invalida al evaluar las alertas (todas las operaciones que mueven stock
+pasan por ahí) y con las señales de Producto. Como solo es un aviso en el
+menú, basta que en otro proceso se corrija al minuto (TTL_SEGUNDOS).
+"""
+import threading
+import time
+
+from django.db import transaction
+
+from .models import Producto
+
+TTL_SEGUNDOS = 60
+
+_lock = threading.Lock()
+_total = None  # (vence, total)
+
+
+def productos():
+    return Producto.objects.filter(stock_bajo=True)
+
+
+def total():
+    """Cantidad de productos con stock bajo; con la caché vigente no consulta la BD."""
+    global _total
+    entrada = _total
+    if entrada is not None and entrada[0] > time.monotonic():
+        return entrada[1]
+
+    valor = productos().count()
+    with _lock:
+        _total = (time.monotonic() + TTL_SEGUNDOS, valor)
+    return valor
+
+
+def _limpiar():
+    global _total
+    with _lock:
+        _total = None
+
+
+def invalidar():
+    # SE REPITE AL CONFIRMAR POR SI OTRA PETICIÓN CONTÓ LAS FILAS VIEJAS ENTREMEDIO
+    _limpiar()
+    transaction.on_commit(_limpiar)
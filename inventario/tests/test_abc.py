@@ -0,0 +1,112 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from inventario.abc import clases, clasificar, ventana
+from inventario.models import Producto
+from ventas.models import ResumenDiarioProducto
+
+
+class ClasesTests(SimpleTestCase):
+    def test_cortes_acumulados(self):
+        clase, participacion, acumulado = clases([5, 50, 0, 30, 10, 3, 2])
+
+        # ORDEN: 50 30 | 10 5 | 3 2 0 -> EL QUE CRUZA EL 80 % ES A
+        self.assertEqual(clase.tolist(), ["B", "A", "C", "A", "B", "C", "C"])
+        self.assertAlmostEqual(participacion[1], 0.5)
+        self.assertAlmostEqual(acumulado[3], 0.8)
+        self.assertAlmostEqual(acumulado[2], 1.0)
+
+    def test_sin_ventas_todo_c(self):
+        self.assertEqual(clases([0, 0])[0].tolist(), ["C", "C"])
+
+
+class ClasificacionTests(TestCase):
+    def setUp(self):
+        desde, self.hasta = ventana()
+        self.productos = []
+        # MONTOS 600 / 250 / 100 / 50
+        for i, monto in enumerate([600, 250, 100, 50]):
+            p = Producto.objects.create(
+                sku=f"ABC-{i}", nombre=f"Producto {i}", precio_unitario=Decimal("1000"), stock=10
+            )
+            self.productos.append(p)
+            ResumenDiarioProducto.objects.create(
+                fecha=self.hasta, producto=p, cantidad=1,
+                monto=Decimal(monto), margen=Decimal(monto if i == 3 else 10),
+            )
+        # VENTA FUERA DE LA VENTANA: NO CUENTA
+        ResumenDiarioProducto.objects.create(
+            fecha=desde - timedelta(days=1), producto=self.productos[3], cantidad=1, monto=Decimal("99999")
+        )
+        self.sin_ventas = Producto.objects.create(
+            sku="ABC-X", nombre="Sin ventas", precio_unitario=Decimal("1000"), stock=10
+        )
+
+    def clases_guardadas(self, campo="clase_abc"):
+        return list(Producto.objects.order_by("sku").values_list(campo, flat=True))
+
+    def test_guarda_clases_y_solo_cambia_lo_distinto(self):
+        self.assertEqual(clasificar(), (5, 5))
+        self.assertEqual(self.clases_guardadas(), ["A", "A", "B", "C", "C"])
+        # POR MARGEN EL ÚLTIMO ES EL QUE MÁS APORTA
+        self.assertEqual(self.clases_guardadas("clase_abc_margen"), ["A", "A", "B", "A", "C"])
+
+        self.assertEqual(clasificar(), (5, 0))
+
+        Producto.objects.filter(id=self.productos[0].id).update(activo=False)
+        self.assertEqual(clasificar()[0], 4)
+        self.assertEqual(Producto.objects.get(id=self.productos[0].id).clase_abc, "")
+
+    def test_comando(self):
+        salida = StringIO()
+        call_command("clasificar_abc", stdout=salida)
+        self.assertIn("5 productos clasificados, 5 cambiaron de clase", salida.getvalue())
+
+    def test_filtros_por_clase(self):
+        clasificar()
+        self.client.force_login(get_user_model().objects.create_superuser("duenio", password="x"))
+
+        r = self.client.get(reverse("inventario:lista"), {"clase": "A"})
+        self.assertEqual(list(r.context["productos"]), self.productos[:2])
+
+        r = self.client.get(reverse("reportes:index"), {"clase": "B"})
+        self.assertEqual([p.sku for p in r.context["pagina"]], ["ABC-2"])
+
+        r = self.client.get(reverse("reportes:exportar_inventario"), {"clase": "A"})
+        contenido = b"".join(r.streaming_content).decode("utf-8-sig").splitlines()
+        self.assertEqual([fila.split(",")[0] for fila in contenido[1:]], ["ABC-0", "ABC-1"])
+
+    def test_reporte_por_defecto_usa_la_ventana_guardada(self):
+        clasificar()
+        # LO VENDIDO HOY NO ENTRA EN LA CLASIFICACIÓN GUARDADA
+        ResumenDiarioProducto.objects.create(
+            fecha=self.hasta + timedelta(days=1), producto=self.sin_ventas, cantidad=1, monto=Decimal("99999")
+        )
+        self.client.force_login(get_user_model().objects.create_superuser("duenio", password="x"))
+
+        r = self.client.get(reverse("reportes:abc"))
+        self.assertEqual((r.context["desde"], r.context["hasta"]), ventana())
+        self.assertEqual(
+            [c["productos"] for c in r.context["resumen"]], [c["guardados"] for c in r.context["resumen"]]
+        )
+
+    def test_reporte_y_guardar_otra_ventana(self):
+        self.client.force_login(get_user_model().objects.create_superuser("duenio", password="x"))
+        rango = {"desde": str(self.hasta - timedelta(days=6)), "hasta": str(self.hasta)}
+
+        r = self.client.get(reverse("reportes:abc"), rango)
+        self.assertEqual([f["producto"].sku for f in r.context["filas"]][:2], ["ABC-0", "ABC-1"])
+        self.assertEqual([c["productos"] for c in r.context["resumen"]], [2, 1, 2])
+
+        r = self.client.get(reverse("reportes:abc"), {**rango, "criterio": "margen"})
+        self.assertEqual(r.context["filas"][0]["producto"].sku, "ABC-3")
+
+        r = self.client.post(reverse("reportes:abc"), rango)
+        self.assertEqual(r.status_code, 302)
+        self.assertEqual(self.clases_guardadas(), ["A", "A", "B", "C", "C"])
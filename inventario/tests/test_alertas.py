@@ -0,0 +1,102 @@
+import io
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from inventario.alertas import evaluar_alertas
+from inventario.importacion import importar_csv
+from inventario.models import AlertaStock, Categoria, Producto
+from ventas.anulacion import anular_ventas
+from ventas.checkout import registrar_venta
+
+
+class AlertasStockTests(TestCase):
+    def setUp(self):
+        self.productos = [
+            Producto.objects.create(
+                sku=f"AL-{i}", nombre=f"Producto {i}", precio_unitario=Decimal("1000"),
+                stock=10, stock_minimo=5,
+            )
+            for i in range(20)
+        ]
+
+    def abiertas(self):
+        return set(
+            AlertaStock.objects.filter(atendida=False).values_list("producto_id", flat=True)
+        )
+
+    def test_venta_abre_alertas_en_un_insert(self):
+        items = [{"id": p.id, "cantidad": 6} for p in self.productos]
+        registrar_venta(items)
+        self.assertEqual(self.abiertas(), {p.id for p in self.productos})
+
+        # UNA SEGUNDA VENTA NO DUPLICA LAS ALERTAS ABIERTAS
+        registrar_venta([{"id": p.id, "cantidad": 1} for p in self.productos])
+        self.assertEqual(AlertaStock.objects.filter(atendida=False).count(), 20)
+
+    def test_venta_sin_criticos_no_consulta_alertas(self):
+        with CaptureQueriesContext(connection) as ctx:
+            registrar_venta([{"id": p.id, "cantidad": 1} for p in self.productos])
+        self.assertFalse([q for q in ctx.captured_queries if "alertastock" in q["sql"].lower()])
+
+    def test_consultas_fijas(self):
+        # SIN CRÍTICOS NO HAY INSERT
+        with self.assertNumQueries(2):
+            evaluar_alertas([p.id for p in self.productos[:2]])
+        Producto.objects.update(stock=1)
+        with self.assertNumQueries(3):
+            evaluar_alertas([p.id for p in self.productos])
+        self.assertEqual(len(self.abiertas()), 20)
+
+    def test_cierra_al_reponer(self):
+        Producto.objects.update(stock=2)
+        evaluar_alertas(Producto.objects.all())
+        Producto.objects.filter(id=self.productos[0].id).update(stock=50)
+        Producto.objects.filter(id=self.productos[1].id).update(stock_minimo=0)
+
+        evaluar_alertas(Producto.objects.all())
+
+        self.assertEqual(self.abiertas(), {p.id for p in self.productos[2:]})
+        self.assertEqual(AlertaStock.objects.filter(atendida=True).count(), 2)
+
+    def test_anulacion_cierra_alertas(self):
+        p = self.productos[0]
+        venta = registrar_venta([{"id": p.id, "cantidad": 6}])
+        self.assertEqual(self.abiertas(), {p.id})
+
+        anular_ventas([venta.id])
+        self.assertEqual(self.abiertas(), set())
+
+    def test_edicion_de_stock(self):
+        user = get_user_model().objects.create_user("bodega", password="x")
+        self.client.force_login(user)
+        categoria = Categoria.objects.create(nombre="Cervezas")
+        p = self.productos[0]
+        datos = {
+            "sku": p.sku, "nombre": p.nombre, "categoria": categoria.id,
+            "precio_unitario": "1000", "stock_minimo": "5", "activo": "on",
+        }
+
+        self.client.post(reverse("inventario:editar", args=[p.id]), {**datos, "stock": "5"})
+        self.assertEqual(self.abiertas(), {p.id})
+
+        self.client.post(reverse("inventario:editar", args=[p.id]), {**datos, "stock": "30"})
+        self.assertEqual(self.abiertas(), set())
+
+    def test_importacion(self):
+        csv = (
+            "sku,nombre,categoria,precio_unitario,stock,stock_minimo,activo\n"
+            "AL-0,Producto 0,,1000,1,5,1\n"
+            "AL-NUEVO,Nuevo,,1000,0,3,1\n"
+            "AL-2,Producto 2,,1000,40,5,1\n"
+        ).encode()
+        AlertaStock.objects.create(producto=self.productos[2], mensaje="vieja")
+
+        importar_csv(io.BytesIO(csv))
+
+        nuevo = Producto.objects.get(sku="AL-NUEVO")
+        self.assertEqual(self.abiertas(), {self.productos[0].id, nuevo.id})
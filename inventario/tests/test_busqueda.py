@@ -0,0 +1,74 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from inventario.busqueda import buscar, normalizar
+from inventario.models import Producto
+
+
+class BusquedaProductosTests(TestCase):
+    def setUp(self):
+        self.pisco = Producto.objects.create(
+            sku="PIS-001", nombre="Písco Mistral 35º", precio_unitario=Decimal("6500")
+        )
+        self.coca = Producto.objects.create(
+            sku="BEB-001", nombre="Bebida Coca-Cola 1.5L", precio_unitario=Decimal("1500")
+        )
+        self.sprite = Producto.objects.create(
+            sku="BEB-002", nombre="Bebida Sprite 1.5L", precio_unitario=Decimal("1500")
+        )
+
+    def nombres(self, q):
+        return [p.sku for p in buscar(Producto.objects.all(), q)]
+
+    def test_normalizar(self):
+        self.assertEqual(normalizar("  Písco AÑEJO "), "pisco anejo")
+        self.assertEqual(self.pisco.nombre_busqueda, "pisco mistral 35º")
+
+    def test_sin_tildes(self):
+        self.assertEqual(self.nombres("pisco"), ["PIS-001"])
+        self.assertEqual(self.nombres("PÍSCO"), ["PIS-001"])
+
+    def test_varios_terminos(self):
+        self.assertEqual(self.nombres("bebida sprite"), ["BEB-002"])
+        self.assertEqual(self.nombres("coca 1.5"), ["BEB-001"])
+
+    def test_prefijo_de_sku_primero(self):
+        Producto.objects.create(sku="XYZ-9", nombre="Vaso beb-plastico")
+        self.assertEqual(self.nombres("beb-0"), ["BEB-001", "BEB-002"])
+        self.assertEqual(self.nombres("beb")[:2], ["BEB-001", "BEB-002"])
+
+    def test_cambio_de_nombre_actualiza_indice(self):
+        self.sprite.nombre = "Bebida Fanta 1.5L"
+        self.sprite.save()
+        self.assertEqual(self.nombres("sprite"), [])
+        self.assertEqual(self.nombres("fanta"), ["BEB-002"])
+
+    def test_producto_borrado_sale_del_indice(self):
+        self.coca.delete()
+        self.assertEqual(self.nombres("coca"), [])
+
+    def test_sqlite_usa_fts(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Solo SQLite")
+        sql = str(buscar(Producto.objects.all(), "mistral").query)
+        self.assertIn("inventario_producto_fts", sql)
+
+
+class BusquedaVistasTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user("caja", password="x")
+        self.client.force_login(user)
+        Producto.objects.create(sku="PIS-001", nombre="Písco Mistral")
+        Producto.objects.create(sku="RUM-001", nombre="Ron Pampero")
+
+    def test_buscar_productos_pos(self):
+        r = self.client.get(reverse("ventas:buscar"), {"q": "pisco"})
+        self.assertEqual([p["sku"] for p in r.json()["results"]], ["PIS-001"])
+
+    def test_lista_inventario_filtra_por_q(self):
+        r = self.client.get(reverse("inventario:lista"), {"q": "pampero"})
+        self.assertEqual([p.sku for p in r.context["productos"]], ["RUM-001"])
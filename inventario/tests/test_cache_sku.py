@@ -0,0 +1,45 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from inventario import cache_sku
+from inventario.models import Producto
+
+
+class CacheSKUTests(TestCase):
+    def setUp(self):
+        cache_sku.limpiar()
+        self.producto = Producto.objects.create(
+            sku="7801234567890", nombre="Cerveza Escudo", precio_unitario=Decimal("1000")
+        )
+
+    def test_hit_no_consulta_la_bd(self):
+        self.assertEqual(cache_sku.obtener("7801234567890")["id"], self.producto.id)
+        with self.assertNumQueries(0):
+            self.assertEqual(cache_sku.obtener("7801234567890")["nombre"], "Cerveza Escudo")
+
+    def test_save_invalida(self):
+        cache_sku.obtener("7801234567890")
+        self.producto.precio_unitario = Decimal("1200")
+        self.producto.save()
+        self.assertEqual(cache_sku.obtener("7801234567890")["precio"], 1200.0)
+
+    def test_cambio_de_sku_invalida_el_anterior(self):
+        cache_sku.obtener("7801234567890")
+        self.producto.sku = "7800000000001"
+        self.producto.save()
+        self.assertIsNone(cache_sku.obtener("7801234567890"))
+        self.assertEqual(cache_sku.obtener("7800000000001")["id"], self.producto.id)
+
+    def test_sku_inexistente_y_luego_creado(self):
+        self.assertIsNone(cache_sku.obtener("999"))
+        with self.assertNumQueries(0):
+            self.assertIsNone(cache_sku.obtener("999"))
+
+        Producto.objects.create(sku="999", nombre="Nuevo")
+        self.assertEqual(cache_sku.obtener("999")["nombre"], "Nuevo")
+
+    def test_delete_invalida(self):
+        cache_sku.obtener("7801234567890")
+        self.producto.delete()
+        self.assertIsNone(cache_sku.obtener("7801234567890"))
@@ -0,0 +1,178 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from inventario import cache_sku
+from inventario import importacion as importacion_mod
+from inventario.importacion import ArchivoInvalido, importar_csv, procesar, reclamar
+from inventario.models import Categoria, Importacion, Producto
+
+ENCABEZADO = "sku,nombre,categoria,precio_unitario,stock,stock_minimo,activo\n"
+
+
+def csv_archivo(*filas, encabezado=ENCABEZADO):
+    contenido = encabezado + "".join(f + "\n" for f in filas)
+    return SimpleUploadedFile("inventario.csv", contenido.encode("utf-8"), content_type="text/csv")
+
+
+class ImportacionTests(TestCase):
+    def test_crea_y_actualiza(self):
+        Producto.objects.create(sku="A-1", nombre="Viejo", precio_unitario=Decimal("100"), stock=1)
+
+        resultado = importar_csv(csv_archivo(
+            "A-1,Pisco Añejo,Destilados,\"5990,50\",12,3,1",
+            "B-2,Cerveza,Cervezas,1000,24,6,0",
+        ))
+
+        self.assertEqual((resultado["creados"], resultado["actualizados"]), (1, 1))
+        self.assertEqual(resultado["errores"], [])
+
+        pisco = Producto.objects.get(sku="A-1")
+        self.assertEqual(pisco.nombre, "Pisco Añejo")
+        self.assertEqual(pisco.nombre_busqueda, "pisco anejo")
+        self.assertEqual(pisco.precio_unitario, Decimal("5990.50"))
+        self.assertEqual(pisco.categoria.nombre, "Destilados")
+        self.assertFalse(Producto.objects.get(sku="B-2").activo)
+
+    def test_reporta_filas_invalidas(self):
+        resultado = importar_csv(csv_archivo(
+            "OK-1,Ron,,3000,5,1,1",
+            ",Sin sku,,1000,1,0,1",
+            "MAL-1,Vodka,,abc,1,0,1",
+            "MAL-2,Tequila,,1000,dos,0,1",
+            "MAL-3,Gin,,1000,-4,0,1",
+        ))
+
+        self.assertEqual(resultado["creados"], 1)
+        self.assertEqual(
+            [(e["linea"], e["sku"]) for e in resultado["errores"]],
+            [(3, ""), (4, "MAL-1"), (5, "MAL-2"), (6, "MAL-3")],
+        )
+        self.assertIn("stock", resultado["errores"][2]["error"])
+        self.assertEqual(Producto.objects.count(), 1)
+
+    def test_sku_repetido_gana_la_ultima_fila(self):
+        importar_csv(csv_archivo("R-1,Primero,,1000,1,0,1", "R-1,Segundo,,2000,2,0,1"))
+        self.assertEqual(Producto.objects.get(sku="R-1").nombre, "Segundo")
+
+    def test_consultas_por_lote_y_no_por_fila(self):
+        Categoria.objects.create(nombre="Vinos")
+
+        def contar(n):
+            Producto.objects.all().delete()
+            filas = [f"V-{i},Vino {i},Vinos,1000,1,0,1" for i in range(n)]
+            with CaptureQueriesContext(connection) as ctx:
+                importar_csv(csv_archivo(*filas), tamano_lote=1000)
+            return len(ctx.captured_queries)
+
+        # EL INSERT SE PARTE SEGÚN EL LÍMITE DE PARÁMETROS DEL MOTOR, NO POR FILA
+        self.assertLessEqual(contar(300), contar(10) + 6)
+
+    def test_archivo_sin_columna_sku(self):
+        with self.assertRaises(ArchivoInvalido):
+            importar_csv(csv_archivo("x,y", encabezado="codigo,nombre\n"))
+
+    def test_archivo_no_utf8_no_guarda_nada(self):
+        archivo = SimpleUploadedFile(
+            "inventario.csv",
+            (ENCABEZADO + "L-1,Licor,,1000,1,0,1\nL-2,Caf\xe9,,1000,1,0,1\n").encode("latin-1"),
+        )
+        with self.assertRaises(ArchivoInvalido):
+            importar_csv(archivo, tamano_lote=1)
+        self.assertFalse(Producto.objects.exists())
+
+    def test_invalida_cache_de_sku(self):
+        cache_sku.limpiar()
+        self.assertIsNone(cache_sku.obtener("N-1"))
+        importar_csv(csv_archivo("N-1,Nuevo,,1000,1,0,1"))
+        self.assertEqual(cache_sku.obtener("N-1")["nombre"], "Nuevo")
+
+
+MEDIA_TEMPORAL = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_TEMPORAL, IMPORTACIONES_EN_HILO=False)
+class ImportacionSegundoPlanoTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_TEMPORAL, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_user("admin", password="x"))
+
+    def subir(self, *filas):
+        r = self.client.post(reverse("inventario:importar"), {"archivo": csv_archivo(*filas)})
+        importacion = Importacion.objects.latest("id")
+        self.assertRedirects(r, reverse("inventario:importacion", args=[importacion.pk]))
+        return importacion
+
+    def estado(self, importacion):
+        return self.client.get(reverse("inventario:importacion_estado", args=[importacion.pk])).json()
+
+    def test_subir_crea_trabajo_y_el_worker_lo_procesa(self):
+        importacion = self.subir("OK-1,Ron,,3000,5,1,1", "MAL-1,Vodka,,1000,x,0,1")
+        self.assertEqual(self.estado(importacion)["estado"], "PENDIENTE")
+        self.assertFalse(Producto.objects.exists())
+
+        call_command("procesar_importaciones", una_vez=True, stdout=StringIO())
+
+        estado = self.estado(importacion)
+        self.assertEqual(estado["estado"], "TERMINADA")
+        self.assertEqual((estado["total_filas"], estado["porcentaje"]), (2, 100))
+        self.assertEqual((estado["creados"], estado["total_errores"]), (1, 1))
+        self.assertEqual(estado["errores"][0]["sku"], "MAL-1")
+        self.assertTrue(Producto.objects.filter(sku="OK-1").exists())
+
+    def test_retoma_desde_el_ultimo_tramo(self):
+        importacion = self.subir(*[f"T-{i},Producto {i},,1000,1,0,1" for i in range(5)])
+
+        original = importacion_mod.importar_lote
+        llamadas = []
+
+        def falla_en_el_segundo_tramo(lote, categorias):
+            llamadas.append(len(lote))
+            if len(llamadas) == 2:
+                raise DatabaseError("worker detenido")
+            return original(lote, categorias)
+
+        with mock.patch.object(importacion_mod, "importar_lote", falla_en_el_segundo_tramo):
+            with self.assertRaises(DatabaseError):
+                procesar(reclamar(), tamano_tramo=2)
+
+        importacion.refresh_from_db()
+        self.assertEqual((importacion.estado, importacion.filas_procesadas), ("PROCESANDO", 2))
+        self.assertEqual(Producto.objects.count(), 2)
+
+        # MIENTRAS EL LATIDO ESTÁ VIGENTE NADIE MÁS LA TOMA
+        self.assertIsNone(reclamar())
+        Importacion.objects.filter(id=importacion.id).update(
+            latido=timezone.now() - timedelta(minutes=10)
+        )
+
+        procesar(reclamar(), tamano_tramo=2)
+        importacion.refresh_from_db()
+        self.assertEqual(importacion.estado, "TERMINADA")
+        self.assertEqual((importacion.filas_procesadas, importacion.creados), (5, 5))
+        self.assertEqual(Producto.objects.count(), 5)
+
+    def test_archivo_invalido_queda_fallida(self):
+        importacion = Importacion.objects.create(
+            archivo=SimpleUploadedFile("malo.csv", b"codigo,nombre\nx,y\n")
+        )
+        procesar(reclamar())
+        importacion.refresh_from_db()
+        self.assertEqual(importacion.estado, "FALLIDA")
+        self.assertIn("sku", importacion.mensaje)
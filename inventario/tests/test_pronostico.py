@@ -0,0 +1,89 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from inventario.models import Producto, Pronostico
+from inventario.pronostico import calcular, series_diarias
+from ventas.models import ResumenDiarioProducto
+
+
+class CalculoTests(SimpleTestCase):
+    def test_demanda_constante(self):
+        series = np.full((1, 30), 4.0)
+        r = calcular(series, np.array([10.0]), np.array([0.0]), plazo=3, cobertura=7)
+
+        self.assertAlmostEqual(r["demanda"][0], 4.0)
+        self.assertAlmostEqual(r["desviacion"][0], 0.0)
+        self.assertEqual(r["punto_reorden"][0], 12)
+        self.assertAlmostEqual(r["dias_cobertura"][0], 2.5)
+        # CUBRIR 10 DÍAS (40 UNIDADES) TENIENDO 10
+        self.assertEqual(r["cantidad_sugerida"][0], 30)
+
+    def test_vectorizado_para_todo_el_catalogo(self):
+        series = np.array([
+            [0.0] * 20 + [10.0] * 10,   # DEMANDA RECIENTE: PESA MÁS
+            [10.0] * 10 + [0.0] * 20,   # DEJÓ DE VENDERSE
+            [0.0] * 30,                 # SIN VENTAS NI MÍNIMO
+            [0.0] * 30,                 # SIN VENTAS, BAJO EL MÍNIMO
+        ])
+        stock = np.array([100.0, 5.0, 0.0, 1.0])
+        minimo = np.array([0.0, 0.0, 0.0, 4.0])
+
+        r = calcular(series, stock, minimo)
+
+        self.assertGreater(r["demanda"][0], r["demanda"][1])
+        self.assertGreater(r["desviacion"][0], 0)
+        self.assertEqual(r["cantidad_sugerida"][2], 0)
+        self.assertTrue(np.isnan(r["dias_cobertura"][2]))
+        self.assertEqual(r["punto_reorden"][3], 4)
+        self.assertEqual(r["cantidad_sugerida"][3], 4)
+
+
+class PronosticoTests(TestCase):
+    def setUp(self):
+        self.ayer = timezone.localdate() - timedelta(days=1)
+        self.cerveza = Producto.objects.create(
+            sku="PR-1", nombre="Cerveza", precio_unitario=Decimal("1000"), stock=15, stock_minimo=5
+        )
+        self.vino = Producto.objects.create(
+            sku="PR-2", nombre="Vino", precio_unitario=Decimal("5000"), stock=500, stock_minimo=5
+        )
+        for i in range(60):
+            ResumenDiarioProducto.objects.create(
+                fecha=self.ayer - timedelta(days=i), producto=self.cerveza, cantidad=6
+            )
+        ResumenDiarioProducto.objects.create(fecha=self.ayer, producto=self.vino, cantidad=2)
+
+    def test_series_diarias(self):
+        series = series_diarias([self.vino.id, self.cerveza.id], self.ayer - timedelta(days=9), self.ayer)
+        self.assertEqual(series.shape, (2, 10))
+        self.assertEqual(series[0].tolist(), [0] * 9 + [2])
+        self.assertEqual(series[1].sum(), 60)
+
+    def test_comando_y_sugerencias(self):
+        salida = StringIO()
+        call_command("pronosticar_demanda", stdout=salida)
+        self.assertIn("2 productos pronosticados, 1 para pedir", salida.getvalue())
+
+        cerveza = Pronostico.objects.get(producto=self.cerveza)
+        self.assertAlmostEqual(cerveza.demanda_diaria, 6, places=1)
+        self.assertGreater(cerveza.cantidad_sugerida, 0)
+        self.assertEqual(Pronostico.objects.get(producto=self.vino).cantidad_sugerida, 0)
+
+        self.client.force_login(get_user_model().objects.create_superuser("duenio", password="x"))
+        r = self.client.get(reverse("reportes:index"))
+        self.assertEqual([s.producto for s in r.context["sugerencias"]], [self.cerveza])
+        self.assertContains(r, f"Pedir {cerveza.cantidad_sugerida}")
+
+    def test_productos_desactivados_salen_del_pronostico(self):
+        call_command("pronosticar_demanda", stdout=StringIO())
+        Producto.objects.filter(id=self.vino.id).update(activo=False)
+        call_command("pronosticar_demanda", stdout=StringIO())
+        self.assertEqual(list(Pronostico.objects.values_list("producto", flat=True)), [self.cerveza.id])
@@ -0,0 +1,65 @@
+import io
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+
+from inventario import stock_bajo
+from inventario.importacion import importar_csv
+from inventario.models import Producto
+from ventas.anulacion import anular_ventas
+from ventas.checkout import registrar_venta
+
+
+class StockBajoTests(TestCase):
+    def setUp(self):
+        stock_bajo._limpiar()
+        self.producto = Producto.objects.create(
+            sku="SB-1", nombre="Pisco", precio_unitario=Decimal("5000"), stock=10, stock_minimo=5
+        )
+
+    def bajos(self):
+        return set(stock_bajo.productos().values_list("sku", flat=True))
+
+    def test_la_bd_mantiene_el_campo(self):
+        self.assertEqual(self.bajos(), set())
+
+        # UN UPDATE DIRECTO TAMBIÉN LO RECALCULA
+        Producto.objects.filter(id=self.producto.id).update(stock=5)
+        self.assertEqual(self.bajos(), {"SB-1"})
+
+        Producto.objects.filter(id=self.producto.id).update(activo=False)
+        self.assertEqual(self.bajos(), set())
+
+    def test_venta_y_anulacion(self):
+        self.assertEqual(stock_bajo.total(), 0)
+
+        venta = registrar_venta([{"id": self.producto.id, "cantidad": 6}])
+        self.assertEqual(stock_bajo.total(), 1)
+
+        anular_ventas([venta.id])
+        self.assertEqual(stock_bajo.total(), 0)
+
+    def test_importacion(self):
+        importar_csv(io.BytesIO(
+            b"sku,nombre,categoria,precio_unitario,stock,stock_minimo,activo\n"
+            b"SB-1,Pisco,,5000,2,5,1\n"
+            b"SB-2,Ron,,5000,0,1,1\n"
+        ))
+        self.assertEqual(self.bajos(), {"SB-1", "SB-2"})
+        self.assertEqual(stock_bajo.total(), 2)
+
+    def test_total_en_cache(self):
+        stock_bajo.total()
+        with self.assertNumQueries(0):
+            self.assertEqual(stock_bajo.total(), 0)
+
+    def test_portada_y_menu(self):
+        Producto.objects.filter(id=self.producto.id).update(stock=1)
+        stock_bajo.invalidar()
+
+        r = self.client.get(reverse("landing"))
+        self.assertContains(r, "1 producto con stock bajo")
+
+        with self.assertNumQueries(0):
+            stock_bajo.total()
@@ -9,6 +9,8 @@ urlpatterns = [
     path("<int:pk>/editar/", views.editar, name="editar"),
     path("<int:pk>/eliminar/", views.eliminar, name="eliminar"),
     path("importar/", views.importar, name="importar"),
+    path("importar/<int:pk>/", views.importacion, name="importacion"),
+    path("importar/<int:pk>/estado/", views.importacion_estado, name="importacion_estado"),
     path("plantilla.csv", views.plantilla_csv, name="plantilla"),
     path("categorias/", views.categorias_lista, name="categorias_lista"),
     path("categorias/crear/", views.categorias_crear, name="categorias_crear"),
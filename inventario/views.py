@@ -1,15 +1,17 @@
 import csv
-import io
 from decimal import Decimal, InvalidOperation
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.db.models import Q
 from django.db.models.deletion import ProtectedError
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
-from .models import Categoria, Producto
+from .alertas import evaluar_alertas
+from .busqueda import buscar
+from .importacion import encolar
+from .models import Categoria, Importacion, Producto
 
 
 def to_decimal(val):
@@ -38,8 +40,10 @@ def lista(request):
     categorias = Categoria.objects.all().order_by("nombre")
 
     # FILTROS DEL GET
+    q = request.GET.get("q", "").strip()
     categoria_id = request.GET.get("categoria", "todas")
     estado = request.GET.get("estado", "todos")
+    clase = request.GET.get("clase", "")
 
     # FILTRO X CATEGORIA
     if categoria_id and categoria_id != "todas":
@@ -50,12 +54,26 @@ def lista(request):
         productos = productos.filter(activo=True)
     elif estado == "inactivos":
         productos = productos.filter(activo=False)
+    elif estado == "stock_bajo":
+        productos = productos.filter(stock_bajo=True)
+
+    # FILTRO X CLASE ABC (POR VENTAS)
+    if clase in dict(Producto.CLASES_ABC):
+        productos = productos.filter(clase_abc=clase)
+    else:
+        clase = ""
+
+    # BUSCADOR X NOMBRE O SKU
+    if q:
+        productos = buscar(productos, q)
 
     contexto = {
         "productos": productos,
         "categorias": categorias,
         "categoria_seleccionada": categoria_id,
         "estado_seleccionado": estado,
+        "clases_abc": Producto.CLASES_ABC,
+        "clase_seleccionada": clase,
     }
     return render(request, "inventario/lista.html", contexto)
 
@@ -103,7 +121,7 @@ def crear(request):
             )
 
         # CREAR PRODUCTO
-        Producto.objects.create(
+        p = Producto.objects.create(
             sku=sku,
             nombre=nombre,
             categoria=categoria,
@@ -112,6 +130,7 @@ def crear(request):
             stock_minimo=stock_minimo,
             activo=True,
         )
+        evaluar_alertas([p.pk])
         messages.success(request, "Producto creado correctamente.")
         return redirect("inventario:lista")
 
@@ -176,6 +195,7 @@ def editar(request, pk):
         p.stock_minimo = stock_minimo
         p.activo = activo
         p.save()
+        evaluar_alertas([p.pk])
 
         messages.success(request, "Producto actualizado correctamente.")
         return redirect("inventario:lista")
@@ -206,6 +226,9 @@ def eliminar(request, pk):
 
 #ESTO ES PA RECIBIR LOS CSV
 
+MAX_ERRORES_VISIBLES = 200
+
+
 @login_required
 def plantilla_csv(request):
     headers = ["sku", "nombre", "categoria", "precio_unitario", "stock", "stock_minimo", "activo"]
@@ -218,51 +241,47 @@ def plantilla_csv(request):
 
 @login_required
 def importar(request):
+    """
+    Guarda el CSV y crea una Importacion; el archivo se procesa en segundo
+    plano y la página consulta el progreso a importacion_estado.
+    """
     if request.method == "POST" and request.FILES.get("archivo"):
-        content = request.FILES["archivo"].read().decode("utf-8")
-        reader = csv.DictReader(io.StringIO(content))
-        creados, actualizados = 0, 0
-
-        for row in reader:
-            sku = (row.get("sku") or "").strip()
-            if not sku:
-                continue
-
-            nombre = (row.get("nombre") or "").strip()
-            cat_nombre = (row.get("categoria") or "").strip()
-
-            categoria = None
-            if cat_nombre:
-                categoria, _ = Categoria.objects.get_or_create(nombre=cat_nombre)
-
-            precio = to_decimal(row.get("precio_unitario"))
-            stock = int(row.get("stock") or 0)
-            stock_minimo = int(row.get("stock_minimo") or 0)
-            activo = str(row.get("activo", "1")).lower() in ["1", "true", "sí", "si", "y", "yes"]
-
-            obj, created = Producto.objects.update_or_create(
-                sku=sku,
-                defaults={
-                    "nombre": nombre,
-                    "categoria": categoria,
-                    "precio_unitario": precio,
-                    "stock": stock,
-                    "stock_minimo": stock_minimo,
-                    "activo": activo,
-                },
-            )
-            if created:
-                creados += 1
-            else:
-                actualizados += 1
-
-        messages.success(
-            request,
-            f"Importación OK. Creados: {creados}, Actualizados: {actualizados}",
+        importacion = Importacion.objects.create(
+            archivo=request.FILES["archivo"],
+            usuario=request.user,
         )
-        return redirect("inventario:lista")
+        encolar(importacion)
+        return redirect("inventario:importacion", pk=importacion.pk)
 
-    return render(request, "inventario/importar.html")
+    return render(request, "inventario/importar.html", {
+        "recientes": Importacion.objects.all()[:5],
+    })
+
+
+@login_required
+def importacion(request, pk):
+    return render(request, "inventario/importar.html", {
+        "importacion": get_object_or_404(Importacion, pk=pk),
+        "recientes": Importacion.objects.all()[:5],
+    })
+
+
+@login_required
+def importacion_estado(request, pk):
+    imp = get_object_or_404(Importacion, pk=pk)
+    return JsonResponse({
+        "id": imp.id,
+        "estado": imp.estado,
+        "mensaje": imp.mensaje,
+        "total_filas": imp.total_filas,
+        "filas_procesadas": imp.filas_procesadas,
+        "porcentaje": imp.porcentaje,
+        "creados": imp.creados,
+        "actualizados": imp.actualizados,
+        "total_errores": imp.total_errores,
+        "errores": imp.errores[:MAX_ERRORES_VISIBLES],
+        "terminada": imp.estado in ("TERMINADA", "FALLIDA"),
+    })
 # GESTION DE LAS CATEGORIAS
 
 @login_required
@@ -0,0 +1,129 @@
+"""
+Exportaciones CSV en streaming.
+
+Las filas se leen con .iterator(chunk_size=...) (cursor del servidor en
+PostgreSQL) y se escriben a medida que se generan: la descarga parte de
+inmediato y la memoria no crece con el rango pedido.
+"""
+import csv
+
+from django.contrib.auth.decorators import login_required
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from inventario.importacion import COLUMNAS
+from inventario.models import Producto
+from ventas.models import VentaItem
+from ventas.periodos import filtro_dias, leer_rango
+
+from .views import duenio_required
+
+FILAS_POR_LECTURA = 2000
+LINEAS_POR_TROZO = 500
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: devuelve la línea en vez de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+def respuesta_csv(encabezado, filas, nombre):
+    writer = csv.writer(_Eco())
+
+    def generar():
+        # BOM: EXCEL ABRE BIEN LAS TILDES; EL IMPORTADOR LO IGNORA
+        yield "\ufeff" + writer.writerow(encabezado)
+        # SE ENVÍAN VARIAS LÍNEAS POR TROZO, NO UNA ESCRITURA POR FILA
+        trozo = []
+        for fila in filas:
+            trozo.append(writer.writerow(fila))
+            if len(trozo) >= LINEAS_POR_TROZO:
+                yield "".join(trozo)
+                trozo.clear()
+        if trozo:
+            yield "".join(trozo)
+
+    response = StreamingHttpResponse(generar(), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{nombre}"'
+    return response
+
+
+@login_required
+@duenio_required
+def ventas_csv(request):
+    """
+    Una fila por ítem vendido, con producto, categoría, trabajador y turno.
+    Mismo rango desde/hasta que el módulo de análisis; ?estado= opcional.
+    """
+    desde, hasta = leer_rango(request.GET, dias=30)
+
+    items = VentaItem.objects.filter(filtro_dias(desde, hasta, campo="venta__fecha"))
+    estado = request.GET.get("estado")
+    if estado:
+        items = items.filter(venta__estado=estado)
+
+    filas = (
+        items.order_by("venta__fecha", "venta_id", "id")
+        .values_list(
+            "venta_id", "venta__fecha", "venta__estado",
+            "venta__trabajador__nombre", "venta__turno__turno_tipo",
+            "producto__sku", "producto__nombre", "producto__categoria__nombre",
+            "cantidad", "precio_unitario", "subtotal", "venta__total",
+        )
+        .iterator(chunk_size=FILAS_POR_LECTURA)
+    )
+
+    def formatear():
+        for venta_id, fecha, *resto in filas:
+            yield [venta_id, timezone.localtime(fecha).strftime("%Y-%m-%d %H:%M:%S"), *resto]
+
+    return respuesta_csv(
+        [
+            "venta", "fecha", "estado", "trabajador", "turno",
+            "sku", "producto", "categoria", "cantidad", "precio_unitario",
+            "subtotal", "total_venta",
+        ],
+        formatear(),
+        f"ventas_{desde:%Y%m%d}_{hasta:%Y%m%d}.csv",
+    )
+
+
+@login_required
+@duenio_required
+def inventario_csv(request):
+    """
+    Inventario actual. Las primeras columnas son las de la plantilla de
+    importación, así el archivo se puede editar y volver a subir.
+    Con ?clase=A|B|C sirve de hoja de conteo para la toma de inventario de
+    esa clase: se anota el stock contado y se importa.
+    """
+    productos = Producto.objects.all()
+    clase = request.GET.get("clase", "")
+    if clase in dict(Producto.CLASES_ABC):
+        productos = productos.filter(clase_abc=clase)
+    else:
+        clase = ""
+
+    filas = (
+        productos.order_by("nombre", "id")
+        .values_list(
+            "sku", "nombre", "categoria__nombre", "precio_unitario", "stock",
+            "stock_minimo", "activo", "costo", "bloqueado", "proveedor__nombre",
+        )
+        .iterator(chunk_size=FILAS_POR_LECTURA)
+    )
+
+    def formatear():
+        for sku, nombre, categoria, precio, stock, minimo, activo, costo, bloqueado, proveedor in filas:
+            yield [
+                sku, nombre, categoria or "", precio, stock, minimo, int(activo),
+                costo, int(bloqueado), proveedor or "",
+            ]
+
+    return respuesta_csv(
+        COLUMNAS + ["costo", "bloqueado", "proveedor"],
+        formatear(),
+        f"inventario{'_clase_' + clase if clase else ''}_{timezone.localdate():%Y%m%d}.csv",
+    )
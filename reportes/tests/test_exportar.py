@@ -0,0 +1,83 @@
+import csv
+import io
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from inventario.models import Categoria, Producto
+from ventas.checkout import registrar_venta
+from ventas.models import Trabajador, Turno, Venta
+
+
+def leer(response):
+    contenido = b"".join(response.streaming_content).decode("utf-8-sig")
+    return list(csv.DictReader(io.StringIO(contenido)))
+
+
+class ExportarTests(TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_superuser("duenio", password="x"))
+        cervezas = Categoria.objects.create(nombre="Cervezas")
+        self.cerveza = Producto.objects.create(
+            sku="C-1", nombre="Cerveza Añeja", categoria=cervezas,
+            precio_unitario=Decimal("1000"), stock=100,
+        )
+        self.ana = Trabajador.objects.create(nombre="Ana")
+        self.turno = Turno.objects.create(trabajador=self.ana, turno_tipo="NOCHE")
+
+    def vender(self, cantidad=1, hace_dias=0):
+        venta = registrar_venta(
+            [{"id": self.cerveza.id, "cantidad": cantidad}], trabajador=self.ana, turno=self.turno
+        )
+        if hace_dias:
+            Venta.objects.filter(id=venta.id).update(fecha=timezone.now() - timedelta(days=hace_dias))
+        return venta
+
+    def test_ventas_del_rango(self):
+        self.vender(2)
+        self.vender(5, hace_dias=60)
+
+        hoy = timezone.localdate()
+        r = self.client.get(reverse("reportes:exportar_ventas"), {"desde": hoy, "hasta": hoy})
+        self.assertTrue(r.streaming)
+        self.assertIn(f"ventas_{hoy:%Y%m%d}", r["Content-Disposition"])
+
+        filas = leer(r)
+        self.assertEqual(len(filas), 1)
+        self.assertEqual(filas[0]["producto"], "Cerveza Añeja")
+        self.assertEqual(filas[0]["categoria"], "Cervezas")
+        self.assertEqual((filas[0]["trabajador"], filas[0]["turno"]), ("Ana", "NOCHE"))
+        self.assertEqual(filas[0]["cantidad"], "2")
+        self.assertEqual(datetime.fromisoformat(filas[0]["fecha"]).date(), hoy)
+
+    def test_una_consulta_sin_importar_las_filas(self):
+        def contar(n):
+            for _ in range(n):
+                self.vender()
+            with CaptureQueriesContext(connection) as ctx:
+                leer(self.client.get(reverse("reportes:exportar_ventas")))
+            return len(ctx.captured_queries)
+
+        self.assertEqual(contar(1), contar(30))
+
+    def test_inventario_se_puede_reimportar(self):
+        from inventario.importacion import importar_csv
+
+        r = self.client.get(reverse("reportes:exportar_inventario"))
+        filas = leer(r)
+        self.assertEqual(filas[0]["sku"], "C-1")
+        self.assertEqual(filas[0]["activo"], "1")
+
+        contenido = b"".join(self.client.get(reverse("reportes:exportar_inventario")).streaming_content)
+        resultado = importar_csv(io.BytesIO(contenido))
+        self.assertEqual((resultado["actualizados"], resultado["errores"]), (1, []))
+
+    def test_solo_duenio(self):
+        self.client.force_login(get_user_model().objects.create_user("caja", password="x"))
+        self.assertEqual(self.client.get(reverse("reportes:exportar_inventario")).status_code, 403)
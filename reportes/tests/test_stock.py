@@ -0,0 +1,74 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from inventario.models import Categoria, Producto
+from reportes.views import ESTADO_STOCK, PRODUCTOS_POR_PAGINA
+
+
+class EstadoStockTests(TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_superuser("duenio", password="x"))
+        self.cervezas = Categoria.objects.create(nombre="Cervezas")
+        self.vinos = Categoria.objects.create(nombre="Vinos")
+
+    def crear(self, sku, stock, minimo, categoria=None, activo=True):
+        return Producto.objects.create(
+            sku=sku, nombre=sku, precio_unitario=Decimal("1000"),
+            stock=stock, stock_minimo=minimo, categoria=categoria, activo=activo,
+        )
+
+    def test_clasificacion_en_la_bd(self):
+        casos = {
+            "A": (4, 4, "BAJO"),
+            "B": (6, 4, "MEDIO"),   # JUSTO 1,5 VECES EL MÍNIMO
+            "C": (7, 4, "ALTO"),
+            "D": (8, 5, "ALTO"),    # 8 > 7,5
+            "E": (7, 5, "MEDIO"),
+            "F": (0, 0, "BAJO"),
+        }
+        for sku, (stock, minimo, _) in casos.items():
+            self.crear(sku, stock, minimo)
+
+        estados = dict(Producto.objects.annotate(estado=ESTADO_STOCK).values_list("sku", "estado"))
+        self.assertEqual(estados, {sku: estado for sku, (_, _, estado) in casos.items()})
+
+    def test_filtros_conteos_y_paginas(self):
+        for i in range(PRODUCTOS_POR_PAGINA + 5):
+            self.crear(f"ALTO-{i:02}", 100, 5, self.cervezas)
+        self.crear("BAJO-1", 1, 5, self.vinos)
+        self.crear("BAJO-2", 0, 5, self.cervezas)
+        self.crear("INACTIVO", 0, 5, self.cervezas, activo=False)
+
+        r = self.client.get(reverse("reportes:index"))
+        self.assertEqual(r.context["total_activos"], PRODUCTOS_POR_PAGINA + 7)
+        self.assertEqual(
+            r.context["estados_stock"],
+            [("BAJO", "Bajo", 2), ("MEDIO", "Medio", 0), ("ALTO", "Alto", PRODUCTOS_POR_PAGINA + 5)],
+        )
+        self.assertEqual(len(r.context["pagina"]), PRODUCTOS_POR_PAGINA)
+        self.assertEqual(r.context["pagina"].paginator.num_pages, 2)
+
+        r = self.client.get(reverse("reportes:index"), {"estado": "BAJO"})
+        self.assertEqual([p.sku for p in r.context["pagina"]], ["BAJO-1", "BAJO-2"])
+
+        r = self.client.get(reverse("reportes:index"), {"estado": "BAJO", "categoria": self.vinos.id})
+        self.assertEqual([p.sku for p in r.context["pagina"]], ["BAJO-1"])
+
+        r = self.client.get(reverse("reportes:index"), {"estado": "ALTO", "pagina": 2})
+        self.assertEqual(len(r.context["pagina"]), 5)
+        self.assertContains(r, "?estado=ALTO&pagina=1#stock")
+
+    def test_consultas_no_crecen_con_el_catalogo(self):
+        def contar(n):
+            for i in range(n):
+                self.crear(f"P-{n}-{i}", i, 5, self.cervezas)
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(reverse("reportes:index"))
+            return len(ctx.captured_queries)
+
+        self.assertEqual(contar(3), contar(60))
@@ -1,5 +1,10 @@
 from django.urls import path
-from . import views
+from . import exportar, views
 
 app_name = "reportes"
-urlpatterns = [ path("", views.index, name="index"), ]
+urlpatterns = [
+    path("", views.index, name="index"),
+    path("abc/", views.clasificacion_abc, name="abc"),
+    path("exportar/ventas.csv", exportar.ventas_csv, name="exportar_ventas"),
+    path("exportar/inventario.csv", exportar.inventario_csv, name="exportar_inventario"),
+]
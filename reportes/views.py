@@ -1,13 +1,35 @@
-from datetime import timedelta, date
+from datetime import timedelta
 
+import numpy as np
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
 from django.http import HttpResponseForbidden
-from django.shortcuts import render
+from django.shortcuts import redirect, render
 from django.utils import timezone
-from django.db.models import Sum, F, Q, DecimalField, ExpressionWrapper
+from django.db.models import Case, CharField, Count, F, Sum, Value, When
+from django.db.models.lookups import LessThanOrEqual
 
-from inventario.models import Producto, AlertaStock
-from ventas.models import Venta, VentaItem
+from inventario import abc, stock_bajo
+from inventario.models import Categoria, Producto, AlertaStock, Pronostico
+from ventas.models import ResumenDiario, ResumenDiarioProducto
+from ventas.periodos import leer_fecha, leer_rango
+
+
+PRODUCTOS_POR_PAGINA = 25
+FILAS_ABC_POR_PAGINA = 50
+SUGERENCIAS_VISIBLES = 20
+
+ESTADOS_STOCK = [("BAJO", "Bajo"), ("MEDIO", "Medio"), ("ALTO", "Alto")]
+
+# BAJO: HASTA EL MÍNIMO; MEDIO: HASTA 1,5 VECES EL MÍNIMO (stock * 2 <= mínimo * 3,
+# EN ENTEROS PARA QUE SQLITE Y POSTGRESQL REDONDEEN IGUAL); ALTO: EL RESTO
+ESTADO_STOCK = Case(
+    When(stock__lte=F("stock_minimo"), then=Value("BAJO")),
+    When(LessThanOrEqual(F("stock") * 2, F("stock_minimo") * 3), then=Value("MEDIO")),
+    default=Value("ALTO"),
+    output_field=CharField(),
+)
 
 
 def duenio_required(view_func):
@@ -25,90 +47,75 @@ def index(request):
     Dashboard de reportes principales del negocio.
     """
 
-    hoy = timezone.now().date()
+    hoy = timezone.localdate()
     hace_30 = hoy - timedelta(days=30)
 
-    #ESTADO DE STOCK GENERAL
-    productos = Producto.objects.filter(activo=True).order_by("nombre")
-
-    def estado_stock(p):
-        if p.stock <= p.stock_minimo:
-            return "BAJO"
-        if p.stock <= p.stock_minimo * 1.5:
-            return "MEDIO"
-        return "ALTO"
-
-    listado = [
-        {
-            "producto": p,
-            "estado": estado_stock(p),
-        }
-        for p in productos
-    ]
+    #ESTADO DE STOCK GENERAL (CLASIFICADO EN LA BD)
+    productos = Producto.objects.filter(activo=True).annotate(estado=ESTADO_STOCK)
 
-    #VENTAS ÚLTIMOS 30 DÍAS
-    ventas_30 = (
-        Venta.objects
-        .filter(
-            fecha__date__gte=hace_30,
-            fecha__date__lte=hoy,
-        )
-        .exclude(estado__iexact="ANULADA")
+    # CONTEO POR ESTADO EN UNA SOLA CONSULTA AGRUPADA
+    conteo_estados = dict(
+        productos.order_by().values_list("estado").annotate(n=Count("id"))
     )
-
-    total_vendido_30 = ventas_30.aggregate(total=Sum("total"))["total"] or 0
+    total_activos = sum(conteo_estados.values())
+
+    estado = request.GET.get("estado", "")
+    if estado in dict(ESTADOS_STOCK):
+        productos = productos.filter(estado=estado)
+    else:
+        estado = ""
+
+    categoria = request.GET.get("categoria", "")
+    if categoria.isdigit():
+        productos = productos.filter(categoria_id=int(categoria))
+    else:
+        categoria = ""
+
+    clase = request.GET.get("clase", "")
+    if clase in dict(Producto.CLASES_ABC):
+        productos = productos.filter(clase_abc=clase)
+    else:
+        clase = ""
+
+    pagina = Paginator(
+        productos.select_related("categoria").order_by("nombre", "id"),
+        PRODUCTOS_POR_PAGINA,
+    ).get_page(request.GET.get("pagina"))
+
+    # PARÁMETROS ACTUALES SIN LA PÁGINA, PARA LOS ENLACES DEL PAGINADOR
+    parametros = request.GET.copy()
+    parametros.pop("pagina", None)
+
+    #VENTAS ÚLTIMOS 30 DÍAS (RESÚMENES DIARIOS)
+    resumen_30 = ResumenDiario.objects.filter(fecha__gte=hace_30, fecha__lte=hoy)
+    productos_30 = ResumenDiarioProducto.objects.filter(fecha__gte=hace_30, fecha__lte=hoy)
+
+    totales_30 = resumen_30.aggregate(total=Sum("total"), ganancia=Sum("margen"))
+    total_vendido_30 = totales_30["total"] or 0
 
     # COSTOS Y PRECIOS
-    margen_expr = ExpressionWrapper(
-        F("cantidad") * (F("precio_unitario") - F("producto__costo")),
-        output_field=DecimalField(max_digits=12, decimal_places=2),
-    )
-
-    margen_30 = (
-        VentaItem.objects.filter(venta__in=ventas_30)
-        .aggregate(ganancia=Sum(margen_expr))
-        .get("ganancia")
-        or 0
-    )
+    margen_30 = totales_30["ganancia"] or 0
 
     # TOP 10 PRODUCTOS X 30 DIAS
     top = (
-        VentaItem.objects.filter(venta__in=ventas_30)
+        productos_30
         .values("producto__nombre")
         .annotate(
             cantidad_total=Sum("cantidad"),
-            monto_total=Sum("subtotal"),
+            monto_total=Sum("monto"),
         )
+        .filter(cantidad_total__gt=0)
         .order_by("-cantidad_total")[:10]
     )
 
     #PRODUCTOS CON STOCK CRÍTICO
-    criticos = (
-        Producto.objects.filter(
-            activo=True,
-            stock__lte=F("stock_minimo"),
-            stock_minimo__gt=0,
-        )
-        .order_by("stock")
-    )
+    criticos = stock_bajo.productos().order_by("stock")
 
-    #SUGERENCIAS DE COMPRA
-    sugerencias = (
-        Producto.objects.filter(
-            activo=True,
-            stock__lte=F("stock_minimo"),
-            stock_minimo__gt=0,
-        )
-        .annotate(
-            vendido_30=Sum(
-                "ventaitem__cantidad",
-                filter=Q(
-                    ventaitem__venta__fecha__date__gte=hace_30,
-                )
-                & ~Q(ventaitem__venta__estado__iexact="ANULADA"),
-            )
-        )
-        .order_by("-vendido_30")
+    #SUGERENCIAS DE COMPRA (PRONÓSTICO NOCTURNO: manage.py pronosticar_demanda)
+    sugerencias = list(
+        Pronostico.objects.filter(cantidad_sugerida__gt=0)
+        .select_related("producto")
+        .order_by(F("dias_cobertura").asc(nulls_last=True))[:SUGERENCIAS_VISIBLES]
     )
 
     #ALERTAS DE STOCK CRÍTICO NO ATENDIDAS
@@ -121,45 +128,38 @@ def index(request):
     # RANGO PARA EL SELECTOR X 30 DIAS
     inicio_rango = hoy - timedelta(days=29)
 
-    fecha_str = request.GET.get("fecha_ganancia")
-
-    try:
-        if fecha_str:
-            fecha_seleccionada = date.fromisoformat(fecha_str)
-        else:
-            fecha_seleccionada = hoy
-    except ValueError:
-        fecha_seleccionada = hoy
+    fecha_seleccionada = leer_fecha(request.GET.get("fecha_ganancia"), hoy)
 
     # VALIDACION DEL RANGO DE LAS FECHAS
     if fecha_seleccionada < inicio_rango or fecha_seleccionada > hoy:
         fecha_seleccionada = hoy
 
-    # VENTAS X DIA
-    ventas_dia = (
-        Venta.objects
-        .filter(fecha__date=fecha_seleccionada)
-        .exclude(estado__iexact="ANULADA")
-    )
-
-    items_dia = VentaItem.objects.filter(venta__in=ventas_dia)
-
-    margen_dia_expr = ExpressionWrapper(
-        F("cantidad") * (F("precio_unitario") - F("producto__costo")),
-        output_field=DecimalField(max_digits=12, decimal_places=2),
-    )
-
+    # GANANCIA DEL DIA SELECCIONADO
     ganancia_dia = (
-        items_dia.aggregate(ganancia=Sum(margen_dia_expr)).get("ganancia") or 0
+        ResumenDiario.objects.filter(fecha=fecha_seleccionada)
+        .values_list("margen", flat=True)
+        .first()
+        or 0
     )
 
     contexto = {
-        "listado": listado,
+        "pagina": pagina,
+        "estados_stock": [
+            (valor, nombre, conteo_estados.get(valor, 0)) for valor, nombre in ESTADOS_STOCK
+        ],
+        "total_activos": total_activos,
+        "estado_stock": estado,
+        "categorias": Categoria.objects.order_by("nombre"),
+        "categoria_stock": categoria,
+        "clases_abc": Producto.CLASES_ABC,
+        "clase_stock": clase,
+        "parametros": parametros.urlencode(),
         "total_vendido_30": total_vendido_30,
         "margen_30": margen_30,
         "top_productos": top,
         "criticos": criticos,
         "sugerencias": sugerencias,
+        "pronostico_calculado_en": sugerencias[0].calculado_en if sugerencias else None,
         "alertas": alertas,
         "desde": hace_30,
         "hasta": hoy,
@@ -170,3 +170,77 @@ def index(request):
     }
 
     return render(request, "reportes/index.html", contexto)
+
+
+@login_required
+@duenio_required
+def clasificacion_abc(request):
+    """
+    Ranking ABC (Pareto) de los productos activos por ventas o por margen
+    en el rango elegido. Con POST se guarda esa clasificación en los
+    productos (la misma que deja cada noche manage.py clasificar_abc).
+    """
+    params = request.POST if request.method == "POST" else request.GET
+    if params.get("desde") or params.get("hasta"):
+        desde, hasta = leer_rango(params, dias=abc.DIAS_ABC)
+    else:
+        # LA MISMA VENTANA QUE manage.py clasificar_abc (DÍAS CERRADOS)
+        desde, hasta = abc.ventana()
+
+    if request.method == "POST":
+        productos, cambiados = abc.clasificar(desde, hasta)
+        messages.success(
+            request, f"Clasificación guardada: {productos} productos, {cambiados} cambiaron de clase."
+        )
+        return redirect(f"{request.path}?desde={desde:%Y-%m-%d}&hasta={hasta:%Y-%m-%d}")
+
+    criterio = "margen" if request.GET.get("criterio") == "margen" else "ventas"
+    r = abc.calcular(desde, hasta)
+    sufijo = "_margen" if criterio == "margen" else ""
+    valores = r["margen"] if criterio == "margen" else r["monto"]
+    clase = r["clase" + sufijo]
+    participacion = r["participacion" + sufijo]
+
+    # RESUMEN POR CLASE: PRODUCTOS Y PARTICIPACIÓN
+    resumen = [
+        {
+            "clase": c,
+            "productos": int((clase == c).sum()),
+            "participacion": float(participacion[clase == c].sum()) * 100,
+            "guardados": sum(1 for g in r["guardada" + sufijo] if g == c),
+        }
+        for c, _ in Producto.CLASES_ABC
+    ]
+
+    # SOLO SE CARGAN LOS PRODUCTOS DE LA PÁGINA
+    orden = np.argsort(-valores, kind="stable").tolist()
+    pagina = Paginator(orden, FILAS_ABC_POR_PAGINA).get_page(request.GET.get("pagina"))
+    productos = Producto.objects.select_related("categoria").in_bulk([r["ids"][i] for i in pagina])
+    filas = [
+        {
+            "posicion": pagina.start_index() + n,
+            "producto": productos[r["ids"][i]],
+            "monto": r["monto"][i],
+            "margen": r["margen"][i],
+            "participacion": participacion[i] * 100,
+            "acumulado": r["acumulado" + sufijo][i] * 100,
+            "clase": clase[i],
+            "guardada": r["guardada" + sufijo][i],
+        }
+        for n, i in enumerate(pagina)
+    ]
+
+    parametros = request.GET.copy()
+    parametros.pop("pagina", None)
+
+    return render(request, "reportes/abc.html", {
+        "desde": desde,
+        "hasta": hasta,
+        "criterio": criterio,
+        "resumen": resumen,
+        "pagina": pagina,
+        "filas": filas,
+        "parametros": parametros.urlencode(),
+        "corte_a": int(abc.CORTE_A * 100),
+        "corte_b": int(abc.CORTE_B * 100),
+    })
@@ -1,20 +1,35 @@
-from django.contrib import admin
-from .models import Venta, VentaItem
+from django.contrib import admin, messages
+
+from .anulacion import anular_ventas
+from .models import CierreTurno, ParCompra, Venta, VentaItem
 
 
 class VentaItemInline(admin.TabularInline):
     model = VentaItem
     extra = 0
-    readonly_fields = ("producto", "cantidad", "precio_unitario", "subtotal")
+    readonly_fields = ("producto", "cantidad", "precio_unitario", "costo_unitario", "subtotal")
 
 
 @admin.register(Venta)
 class VentaAdmin(admin.ModelAdmin):
-    list_display = ("id", "fecha", "usuario", "total", "estado")
-    list_filter = ("estado", "fecha")
+    list_display = ("id", "fecha", "usuario", "trabajador", "turno", "total", "estado")
+    list_filter = ("estado", "fecha", "trabajador", "turno")
     search_fields = ("usuario__username",)
-    readonly_fields = ("fecha", "usuario", "total", "estado")
+    readonly_fields = ("fecha", "usuario", "total", "estado", "clave_idempotencia")
+    list_select_related = ("usuario", "trabajador", "turno__trabajador")
     inlines = [VentaItemInline]
+    actions = ["anular_seleccionadas"]
+
+    @admin.action(description="Anular ventas seleccionadas (devuelve el stock)")
+    def anular_seleccionadas(self, request, queryset):
+        anuladas = anular_ventas(
+            queryset.values_list("id", flat=True),
+            usuario=request.user,
+            motivo="Anulación masiva desde el admin",
+        )
+        self.message_user(
+            request, f"Ventas anuladas: {len(anuladas)}.", messages.SUCCESS
+        )
 
 
 @admin.register(VentaItem)
@@ -22,3 +37,18 @@ class VentaItemAdmin(admin.ModelAdmin):
     list_display = ("id", "venta", "producto", "cantidad", "precio_unitario", "subtotal")
     list_filter = ("producto",)
     search_fields = ("producto__nombre",)
+
+
+@admin.register(CierreTurno)
+class CierreTurnoAdmin(admin.ModelAdmin):
+    list_display = ("turno", "ventas", "total", "anuladas", "unidades", "margen", "creado_en")
+    list_select_related = ("turno__trabajador",)
+    readonly_fields = ("creado_en",)
+
+
+@admin.register(ParCompra)
+class ParCompraAdmin(admin.ModelAdmin):
+    list_display = ("producto", "acompanante", "ventas")
+    list_select_related = ("producto", "acompanante")
+    search_fields = ("producto__nombre", "acompanante__nombre")
+    ordering = ("-ventas",)
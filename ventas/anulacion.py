@@ -0,0 +1,104 @@
+"""
+Anulación de ventas por conjuntos.
+
+Devolver el stock con producto.save() por ítem lee el stock, lo suma en
+Python y escribe la fila completa: si otra caja vendió entre la lectura y
+la escritura, esa venta se pierde. Aquí el stock vuelve con un solo
+UPDATE ... SET stock = stock + n (agrupado por producto), sin leerlo.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, When
+from django.utils import timezone
+
+from inventario.alertas import evaluar_alertas
+from inventario.models import Producto
+
+from . import mapa_horario
+from .canasta import acumular_pares
+from .cierres import recalcular_cierres
+from .models import Venta, VentaItem
+from .resumenes import acumular_ventas
+
+
+def reponer_stock(cantidades):
+    """
+    Suma {producto_id: cantidad} al stock en un UPDATE, con F() para no
+    pisar cambios concurrentes, y cierra las alertas de los productos que
+    vuelven sobre el mínimo.
+    """
+    if not cantidades:
+        return
+    Producto.objects.filter(id__in=list(cantidades)).update(
+        stock=Case(
+            *[When(id=pid, then=F("stock") + cant) for pid, cant in cantidades.items()],
+            default=F("stock"),
+            output_field=IntegerField(),
+        ),
+        actualizado_en=timezone.now(),
+    )
+    evaluar_alertas(list(cantidades))
+
+
+def _items_de(venta_ids):
+    return list(
+        VentaItem.objects.filter(venta_id__in=venta_ids)
+    )
+
+
+@transaction.atomic
+def anular_ventas(venta_ids, usuario=None, motivo=""):
+    """
+    Anula varias ventas (por ejemplo, todas las de un turno equivocado)
+    con un número fijo de consultas: bloqueo de las ventas, lectura de
+    ítems, un UPDATE de stock, los upserts de resúmenes y un UPDATE de
+    estado. Las ya anuladas se ignoran. Devuelve las ventas anuladas.
+    """
+    ventas = list(
+        Venta.objects.select_for_update()
+        .filter(id__in=list(venta_ids))
+        .exclude(estado="ANULADA")
+        .select_related("turno")
+        .order_by("id")
+    )
+    if not ventas:
+        return []
+
+    ids = [v.id for v in ventas]
+    items = _items_de(ids)
+
+    cantidades = defaultdict(int)
+    for item in items:
+        cantidades[item.producto_id] += item.cantidad
+    reponer_stock(cantidades)
+
+    # SOLO LAS CONFIRMADAS ESTÁN SUMADAS EN LOS RESÚMENES
+    confirmadas = {v.id for v in ventas if v.estado == "CONFIRMADA"}
+    acumular_ventas(
+        [v for v in ventas if v.id in confirmadas],
+        [i for i in items if i.venta_id in confirmadas],
+        signo=-1,
+    )
+    acumular_pares(sorted(confirmadas), signo=-1)
+
+    ahora = timezone.now()
+    Venta.objects.filter(id__in=ids).update(
+        estado="ANULADA",
+        motivo_anulacion=motivo,
+        anulada_en=ahora,
+        anulada_por=usuario,
+    )
+    # LOS TURNOS YA CERRADOS QUEDAN CON SU CIERRE AL DÍA
+    recalcular_cierres({v.turno_id for v in ventas if v.turno_id})
+
+    dias = {timezone.localdate(v.fecha) for v in ventas}
+    mapa_horario.invalidar(dias)
+    transaction.on_commit(lambda: mapa_horario.invalidar(dias))
+
+    for venta in ventas:
+        venta.estado = "ANULADA"
+        venta.motivo_anulacion = motivo
+        venta.anulada_en = ahora
+        venta.anulada_por = usuario
+    return ventas
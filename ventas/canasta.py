@@ -0,0 +1,125 @@
+"""
+Pares de productos comprados juntos ("quienes llevan Pisco también llevan
+Coca-Cola 1.5L").
+
+ParCompra cuenta, por cada par ordenado de productos distintos, en cuántas
+ventas confirmadas aparecieron juntos. acumular_pares() suma (al confirmar)
+o resta (al anular) con un solo INSERT ... SELECT ... ON CONFLICT que cruza
+los ítems de esas ventas en la BD: una consulta aunque el carrito tenga
+muchos productos (los pares crecen con el cuadrado). Las sugerencias solo
+leen esta tabla por su índice; nunca se cruzan los VentaItem en la petición.
+"""
+from django.apps import apps as global_apps
+from django.db import connection, transaction
+from django.db.models import Sum
+
+SUGERENCIAS_MAX = 10
+
+
+def _sql_pares(filtro, signo=1, acumular=False, apps=global_apps):
+    """
+    INSERT de los pares de las ventas que cumplen `filtro` (SQL sobre la
+    tabla de ventas con alias v). Con acumular=True suma a los existentes.
+    """
+    ParCompra = apps.get_model("ventas", "ParCompra")
+    Venta = apps.get_model("ventas", "Venta")
+    VentaItem = apps.get_model("ventas", "VentaItem")
+
+    qn = connection.ops.quote_name
+    par = qn(ParCompra._meta.db_table)
+    item = qn(VentaItem._meta.db_table)
+    venta = qn(Venta._meta.db_table)
+    producto = qn(VentaItem._meta.get_field("producto").column)
+    venta_id = qn(VentaItem._meta.get_field("venta").column)
+    columnas = [
+        qn(ParCompra._meta.get_field(c).column) for c in ("producto", "acompanante", "ventas")
+    ]
+
+    sql = (
+        f"INSERT INTO {par} ({', '.join(columnas)}) "
+        f"SELECT a.{producto}, b.{producto}, {int(signo)} * COUNT(DISTINCT a.{venta_id}) "
+        f"FROM {item} a "
+        f"INNER JOIN {item} b ON b.{venta_id} = a.{venta_id} AND b.{producto} <> a.{producto} "
+        f"INNER JOIN {venta} v ON v.{qn('id')} = a.{venta_id} "
+        f"WHERE {filtro} "
+        f"GROUP BY a.{producto}, b.{producto}"
+    )
+    if acumular:
+        sql += (
+            f" ON CONFLICT ({columnas[0]}, {columnas[1]}) "
+            f"DO UPDATE SET {columnas[2]} = {par}.{columnas[2]} + excluded.{columnas[2]}"
+        )
+    return sql
+
+
+def acumular_pares(venta_ids, signo=1):
+    """
+    Suma (signo=1) o resta (signo=-1) los pares de las ventas dadas. Un
+    producto repetido en varias líneas de la misma venta cuenta una vez.
+    Debe llamarse dentro de la transacción que confirma o anula.
+    """
+    venta_ids = list(venta_ids)
+    if not venta_ids:
+        return
+    filtro = f"v.{connection.ops.quote_name('id')} IN ({', '.join(['%s'] * len(venta_ids))})"
+    with connection.cursor() as cursor:
+        cursor.execute(_sql_pares(filtro, signo, acumular=True), venta_ids)
+
+
+def reconstruir(apps=global_apps):
+    """
+    Recalcula toda la tabla desde las ventas confirmadas, en una sola
+    transacción. Devuelve la cantidad de pares guardados.
+
+    Recibe el registro de apps para poder usarse también desde migraciones.
+    """
+    ParCompra = apps.get_model("ventas", "ParCompra")
+
+    with transaction.atomic():
+        ParCompra.objects.all().delete()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                _sql_pares(f"v.{connection.ops.quote_name('estado')} = %s", apps=apps), ["CONFIRMADA"]
+            )
+    return ParCompra.objects.count()
+
+
+def sugerencias(producto_ids, k=5):
+    """
+    Los k productos vendibles que más se compran junto a los del carrito,
+    sin repetir los que ya están. Devuelve dicts con id, sku, nombre,
+    precio, stock y ventas (suma de los pares con cada producto del carrito).
+    """
+    ParCompra = global_apps.get_model("ventas", "ParCompra")
+
+    producto_ids = list(producto_ids)
+    if not producto_ids:
+        return []
+    k = max(1, min(k, SUGERENCIAS_MAX))
+
+    filas = (
+        ParCompra.objects.filter(
+            producto_id__in=producto_ids,
+            ventas__gt=0,
+            acompanante__activo=True,
+            acompanante__bloqueado=False,
+        )
+        .exclude(acompanante_id__in=producto_ids)
+        .values(
+            "acompanante_id", "acompanante__sku", "acompanante__nombre",
+            "acompanante__precio_unitario", "acompanante__stock",
+        )
+        .annotate(veces=Sum("ventas"))
+        .order_by("-veces", "acompanante__nombre")[:k]
+    )
+    return [
+        {
+            "id": f["acompanante_id"],
+            "sku": f["acompanante__sku"],
+            "nombre": f["acompanante__nombre"],
+            "precio": float(f["acompanante__precio_unitario"]),
+            "stock": f["acompanante__stock"],
+            "ventas": f["veces"],
+        }
+        for f in filas
+    ]
@@ -0,0 +1,230 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, IntegerField, Q, When
+from django.utils import timezone
+
+from inventario import cache_sku
+from inventario.alertas import abrir_alertas, es_critico
+from inventario.models import Producto
+from . import mapa_horario
+from .canasta import acumular_pares
+from .models import Venta, VentaItem
+from .resumenes import acumular_venta
+
+
+class VentaError(Exception):
+    """
+    Error de validación de una venta. El mensaje se muestra tal cual al cajero
+    y el código permite a la caja distinguir el motivo (stock, bloqueado, ...).
+    """
+
+    def __init__(self, mensaje, codigo="invalida"):
+        super().__init__(mensaje)
+        self.codigo = codigo
+
+
+def _id_por_sku(sku):
+    datos = cache_sku.obtener(sku)
+    if datos is None:
+        raise VentaError(f"Producto no encontrado: {sku}.", "no_encontrado")
+    return datos["id"]
+
+
+def normalizar_items(items):
+    """
+    Convierte el carrito recibido desde la caja en un dict {producto_id: cantidad},
+    sumando las líneas repetidas del mismo producto.
+
+    Cada ítem trae el "id" del producto o, si viene del lector de códigos,
+    su "sku"; los SKU se resuelven con la caché en memoria.
+    """
+    cantidades = {}
+
+    for it in items:
+        try:
+            if it.get("id") is None and it.get("sku"):
+                prod_id = _id_por_sku(str(it["sku"]))
+            else:
+                prod_id = int(it.get("id"))
+            cant = int(it.get("cantidad", 0))
+        except (AttributeError, TypeError, ValueError):
+            raise VentaError("Ítem inválido.")
+
+        if cant <= 0:
+            raise VentaError("Cantidad inválida.")
+
+        cantidades[prod_id] = cantidades.get(prod_id, 0) + cant
+
+    if not cantidades:
+        raise VentaError("No se enviaron ítems en la venta.")
+
+    return cantidades
+
+
+def validar_productos(productos, cantidades):
+    """
+    Valida en memoria que todos los productos existan, se puedan vender
+    y tengan stock suficiente para la cantidad pedida.
+    """
+    if len(productos) != len(cantidades):
+        raise VentaError("Producto no encontrado.", "no_encontrado")
+
+    for producto in productos:
+        cant = cantidades[producto.id]
+
+        if not producto.activo:
+            raise VentaError(f"El producto {producto.nombre} está inactivo.", "inactivo")
+
+        if producto.bloqueado:
+            raise VentaError(
+                f"El producto {producto.nombre} está bloqueado y no puede venderse.",
+                "bloqueado",
+            )
+
+        if producto.stock < cant:
+            raise VentaError(f"Stock insuficiente para {producto.nombre}.", "stock")
+
+
+def descontar_stock(cantidades):
+    """
+    Descuenta el stock de todos los productos en un solo UPDATE condicional.
+
+    Cada fila solo se actualiza si todavía tiene stock >= cantidad, así que la
+    propia sentencia impide vender de más aunque la base de datos no soporte
+    select_for_update (SQLite). Si alguna fila no calza, se revierte la venta.
+    """
+    condicion = Q()
+    nuevo_stock = []
+
+    for prod_id, cant in cantidades.items():
+        condicion |= Q(id=prod_id, stock__gte=cant)
+        nuevo_stock.append(When(id=prod_id, then=F("stock") - cant))
+
+    actualizados = Producto.objects.filter(condicion).update(
+        stock=Case(*nuevo_stock, default=F("stock"), output_field=IntegerField()),
+        actualizado_en=timezone.now(),
+    )
+
+    if actualizados != len(cantidades):
+        raise VentaError("Stock insuficiente, otro vendedor modificó el inventario.", "stock")
+
+
+def crear_alertas_stock(productos, cantidades):
+    """
+    Abre las alertas de los productos vendidos que quedaron en stock
+    crítico. El stock solo baja en una venta, así que no hay alertas que
+    cerrar; sin productos críticos no se hace ninguna consulta.
+    """
+    abrir_alertas([
+        (p.id, p.stock - cantidades[p.id], p.stock_minimo)
+        for p in productos
+        if es_critico(p.stock - cantidades[p.id], p.stock_minimo)
+    ])
+
+
+def venta_por_clave(clave):
+    """
+    Busca una venta ya registrada con la clave de idempotencia (o None).
+    """
+    if not clave:
+        return None
+    return Venta.objects.filter(clave_idempotencia=clave).first()
+
+
+def registrar_venta(items, usuario=None, trabajador=None, turno=None,
+                    metodo_pago="EFECTIVO", clave=None, fecha=None):
+    """
+    Registra una venta completa con un número fijo de consultas,
+    sin importar cuántas líneas tenga el carrito:
+
+    - un SELECT ordenado de todos los productos del carrito,
+    - un INSERT de la venta con su total ya calculado,
+    - un INSERT masivo de los ítems,
+    - un UPDATE condicional del stock,
+    - un upsert por tabla de resumen diario.
+
+    Si se entrega una clave de idempotencia y otra petición con la misma
+    clave ganó la carrera, se devuelve esa venta en vez de crear otra.
+
+    `fecha` es la hora original de una venta encolada sin conexión; ya debe
+    venir validada (ver ventas.views.confirmar_lote). Sin ella, la venta
+    queda con la hora actual.
+
+    Lanza VentaError si la venta no se puede registrar; en ese caso
+    no queda nada guardado.
+    """
+    cantidades = normalizar_items(items)
+
+    try:
+        venta = _registrar(cantidades, usuario, trabajador, turno, metodo_pago, clave, fecha)
+    except IntegrityError:
+        venta = venta_por_clave(clave)
+        if venta is None:
+            raise
+
+    return venta
+
+
+def _registrar(cantidades, usuario, trabajador, turno, metodo_pago, clave, fecha=None):
+    with transaction.atomic():
+        # ORDEN FIJO POR ID PARA QUE DOS CAJAS NO SE BLOQUEEN ENTRE SÍ
+        productos = list(
+            Producto.objects.select_for_update()
+            .filter(id__in=cantidades)
+            .order_by("id")
+        )
+
+        validar_productos(productos, cantidades)
+
+        total = sum(
+            (p.precio_unitario * cantidades[p.id] for p in productos),
+            Decimal("0"),
+        )
+
+        venta_kwargs = {
+            "usuario": usuario,
+            "trabajador": trabajador,
+            "turno": turno,
+            "estado": "CONFIRMADA",
+            "total": total,
+            "clave_idempotencia": clave or None,
+        }
+
+        if hasattr(Venta, "metodo_pago"):
+            venta_kwargs["metodo_pago"] = metodo_pago
+
+        venta = Venta.objects.create(**venta_kwargs)
+
+        # Venta.fecha ES auto_now_add: LA HORA ORIGINAL SE FIJA DESPUÉS, ANTES
+        # DE ACUMULAR LOS RESÚMENES PARA QUE CAIGA EN SU DÍA
+        if fecha is not None:
+            Venta.objects.filter(id=venta.id).update(fecha=fecha)
+            venta.fecha = fecha
+            # UN DÍA YA CERRADO PUEDE ESTAR EN EL CACHÉ DEL MAPA HORARIO
+            dia = timezone.localdate(fecha)
+            if dia < timezone.localdate():
+                mapa_horario.invalidar({dia})
+                transaction.on_commit(lambda: mapa_horario.invalidar({dia}))
+
+        items = VentaItem.objects.bulk_create([
+            VentaItem(
+                venta=venta,
+                producto=p,
+                cantidad=cantidades[p.id],
+                precio_unitario=p.precio_unitario,
+                costo_unitario=p.costo,
+                subtotal=p.precio_unitario * cantidades[p.id],
+            )
+            for p in productos
+        ])
+
+        descontar_stock(cantidades)
+
+        crear_alertas_stock(productos, cantidades)
+
+        acumular_venta(venta, items)
+        if len(items) > 1:
+            acumular_pares([venta.id])
+
+    return venta
@@ -0,0 +1,130 @@
+"""
+Cierre de caja por turno.
+
+resumen_turno() suma las ventas de un turno con dos consultas sobre el
+índice de turno_id (una agregación condicional sobre Venta y una agrupada
+por categoría sobre VentaItem): es el resumen en vivo del turno abierto.
+resumenes_turnos() hace lo mismo para varios turnos, agrupando por turno.
+cerrar_turno() lo guarda en CierreTurno, y desde ahí leen los reportes y
+la impresión del cierre.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.utils import timezone
+
+from .models import CierreTurno, Turno, Venta, VentaItem
+
+CONFIRMADA = Q(estado="CONFIRMADA")
+ANULADA = Q(estado="ANULADA")
+
+# CAMPOS DEL RESUMEN, EN EL MISMO ORDEN QUE LOS DEVUELVE resumen_turno()
+RESUMEN_CIERRE = ["ventas", "total", "anuladas", "total_anulado", "unidades", "margen", "por_categoria"]
+
+
+def resumenes_turnos(turno_ids):
+    """
+    resumen_turno() de varios turnos a la vez, con las mismas dos consultas
+    agrupadas por turno. Devuelve {turno_id: resumen}; un turno sin ventas
+    queda con todo en cero.
+    """
+    turno_ids = list(turno_ids)
+    resumenes = {
+        tid: {
+            "ventas": 0,
+            "total": Decimal("0"),
+            "anuladas": 0,
+            "total_anulado": Decimal("0"),
+            "unidades": 0,
+            "margen": Decimal("0"),
+            "por_categoria": [],
+        }
+        for tid in turno_ids
+    }
+    if not turno_ids:
+        return resumenes
+
+    totales = (
+        Venta.objects.filter(turno_id__in=turno_ids)
+        .values("turno_id")
+        .annotate(
+            n_confirmadas=Count("id", filter=CONFIRMADA),
+            monto_confirmado=Sum("total", filter=CONFIRMADA),
+            n_anuladas=Count("id", filter=ANULADA),
+            monto_anulado=Sum("total", filter=ANULADA),
+        )
+        .order_by()
+    )
+    for fila in totales:
+        resumen = resumenes[fila["turno_id"]]
+        resumen["ventas"] = fila["n_confirmadas"]
+        resumen["total"] = fila["monto_confirmado"] or Decimal("0")
+        resumen["anuladas"] = fila["n_anuladas"]
+        resumen["total_anulado"] = fila["monto_anulado"] or Decimal("0")
+
+    margen_expr = ExpressionWrapper(
+        F("cantidad") * (F("precio_unitario") - F("costo_unitario")),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    categorias = (
+        VentaItem.objects.filter(venta__turno_id__in=turno_ids, venta__estado="CONFIRMADA")
+        .values("venta__turno_id", "producto__categoria__nombre")
+        .annotate(unidades=Sum("cantidad"), monto=Sum("subtotal"), ganancia=Sum(margen_expr))
+        .order_by("venta__turno_id", "-monto")
+    )
+    for fila in categorias:
+        resumen = resumenes[fila["venta__turno_id"]]
+        resumen["unidades"] += fila["unidades"]
+        resumen["margen"] += fila["ganancia"] or 0
+        resumen["por_categoria"].append({
+            "categoria": fila["producto__categoria__nombre"] or "Sin categoría",
+            "unidades": fila["unidades"],
+            # TEXTO PARA QUE EL DECIMAL SE GUARDE EXACTO EN EL JSON
+            "total": str(fila["monto"]),
+        })
+
+    return resumenes
+
+
+def resumen_turno(turno):
+    """
+    Ventas, total, anulaciones, unidades y margen de un turno, con las
+    unidades y el total por categoría.
+    """
+    return resumenes_turnos([turno.id])[turno.id]
+
+
+@transaction.atomic
+def cerrar_turno(turno):
+    """
+    Cierra el turno y guarda su resumen de caja. Si ya estaba cerrado
+    devuelve el cierre existente.
+    """
+    turno = Turno.objects.select_for_update().get(pk=turno.pk)
+    cierre = CierreTurno.objects.filter(turno=turno).first()
+    if cierre:
+        return cierre
+
+    cierre = CierreTurno.objects.create(turno=turno, **resumen_turno(turno))
+    turno.hora_fin = timezone.now()
+    turno.activo = False
+    turno.save(update_fields=["hora_fin", "activo"])
+    return cierre
+
+
+def recalcular_cierres(turno_ids):
+    """
+    Vuelve a calcular los cierres ya guardados de esos turnos (por ejemplo,
+    al anular una venta de un turno cerrado) con consultas fijas: lectura
+    de los cierres, las dos agregaciones agrupadas por turno y un
+    bulk_update. Los turnos abiertos no tienen cierre y no cuestan nada.
+    """
+    cierres = list(CierreTurno.objects.filter(turno_id__in=list(turno_ids)))
+    if not cierres:
+        return
+    resumenes = resumenes_turnos([c.turno_id for c in cierres])
+    for cierre in cierres:
+        for campo, valor in resumenes[cierre.turno_id].items():
+            setattr(cierre, campo, valor)
+    CierreTurno.objects.bulk_update(cierres, RESUMEN_CIERRE)
@@ -0,0 +1,67 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from inventario.models import Producto
+from ventas.checkout import registrar_venta
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide consultas y latencia de registrar_venta según el tamaño del carrito. "
+        "Todo se ejecuta dentro de una transacción que se revierte al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--tamanos",
+            nargs="+",
+            type=int,
+            default=[1, 5, 15, 30, 60],
+            help="Cantidad de líneas por carrito a medir.",
+        )
+        parser.add_argument(
+            "--repeticiones",
+            type=int,
+            default=20,
+            help="Ventas a registrar por cada tamaño de carrito.",
+        )
+
+    def handle(self, *args, **options):
+        tamanos = options["tamanos"]
+        repeticiones = options["repeticiones"]
+
+        self.stdout.write(f"Base de datos: {connection.vendor}")
+        self.stdout.write(f"{'líneas':>7} {'consultas':>10} {'ms/venta':>10}")
+
+        with transaction.atomic():
+            productos = Producto.objects.bulk_create([
+                Producto(
+                    sku=f"BENCH-{i:05d}",
+                    nombre=f"Producto benchmark {i}",
+                    precio_unitario=Decimal("1000"),
+                    stock=10 ** 6,
+                )
+                for i in range(max(tamanos))
+            ])
+
+            for tamano in tamanos:
+                items = [{"id": p.pk, "cantidad": 1} for p in productos[:tamano]]
+
+                with CaptureQueriesContext(connection) as ctx:
+                    registrar_venta(items)
+                consultas = len(ctx.captured_queries)
+
+                inicio = time.perf_counter()
+                for _ in range(repeticiones):
+                    registrar_venta(items)
+                ms = (time.perf_counter() - inicio) * 1000 / repeticiones
+
+                self.stdout.write(f"{tamano:>7} {consultas:>10} {ms:>10.2f}")
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS("Benchmark terminado, no se guardaron datos."))
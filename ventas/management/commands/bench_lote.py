@@ -0,0 +1,71 @@
+import json
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+
+from inventario.models import Producto
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara ventas por segundo enviando ventas una por una a ventas:confirmar "
+        "versus un solo lote a ventas:confirmar_lote. Se revierte todo al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ventas", type=int, default=100, help="Ventas a enviar por modo.")
+        parser.add_argument("--lineas", type=int, default=5, help="Líneas por venta.")
+
+    def handle(self, *args, **options):
+        n_ventas = options["ventas"]
+        n_lineas = options["lineas"]
+
+        self.stdout.write(f"Base de datos: {connection.vendor}")
+        self.stdout.write(f"{n_ventas} ventas de {n_lineas} líneas por modo")
+
+        with transaction.atomic():
+            user = get_user_model().objects.create_user("bench-lote")
+            client = Client()
+            client.force_login(user)
+
+            productos = Producto.objects.bulk_create([
+                Producto(
+                    sku=f"BENCH-{i:05d}",
+                    nombre=f"Producto benchmark {i}",
+                    precio_unitario=Decimal("1000"),
+                    stock=10 ** 6,
+                )
+                for i in range(n_lineas)
+            ])
+            items = [{"id": p.pk, "cantidad": 1} for p in productos]
+
+            def ventas(modo):
+                return [{"items": items, "clave": f"bench-{modo}-{i}"} for i in range(n_ventas)]
+
+            inicio = time.perf_counter()
+            for venta in ventas("unitaria"):
+                client.post(
+                    reverse("ventas:confirmar"),
+                    data=json.dumps(venta),
+                    content_type="application/json",
+                )
+            unitaria = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            client.post(
+                reverse("ventas:confirmar_lote"),
+                data=json.dumps({"ventas": ventas("lote")}),
+                content_type="application/json",
+            )
+            lote = time.perf_counter() - inicio
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{'una por una':<14} {n_ventas / unitaria:>10.1f} ventas/s")
+        self.stdout.write(f"{'lote':<14} {n_ventas / lote:>10.1f} ventas/s")
+        self.stdout.write(self.style.SUCCESS("Benchmark terminado, no se guardaron datos."))
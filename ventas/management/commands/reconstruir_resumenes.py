@@ -0,0 +1,105 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.utils import timezone
+
+from ventas.resumenes import agregar, particiones_mensuales, reemplazar
+
+
+def _fecha(valor):
+    try:
+        return datetime.strptime(valor, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"Fecha inválida: {valor} (usa AAAA-MM-DD).")
+
+
+def _iniciar_worker():
+    import django
+
+    django.setup()
+    # CADA PROCESO ABRE SU PROPIA CONEXIÓN (NO SE COMPARTE LA DEL PADRE)
+    connections.close_all()
+
+
+def _agregar_particion(desde, hasta):
+    return desde, hasta, agregar(desde, hasta)
+
+
+def _nombre(desde, hasta):
+    dia = desde or hasta
+    return dia.strftime("%Y-%m") if dia else "todo"
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula los resúmenes diarios de ventas desde Venta y VentaItem, "
+        "por mes y en paralelo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--desde", "--since", type=_fecha, help="Primer día a recalcular (AAAA-MM-DD).")
+        parser.add_argument("--hasta", type=_fecha, help="Último día a recalcular (AAAA-MM-DD).")
+        parser.add_argument(
+            "--dias", type=int,
+            help="Recalcula solo los últimos N días (para la tarea nocturna).",
+        )
+        parser.add_argument(
+            "--procesos", type=int, default=os.cpu_count() or 1,
+            help="Procesos que agregan meses en paralelo (1 = sin pool).",
+        )
+
+    def handle(self, *args, **options):
+        desde, hasta = options["desde"], options["hasta"]
+        if options["dias"]:
+            desde = timezone.localdate() - timedelta(days=options["dias"] - 1)
+        if desde and hasta and desde > hasta:
+            raise CommandError("--desde no puede ser posterior a --hasta.")
+
+        particiones = particiones_mensuales(desde, hasta)
+        procesos = max(1, min(options["procesos"], len(particiones)))
+
+        # UNA BD SQLITE EN MEMORIA (TESTS) NO SE VE DESDE OTROS PROCESOS
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            procesos = 1
+
+        self.inicio = time.monotonic()
+        self.lineas = 0
+        self.filas = 0
+        self.total = len(particiones)
+        self.hechas = 0
+
+        if procesos == 1:
+            for desde_p, hasta_p in particiones:
+                self._guardar(desde_p, hasta_p, agregar(desde_p, hasta_p))
+        else:
+            # LOS WORKERS SOLO LEEN; EL PADRE ESCRIBE CADA MES EN SU TRANSACCIÓN
+            # (Y LO VUELVE A AGREGAR SI CAMBIÓ DESPUÉS, VER reemplazar)
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_worker) as pool:
+                pendientes = [
+                    pool.submit(_agregar_particion, desde_p, hasta_p)
+                    for desde_p, hasta_p in particiones
+                ]
+                for futuro in as_completed(pendientes):
+                    self._guardar(*futuro.result())
+
+        segundos = time.monotonic() - self.inicio
+        self.stdout.write(self.style.SUCCESS(
+            f"Resúmenes reconstruidos: {self.filas} filas, {self.lineas} líneas de venta "
+            f"en {segundos:.1f} s con {procesos} proceso(s)."
+        ))
+
+    def _guardar(self, desde, hasta, datos):
+        self.filas += reemplazar(desde, hasta, datos)
+        self.lineas += datos["lineas"]
+        self.hechas += 1
+
+        segundos = max(time.monotonic() - self.inicio, 1e-6)
+        self.stdout.write(
+            f"[{self.hechas}/{self.total}] {_nombre(desde, hasta)}: "
+            f"{datos['lineas']} líneas, {self.lineas / segundos:.0f} líneas/s"
+        )
@@ -0,0 +1,115 @@
+"""
+Ventas por hora local y día de la semana (mapa de calor de 7 × 24).
+
+Se agrupa en la BD con TruncDate/ExtractHour en la zona horaria del
+negocio, por día y hora. Los días ya cerrados (antes de hoy) no cambian,
+así que su resultado se guarda en memoria del proceso: al repetir la
+consulta solo se calcula hoy. anular_ventas() y las ventas encoladas con
+fecha de un día anterior invalidan los días que tocan. Un día cerrado casi
+nunca cambia, así que en los otros procesos puede esperar a que venza a
+los diez minutos (TTL_SEGUNDOS).
+"""
+import threading
+import time
+from datetime import timedelta
+
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractHour, TruncDate
+from django.utils import timezone
+
+from .models import VentaItem
+from .periodos import filtro_dias
+
+DIAS_SEMANA = ["Lun", "Mar", "Mié", "Jue", "Vie", "Sáb", "Dom"]
+MAX_DIAS_EN_CACHE = 1000
+TTL_SEGUNDOS = 600
+
+_lock = threading.Lock()
+_por_dia = {}  # fecha -> (vence, {hora: (ventas, unidades, total)})
+
+
+def _agregar(desde, hasta):
+    """{fecha: {hora: (ventas, unidades, total)}} de los días pedidos, en una consulta."""
+    zona = timezone.get_default_timezone()
+    filas = (
+        VentaItem.objects.filter(
+            filtro_dias(desde, hasta, campo="venta__fecha"),
+            venta__estado="CONFIRMADA",
+        )
+        .annotate(
+            dia=TruncDate("venta__fecha", tzinfo=zona),
+            hora=ExtractHour("venta__fecha", tzinfo=zona),
+        )
+        .values("dia", "hora")
+        .annotate(
+            ventas=Count("venta_id", distinct=True),
+            unidades=Sum("cantidad"),
+            monto=Sum("subtotal"),
+        )
+        .order_by()
+    )
+    resultado = {}
+    for f in filas:
+        resultado.setdefault(f["dia"], {})[f["hora"]] = (f["ventas"], f["unidades"], f["monto"])
+    return resultado
+
+
+def _dias_cerrados(desde, hasta):
+    """Días del rango ya guardados o calculados de una vez los que falten."""
+    dias = [desde + timedelta(days=i) for i in range((hasta - desde).days + 1)]
+    ahora = time.monotonic()
+    resultado = {}
+    faltan = []
+    for d in dias:
+        entrada = _por_dia.get(d)
+        if entrada is not None and entrada[0] > ahora:
+            resultado[d] = entrada[1]
+        else:
+            faltan.append(d)
+
+    if faltan:
+        nuevos = _agregar(min(faltan), max(faltan))
+        vence = time.monotonic() + TTL_SEGUNDOS
+        with _lock:
+            if len(_por_dia) + len(faltan) > MAX_DIAS_EN_CACHE:
+                _por_dia.clear()
+            for d in faltan:
+                # LOS DÍAS SIN VENTAS TAMBIÉN SE GUARDAN
+                resultado[d] = nuevos.get(d, {})
+                _por_dia[d] = (vence, resultado[d])
+    return resultado
+
+
+def mapa_horario(desde, hasta):
+    """
+    Matriz de 7 filas (lunes a domingo) × 24 horas con ventas, unidades y
+    total de cada celda entre los días locales desde y hasta (inclusive).
+    """
+    hoy = timezone.localdate()
+    por_dia = {}
+    if desde < hoy:
+        por_dia.update(_dias_cerrados(desde, min(hasta, hoy - timedelta(days=1))))
+    if hasta >= hoy >= desde:
+        por_dia.update(_agregar(hoy, hoy))
+
+    matriz = [[[0, 0, 0] for _ in range(24)] for _ in range(7)]
+    for dia, horas in por_dia.items():
+        fila = matriz[dia.weekday()]
+        for hora, (ventas, unidades, total) in horas.items():
+            celda = fila[hora]
+            celda[0] += ventas
+            celda[1] += unidades or 0
+            celda[2] += total or 0
+    return matriz
+
+
+def invalidar(fechas):
+    """Olvida los días (fechas locales) de ventas que cambiaron."""
+    with _lock:
+        for fecha in fechas:
+            _por_dia.pop(fecha, None)
+
+
+def limpiar():
+    with _lock:
+        _por_dia.clear()
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-17 22:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0003_trabajador_venta_trabajador_turno_venta_turno'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='venta',
+            name='clave_idempotencia',
+            field=models.CharField(blank=True, help_text='Clave generada por la caja; un reintento con la misma clave devuelve la venta original.', max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.9 on 2026-10-17 22:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0003_indices_consultas_frecuentes'),
+        ('ventas', '0004_venta_clave_idempotencia'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='venta',
+            index=models.Index(fields=['estado', 'fecha'], name='venta_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ventaitem',
+            index=models.Index(fields=['venta', 'producto'], name='ventaitem_venta_producto_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.9 on 2026-10-17 22:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def confirmar_ventas_pendientes(apps, schema_editor):
+    # La caja antigua dejaba sus ventas en PENDIENTE aunque estuvieran
+    # completas; análisis y los resúmenes solo cuentan las CONFIRMADAS.
+    Venta = apps.get_model("ventas", "Venta")
+    Venta.objects.filter(estado="PENDIENTE").update(estado="CONFIRMADA")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0003_indices_consultas_frecuentes'),
+        ('ventas', '0005_indices_consultas_frecuentes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True)),
+                ('ventas', models.IntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('unidades', models.IntegerField(default=0)),
+                ('margen', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'ordering': ['fecha'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenDiarioProducto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('cantidad', models.IntegerField(default=0)),
+                ('monto', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('margen', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_diarios', to='inventario.producto')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'producto'), name='resumen_dia_producto_unico')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenDiarioTrabajador',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('turno_tipo', models.CharField(blank=True, default='', max_length=10)),
+                ('ventas', models.IntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('trabajador', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes_diarios', to='ventas.trabajador')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'trabajador', 'turno_tipo'), name='resumen_dia_trabajador_unico')],
+            },
+        ),
+        migrations.RunPython(confirmar_ventas_pendientes, migrations.RunPython.noop),
+    ]
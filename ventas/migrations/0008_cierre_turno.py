@@ -0,0 +1,30 @@
+# Generated by Django 5.2.9 on 2026-10-17 23:03
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0007_venta_fecha_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CierreTurno',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ventas', models.IntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('anuladas', models.IntegerField(default=0)),
+                ('total_anulado', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('unidades', models.IntegerField(default=0)),
+                ('margen', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('por_categoria', models.JSONField(blank=True, default=list)),
+                ('creado_en', models.DateTimeField(default=django.utils.timezone.now)),
+                ('turno', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='cierre', to='ventas.turno')),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-17 23:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0007_producto_clase_abc'),
+        ('ventas', '0008_cierre_turno'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParCompra',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ventas', models.IntegerField(default=0)),
+                ('acompanante', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventario.producto')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pares_compra', to='inventario.producto')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['producto', '-ventas'], name='par_compra_top_idx')],
+                'constraints': [models.UniqueConstraint(fields=('producto', 'acompanante'), name='par_compra_unico')],
+            },
+        ),
+    ]
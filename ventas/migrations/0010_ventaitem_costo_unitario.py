@@ -0,0 +1,40 @@
+# Generated by Django 5.2.9 on 2026-10-18 10:12
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def rellenar_costos(apps, schema_editor):
+    # LAS LÍNEAS ANTERIORES NO GUARDARON SU COSTO: SE USA EL ACTUAL DEL
+    # PRODUCTO, QUE ES LO QUE YA USABAN LOS RESÚMENES
+    Producto = apps.get_model("inventario", "Producto")
+    VentaItem = apps.get_model("ventas", "VentaItem")
+    VentaItem.objects.update(
+        costo_unitario=Subquery(
+            Producto.objects.filter(id=OuterRef("producto_id")).values("costo")[:1]
+        )
+    )
+
+
+def crear_resumenes(apps, schema_editor):
+    from ventas.resumenes import reconstruir
+
+    reconstruir(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0009_par_compra'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ventaitem',
+            name='costo_unitario',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Costo unitario del producto al momento de la venta.', max_digits=10),
+            preserve_default=False,
+        ),
+        migrations.RunPython(rellenar_costos, migrations.RunPython.noop),
+        migrations.RunPython(crear_resumenes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.9 on 2026-10-18 10:40
+
+from django.db import migrations
+
+
+def rellenar_pares(apps, schema_editor):
+    # SIN ESTO, ANULAR UNA VENTA ANTERIOR A 0009 DEJARÍA PARES EN NEGATIVO
+    from ventas.canasta import reconstruir
+
+    reconstruir(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0010_ventaitem_costo_unitario'),
+    ]
+
+    operations = [
+        migrations.RunPython(rellenar_pares, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models, transaction
+from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.conf import settings
@@ -94,30 +94,42 @@ class Venta(models.Model):
         related_name="ventas_turno",
     )
 
+    # CLAVE QUE GENERA LA CAJA PARA NO DUPLICAR VENTAS EN REINTENTOS
+    clave_idempotencia = models.CharField(
+        max_length=64,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text="Clave generada por la caja; un reintento con la misma clave devuelve la venta original.",
+    )
+
     class Meta:
         ordering = ["-fecha"]
+        indexes = [
+            # ANÁLISIS Y REPORTES: VENTAS CONFIRMADAS EN UN RANGO DE FECHAS
+            models.Index(fields=["estado", "fecha"], name="venta_estado_fecha_idx"),
+            # HISTORIAL: PAGINACIÓN POR CURSOR SOBRE (fecha, id)
+            models.Index(fields=["fecha", "id"], name="venta_fecha_id_idx"),
+        ]
 
     def __str__(self):
         return f"Venta #{self.id} - {self.fecha:%Y-%m-%d %H:%M}"
 
-    @transaction.atomic
     def anular(self, usuario=None, motivo=""):
         """
-        Anula una venta y devuelve el stock a los productos.
+        Anula una venta y devuelve el stock a los productos
+        (un UPDATE agrupado, ver ventas.anulacion).
         """
+        from .anulacion import anular_ventas
+
         if self.estado == "ANULADA":
             return
 
-        for item in self.items.all():
-            producto = item.producto
-            producto.stock += item.cantidad
-            producto.save()
-
-        self.estado = "ANULADA"
-        self.motivo_anulacion = motivo
-        self.anulada_en = timezone.now()
-        self.anulada_por = usuario
-        self.save()
+        for anulada in anular_ventas([self.id], usuario=usuario, motivo=motivo):
+            self.estado = anulada.estado
+            self.motivo_anulacion = anulada.motivo_anulacion
+            self.anulada_en = anulada.anulada_en
+            self.anulada_por = anulada.anulada_por
 
 # ITEMS DE LA VENTA
 
@@ -146,9 +158,145 @@ class VentaItem(models.Model):
         default=0
     )
 
+    # COSTO DEL PRODUCTO AL VENDER: EL MARGEN NO CAMBIA SI DESPUÉS SUBE EL COSTO
+    costo_unitario = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        help_text="Costo unitario del producto al momento de la venta.",
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["venta", "producto"], name="ventaitem_venta_producto_idx"),
+        ]
+
     def __str__(self):
         return f"{self.producto} x {self.cantidad}"
 
     def save(self, *args, **kwargs):
         self.subtotal = self.cantidad * self.precio_unitario
+        if self.costo_unitario is None:
+            self.costo_unitario = self.producto.costo
         super().save(*args, **kwargs)
+
+
+# RESÚMENES DIARIOS (LOS LEEN ANÁLISIS Y REPORTES)
+#
+# Se actualizan en la misma transacción que confirma o anula la venta
+# (ver ventas/resumenes.py) y se pueden reconstruir con
+# "manage.py reconstruir_resumenes". Solo cuentan ventas CONFIRMADAS;
+# las fechas son días locales (America/Santiago).
+
+class ResumenDiario(models.Model):
+    fecha = models.DateField(unique=True)
+    ventas = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    unidades = models.IntegerField(default=0)
+    margen = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ["fecha"]
+
+    def __str__(self):
+        return f"{self.fecha}: {self.ventas} ventas, ${self.total}"
+
+
+class ResumenDiarioProducto(models.Model):
+    fecha = models.DateField()
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.CASCADE,
+        related_name="resumenes_diarios",
+    )
+    cantidad = models.IntegerField(default=0)
+    monto = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    margen = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["fecha", "producto"], name="resumen_dia_producto_unico"),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} {self.producto}: {self.cantidad}"
+
+
+class ResumenDiarioTrabajador(models.Model):
+    fecha = models.DateField()
+    trabajador = models.ForeignKey(
+        Trabajador,
+        on_delete=models.CASCADE,
+        related_name="resumenes_diarios",
+    )
+    # DIA / NOCHE, VACÍO SI LA VENTA NO TENÍA TURNO
+    turno_tipo = models.CharField(max_length=10, blank=True, default="")
+    ventas = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["fecha", "trabajador", "turno_tipo"], name="resumen_dia_trabajador_unico"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} {self.trabajador} {self.turno_tipo}: ${self.total}"
+
+
+class CierreTurno(models.Model):
+    """
+    Resumen de caja de un turno, calculado una vez al cerrarlo.
+    Los reportes por trabajador y por turno leen estas filas en vez de
+    volver a sumar todas las ventas.
+    """
+    turno = models.OneToOneField(
+        Turno,
+        on_delete=models.CASCADE,
+        related_name="cierre",
+    )
+    ventas = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    anuladas = models.IntegerField(default=0)
+    total_anulado = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    unidades = models.IntegerField(default=0)
+    margen = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # [{"categoria", "unidades", "total"}], DE MAYOR A MENOR TOTAL
+    por_categoria = models.JSONField(default=list, blank=True)
+    creado_en = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Cierre {self.turno}: {self.ventas} ventas, ${self.total}"
+
+
+# PARES DE PRODUCTOS COMPRADOS JUNTOS (CANASTA)
+#
+# Cada par se guarda en los dos sentidos (producto -> acompañante), así las
+# sugerencias de un producto son un rango del índice par_compra_top_idx.
+# Se actualiza con los resúmenes al confirmar o anular (ver ventas/canasta.py)
+# y se reconstruye con "manage.py reconstruir_pares".
+
+class ParCompra(models.Model):
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.CASCADE,
+        related_name="pares_compra",
+    )
+    acompanante = models.ForeignKey(
+        Producto,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    # VENTAS CONFIRMADAS QUE LLEVARON LOS DOS PRODUCTOS
+    ventas = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["producto", "acompanante"], name="par_compra_unico"),
+        ]
+        indexes = [
+            models.Index(fields=["producto", "-ventas"], name="par_compra_top_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.producto} + {self.acompanante}: {self.ventas}"
@@ -0,0 +1,124 @@
+"""
+Periodos del calendario local (America/Santiago) como rangos UTC semiabiertos.
+
+Filtrar con fecha__date=... envuelve la columna en una conversión a fecha:
+la base de datos no puede usar el índice de Venta.fecha y el corte del día
+queda en UTC o en hora local según el motor. Aquí cada periodo se traduce a
+[inicio, fin) en UTC, y el filtro queda como fecha >= inicio AND fecha < fin.
+
+Los días con cambio de horario duran 23 o 25 horas; por eso los límites se
+calculan siempre desde la medianoche local de cada día y nunca sumando
+horas a un instante.
+"""
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+from django.db.models import Q
+from django.utils import timezone
+
+
+def inicio_dia(dia):
+    """Instante UTC en que empieza el día local."""
+    # fold=0: SI LA MEDIANOCHE NO EXISTE (SE ADELANTA EL RELOJ), EL DÍA
+    # EMPIEZA EN EL SALTO; SI SE REPITE, EN LA PRIMERA VEZ
+    local = datetime.combine(dia, time.min, tzinfo=timezone.get_current_timezone())
+    return local.astimezone(dt_timezone.utc)
+
+
+def rango_dias(desde, hasta):
+    """
+    Días locales [desde, hasta] (ambos incluidos) como (inicio, fin) UTC,
+    con fin excluido. Cualquiera de los dos puede ser None (sin límite).
+    """
+    inicio = inicio_dia(desde) if desde else None
+    fin = inicio_dia(hasta + timedelta(days=1)) if hasta else None
+    return inicio, fin
+
+
+def rango_dia(dia):
+    return rango_dias(dia, dia)
+
+
+def rango_semana(dia):
+    """Semana de lunes a domingo que contiene el día."""
+    lunes = dia - timedelta(days=dia.weekday())
+    return rango_dias(lunes, lunes + timedelta(days=6))
+
+
+def rango_mes(dia):
+    """Mes calendario que contiene el día."""
+    primero = dia.replace(day=1)
+    siguiente = (primero + timedelta(days=32)).replace(day=1)
+    return rango_dias(primero, siguiente - timedelta(days=1))
+
+
+PERIODOS = {
+    "hoy": rango_dia,
+    "semana": rango_semana,
+    "mes": rango_mes,
+}
+
+
+def filtro_rango(inicio, fin, campo="fecha"):
+    """Q(campo >= inicio, campo < fin), omitiendo los límites en None."""
+    condicion = Q()
+    if inicio:
+        condicion &= Q(**{f"{campo}__gte": inicio})
+    if fin:
+        condicion &= Q(**{f"{campo}__lt": fin})
+    return condicion
+
+
+def filtro_dias(desde, hasta, campo="fecha"):
+    """Filtro sargable por días locales [desde, hasta] sobre un DateTimeField."""
+    return filtro_rango(*rango_dias(desde, hasta), campo=campo)
+
+
+def leer_fecha(valor, defecto=None):
+    """'AAAA-MM-DD' de un GET a date; si falta o es inválida, el defecto."""
+    try:
+        return date.fromisoformat(valor) if valor else defecto
+    except ValueError:
+        return defecto
+
+
+def leer_rango(params, dias=30):
+    """
+    desde/hasta de un GET como días locales. Por defecto los últimos
+    `dias` días hasta hoy; si vienen invertidos se intercambian.
+    """
+    hoy = timezone.localdate()
+    desde = leer_fecha(params.get("desde"), hoy - timedelta(days=dias))
+    hasta = leer_fecha(params.get("hasta"), hoy)
+    if desde > hasta:
+        desde, hasta = hasta, desde
+    return desde, hasta
+
+
+def hace_un_anio(dia):
+    """El mismo día del año anterior (el 29 de febrero pasa a ser el 28)."""
+    try:
+        return dia.replace(year=dia.year - 1)
+    except ValueError:
+        return dia.replace(year=dia.year - 1, day=28)
+
+
+def un_anio_despues(dia):
+    """El mismo día del año siguiente (el 29 de febrero pasa a ser el 28)."""
+    try:
+        return dia.replace(year=dia.year + 1)
+    except ValueError:
+        return dia.replace(year=dia.year + 1, day=28)
+
+
+def periodos_comparados(desde, hasta):
+    """
+    El rango [desde, hasta] y sus dos comparaciones, como días locales:
+    {"actual", "anterior" (los mismos días justo antes), "anio" (las
+    mismas fechas un año atrás)} -> (desde, hasta).
+    """
+    dias = (hasta - desde).days + 1
+    return {
+        "actual": (desde, hasta),
+        "anterior": (desde - timedelta(days=dias), desde - timedelta(days=1)),
+        "anio": (hace_un_anio(desde), hace_un_anio(hasta)),
+    }
@@ -0,0 +1,333 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.apps import apps as global_apps
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .periodos import filtro_dias
+
+
+# FILAS POR INSERT: SQLITE ADMITE POCOS PARÁMETROS POR SENTENCIA
+FILAS_POR_UPSERT = 150
+
+
+def _upsert(modelo, claves, filas):
+    """
+    Suma las filas a la tabla de resumen con INSERT ... ON CONFLICT
+    (SQLite >= 3.24 y PostgreSQL): si la fila ya existe, se incrementan las
+    columnas que no son clave en vez de reemplazarlas.
+    """
+    if not filas:
+        return
+
+    qn = connection.ops.quote_name
+    tabla = qn(modelo._meta.db_table)
+    campos = list(filas[0].keys())
+    columnas = {c: modelo._meta.get_field(c).column for c in campos}
+
+    sumas = ", ".join(
+        f"{qn(columnas[c])} = {tabla}.{qn(columnas[c])} + excluded.{qn(columnas[c])}"
+        for c in campos
+        if c not in claves
+    )
+    valores = "(" + ", ".join(["%s"] * len(campos)) + ")"
+
+    for inicio in range(0, len(filas), FILAS_POR_UPSERT):
+        tanda = filas[inicio:inicio + FILAS_POR_UPSERT]
+        sql = (
+            f"INSERT INTO {tabla} ({', '.join(qn(columnas[c]) for c in campos)}) "
+            f"VALUES {', '.join([valores] * len(tanda))} "
+            f"ON CONFLICT ({', '.join(qn(columnas[c]) for c in claves)}) DO UPDATE SET {sumas}"
+        )
+        params = []
+        for fila in tanda:
+            for c in campos:
+                params.append(modelo._meta.get_field(c).get_db_prep_value(fila[c], connection))
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+
+def acumular_ventas(ventas, items, signo=1):
+    """
+    Suma (signo=1, al confirmar) o resta (signo=-1, al anular) ventas a los
+    resúmenes de sus días. `items` son los VentaItem de esas ventas; el
+    margen usa su costo_unitario (el costo al vender). Son tres upserts sin importar cuántas ventas o ítems
+    haya. Debe llamarse dentro de la transacción que confirma o anula.
+    """
+    ResumenDiario = global_apps.get_model("ventas", "ResumenDiario")
+    ResumenDiarioProducto = global_apps.get_model("ventas", "ResumenDiarioProducto")
+    ResumenDiarioTrabajador = global_apps.get_model("ventas", "ResumenDiarioTrabajador")
+
+    dia_de = {v.id: timezone.localdate(v.fecha) for v in ventas}
+
+    por_dia = defaultdict(lambda: [0, Decimal("0"), 0, Decimal("0")])
+    por_producto = defaultdict(lambda: [0, Decimal("0"), Decimal("0")])
+    por_trabajador = defaultdict(lambda: [0, Decimal("0")])
+
+    for venta in ventas:
+        fila = por_dia[dia_de[venta.id]]
+        fila[0] += 1
+        fila[1] += venta.total
+        if venta.trabajador_id:
+            turno_tipo = venta.turno.turno_tipo if venta.turno_id else ""
+            fila = por_trabajador[(dia_de[venta.id], venta.trabajador_id, turno_tipo)]
+            fila[0] += 1
+            fila[1] += venta.total
+
+    for item in items:
+        dia = dia_de[item.venta_id]
+        margen = item.cantidad * (item.precio_unitario - item.costo_unitario)
+
+        fila = por_producto[(dia, item.producto_id)]
+        fila[0] += item.cantidad
+        fila[1] += item.subtotal
+        fila[2] += margen
+
+        por_dia[dia][2] += item.cantidad
+        por_dia[dia][3] += margen
+
+    _upsert(ResumenDiario, ["fecha"], [
+        {
+            "fecha": dia,
+            "ventas": signo * n,
+            "total": signo * total,
+            "unidades": signo * unidades,
+            "margen": signo * margen,
+        }
+        for dia, (n, total, unidades, margen) in por_dia.items()
+    ])
+
+    _upsert(ResumenDiarioProducto, ["fecha", "producto"], [
+        {
+            "fecha": dia,
+            "producto": producto_id,
+            "cantidad": signo * cantidad,
+            "monto": signo * monto,
+            "margen": signo * margen,
+        }
+        for (dia, producto_id), (cantidad, monto, margen) in por_producto.items()
+    ])
+
+    _upsert(ResumenDiarioTrabajador, ["fecha", "trabajador", "turno_tipo"], [
+        {
+            "fecha": dia,
+            "trabajador": trabajador_id,
+            "turno_tipo": turno_tipo,
+            "ventas": signo * n,
+            "total": signo * total,
+        }
+        for (dia, trabajador_id, turno_tipo), (n, total) in por_trabajador.items()
+    ])
+
+
+def acumular_venta(venta, items, signo=1):
+    """acumular_ventas() para una sola venta (checkout)."""
+    acumular_ventas([venta], items, signo=signo)
+
+
+def particiones_mensuales(desde=None, hasta=None):
+    """
+    Divide el historial de ventas en meses calendario: lista de pares
+    (primer_dia, ultimo_dia). El primer inicio y el último fin quedan en
+    None cuando no se indican, para que la reconstrucción completa también
+    borre resúmenes huérfanos fuera del rango con ventas.
+    """
+    from .models import Venta
+
+    limites = Venta.objects.aggregate(primera=Min("fecha"), ultima=Max("fecha"))
+    if limites["primera"] is None:
+        return [(desde, hasta)]
+
+    inicio = desde or timezone.localdate(limites["primera"])
+    fin = hasta or timezone.localdate(limites["ultima"])
+    if inicio > fin:
+        return [(desde, hasta)]
+
+    particiones = []
+    mes = inicio.replace(day=1)
+    while mes <= fin:
+        siguiente = (mes + timedelta(days=32)).replace(day=1)
+        particiones.append((max(mes, inicio), min(siguiente - timedelta(days=1), fin)))
+        mes = siguiente
+
+    particiones[0] = (desde, particiones[0][1])
+    particiones[-1] = (particiones[-1][0], hasta)
+    return particiones
+
+
+def huella(desde=None, hasta=None, apps=global_apps):
+    """
+    Resumen barato de las ventas de [desde, hasta]: cambia si se registra,
+    anula o borra alguna. Sirve para saber si una agregación quedó vieja.
+    """
+    Venta = apps.get_model("ventas", "Venta")
+
+    datos = Venta.objects.filter(filtro_dias(desde, hasta)).aggregate(
+        n=Count("id"),
+        confirmadas=Count("id", filter=Q(estado="CONFIRMADA")),
+        ids=Sum("id"),
+        anulada_en=Max("anulada_en"),
+    )
+    return [datos["n"], datos["confirmadas"], datos["ids"], str(datos["anulada_en"])]
+
+
+def agregar(desde=None, hasta=None, apps=global_apps):
+    """
+    Agrega Venta y VentaItem de los días [desde, hasta] sin escribir nada.
+    Devuelve diccionarios simples (se pueden enviar entre procesos).
+    """
+    Venta = apps.get_model("ventas", "Venta")
+    VentaItem = apps.get_model("ventas", "VentaItem")
+
+    # LA HUELLA VA ANTES: SI ALGO CAMBIA MIENTRAS SE AGREGA, NO COINCIDIRÁ
+    # CON LA DE reemplazar() Y EL MES SE VUELVE A AGREGAR
+    marca = huella(desde, hasta, apps=apps)
+
+    ventas = Venta.objects.filter(filtro_dias(desde, hasta), estado="CONFIRMADA")
+    items = VentaItem.objects.filter(
+        filtro_dias(desde, hasta, campo="venta__fecha"), venta__estado="CONFIRMADA"
+    )
+
+    dinero = DecimalField(max_digits=14, decimal_places=2)
+    margen_expr = ExpressionWrapper(
+        F("cantidad") * (F("precio_unitario") - F("costo_unitario")),
+        output_field=dinero,
+    )
+
+    por_producto = list(
+        items.annotate(dia=TruncDate("venta__fecha"))
+        .values("dia", "producto_id")
+        .annotate(
+            lineas=Count("id"),
+            unidades=Sum("cantidad"),
+            monto=Sum("subtotal"),
+            ganancia=Sum(margen_expr),
+        )
+        .order_by()
+    )
+
+    por_dia = list(
+        ventas.annotate(dia=TruncDate("fecha"))
+        .values("dia")
+        .annotate(n=Count("id"), monto=Sum("total"))
+        .order_by()
+    )
+
+    por_trabajador = list(
+        ventas.filter(trabajador__isnull=False)
+        .annotate(dia=TruncDate("fecha"))
+        .values("dia", "trabajador_id", "turno__turno_tipo")
+        .annotate(n=Count("id"), monto=Sum("total"))
+        .order_by()
+    )
+
+    return {
+        "dias": por_dia,
+        "productos": por_producto,
+        "trabajadores": por_trabajador,
+        "lineas": sum(f["lineas"] for f in por_producto),
+        "huella": marca,
+    }
+
+
+def _bloquear(modelos):
+    """
+    Impide que otras transacciones sumen a los resúmenes hasta el commit.
+    En PostgreSQL con LOCK TABLE (una venta en curso espera y suma después
+    sobre las filas nuevas); SQLite ya tiene un solo escritor, y el DELETE
+    que sigue toma el bloqueo de escritura.
+    """
+    if connection.vendor != "postgresql":
+        return
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"LOCK TABLE {', '.join(qn(m._meta.db_table) for m in modelos)} IN SHARE ROW EXCLUSIVE MODE"
+        )
+
+
+def reemplazar(desde, hasta, datos, apps=global_apps):
+    """
+    Cambia en una sola transacción los resúmenes de [desde, hasta] por los
+    datos de agregar(). Quien lea los resúmenes ve el mes viejo o el nuevo,
+    nunca uno a medias. Devuelve la cantidad de filas creadas.
+
+    Los datos pueden venir de otro proceso y haber quedado viejos (una venta
+    confirmada o anulada después de agregarlos ya se sumó a los resúmenes y
+    el reemplazo la borraría): con los resúmenes bloqueados se compara la
+    huella y, si cambió, el periodo se vuelve a agregar dentro del bloqueo.
+    """
+    ResumenDiario = apps.get_model("ventas", "ResumenDiario")
+    ResumenDiarioProducto = apps.get_model("ventas", "ResumenDiarioProducto")
+    ResumenDiarioTrabajador = apps.get_model("ventas", "ResumenDiarioTrabajador")
+    modelos = (ResumenDiario, ResumenDiarioProducto, ResumenDiarioTrabajador)
+
+    with transaction.atomic():
+        _bloquear(modelos)
+        for modelo in modelos:
+            qs = modelo.objects.all()
+            if desde:
+                qs = qs.filter(fecha__gte=desde)
+            if hasta:
+                qs = qs.filter(fecha__lte=hasta)
+            qs.delete()
+
+        if datos.get("huella") != huella(desde, hasta, apps=apps):
+            datos = agregar(desde, hasta, apps=apps)
+
+        # UNIDADES Y MARGEN DEL DÍA SALEN DE LA AGREGACIÓN POR PRODUCTO
+        por_dia_items = defaultdict(lambda: [0, Decimal("0")])
+        for fila in datos["productos"]:
+            por_dia_items[fila["dia"]][0] += fila["unidades"] or 0
+            por_dia_items[fila["dia"]][1] += fila["ganancia"] or 0
+
+        creados = ResumenDiario.objects.bulk_create([
+            ResumenDiario(
+                fecha=fila["dia"],
+                ventas=fila["n"],
+                total=fila["monto"] or 0,
+                unidades=por_dia_items[fila["dia"]][0],
+                margen=por_dia_items[fila["dia"]][1],
+            )
+            for fila in datos["dias"]
+        ], batch_size=500)
+
+        creados += ResumenDiarioProducto.objects.bulk_create([
+            ResumenDiarioProducto(
+                fecha=fila["dia"],
+                producto_id=fila["producto_id"],
+                cantidad=fila["unidades"] or 0,
+                monto=fila["monto"] or 0,
+                margen=fila["ganancia"] or 0,
+            )
+            for fila in datos["productos"]
+        ], batch_size=500)
+
+        creados += ResumenDiarioTrabajador.objects.bulk_create([
+            ResumenDiarioTrabajador(
+                fecha=fila["dia"],
+                trabajador_id=fila["trabajador_id"],
+                turno_tipo=fila["turno__turno_tipo"] or "",
+                ventas=fila["n"],
+                total=fila["monto"] or 0,
+            )
+            for fila in datos["trabajadores"]
+        ], batch_size=500)
+
+    return len(creados)
+
+
+def reconstruir(desde=None, hasta=None, apps=global_apps):
+    """
+    Recalcula desde cero los resúmenes de los días [desde, hasta]
+    (todo el historial si no se indican) a partir de Venta y VentaItem.
+    Devuelve la cantidad de filas de resumen creadas.
+
+    Recibe el registro de apps para poder usarse también desde migraciones.
+    """
+    return reemplazar(desde, hasta, agregar(desde, hasta, apps=apps), apps=apps)
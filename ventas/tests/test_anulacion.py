@@ -0,0 +1,153 @@
+import threading
+from decimal import Decimal
+from unittest import mock, skipIf
+
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.auth import get_user_model
+from django.db import connection, connections
+from django.db.models import F
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from inventario.models import Producto
+from ventas import anulacion
+from ventas.anulacion import anular_ventas
+from ventas.checkout import registrar_venta
+from ventas.cierres import cerrar_turno
+from ventas.models import CierreTurno, ResumenDiario, Trabajador, Turno, Venta
+
+
+class AnulacionTests(TestCase):
+    def setUp(self):
+        self.productos = [
+            Producto.objects.create(
+                sku=f"AN-{i}", nombre=f"Producto {i}", precio_unitario=Decimal("1000"), stock=1000
+            )
+            for i in range(5)
+        ]
+        self.ana = Trabajador.objects.create(nombre="Ana")
+        self.turno = Turno.objects.create(trabajador=self.ana, turno_tipo="NOCHE")
+
+    def vender(self, n):
+        return [
+            registrar_venta(
+                [{"id": p.id, "cantidad": 2} for p in self.productos],
+                trabajador=self.ana, turno=self.turno,
+            ).id
+            for _ in range(n)
+        ]
+
+    def stock(self):
+        return [p.stock for p in Producto.objects.order_by("id")]
+
+    def test_anular_turno_completo(self):
+        ids = self.vender(4)
+        self.assertEqual(self.stock(), [992] * 5)
+
+        anuladas = anular_ventas(ids, motivo="turno equivocado")
+
+        self.assertEqual(len(anuladas), 4)
+        self.assertEqual(self.stock(), [1000] * 5)
+        self.assertEqual(set(Venta.objects.values_list("estado", flat=True)), {"ANULADA"})
+        dia = ResumenDiario.objects.get()
+        self.assertEqual((dia.ventas, dia.total, dia.unidades), (0, 0, 0))
+
+    def test_anular_dos_veces_no_repone_de_nuevo(self):
+        ids = self.vender(2)
+        anular_ventas(ids[:1])
+        anular_ventas(ids)
+        self.assertEqual(self.stock(), [1000] * 5)
+
+    def test_consultas_fijas(self):
+        def contar(n):
+            ids = self.vender(n)
+            with CaptureQueriesContext(connection) as ctx:
+                anular_ventas(ids)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(contar(1), contar(25))
+
+    def test_consultas_fijas_con_turnos_cerrados(self):
+        def contar(n):
+            ids = []
+            for _ in range(n):
+                self.turno = Turno.objects.create(trabajador=self.ana, turno_tipo="NOCHE")
+                ids += self.vender(1)
+                cerrar_turno(self.turno)
+            with CaptureQueriesContext(connection) as ctx:
+                anular_ventas(ids)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(contar(1), contar(10))
+        cierre = CierreTurno.objects.get(turno=self.turno)
+        self.assertEqual((cierre.ventas, cierre.anuladas, cierre.total_anulado), (0, 1, Decimal("10000")))
+
+    def test_no_pierde_una_venta_concurrente(self):
+        venta_id = self.vender(1)[0]
+        producto = self.productos[0]
+        original = anulacion._items_de
+
+        def otra_caja_vende_entre_medio(ids):
+            items = original(ids)
+            # OTRA CAJA DESCUENTA STOCK DESPUÉS DE QUE SE LEYERON LOS ÍTEMS
+            Producto.objects.filter(id=producto.id).update(stock=F("stock") - 7)
+            return items
+
+        with mock.patch.object(anulacion, "_items_de", otra_caja_vende_entre_medio):
+            Venta.objects.get(id=venta_id).anular()
+
+        producto.refresh_from_db()
+        self.assertEqual(producto.stock, 1000 - 7)
+
+    def test_accion_del_admin(self):
+        ids = self.vender(3)
+        admin = get_user_model().objects.create_superuser("duenio", password="x")
+        self.client.force_login(admin)
+
+        r = self.client.post(reverse("admin:ventas_venta_changelist"), {
+            "action": "anular_seleccionadas",
+            ACTION_CHECKBOX_NAME: ids[:2],
+        })
+        self.assertEqual(r.status_code, 302)
+        self.assertEqual(Venta.objects.filter(estado="ANULADA").count(), 2)
+        self.assertEqual(Venta.objects.get(id=ids[0]).anulada_por, admin)
+
+
+@skipIf(
+    connection.vendor == "sqlite",
+    "SQLite serializa las escrituras: la carrera solo se puede provocar en PostgreSQL.",
+)
+class AnulacionConcurrenteTests(TransactionTestCase):
+    def test_anulaciones_y_ventas_en_paralelo(self):
+        producto = Producto.objects.create(
+            sku="CON-1", nombre="Cerveza", precio_unitario=Decimal("1000"), stock=1000
+        )
+        items = [{"id": producto.id, "cantidad": 3}]
+        a_anular = [registrar_venta(items).id for _ in range(10)]
+        barrera = threading.Barrier(20)
+
+        def anular(venta_id):
+            try:
+                barrera.wait()
+                Venta.objects.get(id=venta_id).anular()
+            finally:
+                connections.close_all()
+
+        def vender():
+            try:
+                barrera.wait()
+                registrar_venta(items)
+            finally:
+                connections.close_all()
+
+        hilos = [threading.Thread(target=anular, args=(v,)) for v in a_anular]
+        hilos += [threading.Thread(target=vender) for _ in range(10)]
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+
+        # 10 VENTAS ANULADAS (+30) Y 10 NUEVAS (-30) SOBRE 1000 - 30
+        producto.refresh_from_db()
+        self.assertEqual(producto.stock, 970)
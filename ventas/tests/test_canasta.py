@@ -0,0 +1,95 @@
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+
+from django.apps import apps as global_apps
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from inventario.models import Producto
+from ventas.anulacion import anular_ventas
+from ventas.canasta import sugerencias
+from ventas.checkout import registrar_venta
+from ventas.models import ParCompra
+
+
+class CanastaTests(TestCase):
+    def setUp(self):
+        self.pisco, self.coca, self.hielo, self.mani = [
+            Producto.objects.create(
+                sku=f"CA-{i}", nombre=nombre, precio_unitario=Decimal("1000"), stock=100
+            )
+            for i, nombre in enumerate(["Pisco", "Coca-Cola 1.5L", "Hielo", "Maní"])
+        ]
+
+    def vender(self, *productos):
+        return registrar_venta([{"id": p.id, "cantidad": 1} for p in productos])
+
+    def pares(self):
+        return {
+            (p.producto_id, p.acompanante_id): p.ventas
+            for p in ParCompra.objects.exclude(ventas=0)
+        }
+
+    def test_confirmar_y_anular_actualizan_los_pares(self):
+        self.vender(self.pisco, self.coca)
+        venta = self.vender(self.pisco, self.coca, self.hielo)
+        self.vender(self.mani)
+
+        self.assertEqual(self.pares()[(self.pisco.id, self.coca.id)], 2)
+        self.assertEqual(self.pares()[(self.coca.id, self.pisco.id)], 2)
+        self.assertEqual(self.pares()[(self.hielo.id, self.pisco.id)], 1)
+        self.assertEqual(len(self.pares()), 6)
+
+        anular_ventas([venta.id])
+        self.assertEqual(self.pares(), {(self.pisco.id, self.coca.id): 1, (self.coca.id, self.pisco.id): 1})
+
+    def test_reconstruir_igual_a_lo_incremental(self):
+        self.vender(self.pisco, self.coca)
+        self.vender(self.pisco, self.hielo, self.mani)
+        anular_ventas([self.vender(self.coca, self.mani).id])
+        incremental = self.pares()
+
+        ParCompra.objects.all().delete()
+        salida = StringIO()
+        call_command("reconstruir_pares", stdout=salida)
+
+        self.assertIn("8 pares guardados", salida.getvalue())
+        self.assertEqual(self.pares(), incremental)
+
+    def test_migracion_rellena_los_pares_de_ventas_anteriores(self):
+        rellenar = import_module("ventas.migrations.0011_rellenar_pares_compra").rellenar_pares
+        vieja = self.vender(self.pisco, self.coca)
+        self.vender(self.pisco, self.coca)
+        # VENTAS HECHAS ANTES DE QUE EXISTIERA LA TABLA
+        ParCompra.objects.all().delete()
+
+        rellenar(global_apps, None)
+        anular_ventas([vieja.id])
+
+        self.assertEqual(self.pares(), {(self.pisco.id, self.coca.id): 1, (self.coca.id, self.pisco.id): 1})
+        self.assertFalse(ParCompra.objects.filter(ventas__lt=0).exists())
+
+    def test_sugerencias_del_carrito(self):
+        for _ in range(3):
+            self.vender(self.pisco, self.coca)
+        self.vender(self.pisco, self.hielo)
+        self.vender(self.hielo, self.mani)
+        Producto.objects.filter(id=self.mani.id).update(bloqueado=True)
+
+        self.assertEqual([s["nombre"] for s in sugerencias([self.pisco.id])], ["Coca-Cola 1.5L", "Hielo"])
+        # LOS DEL CARRITO NO SE SUGIEREN; LOS BLOQUEADOS TAMPOCO
+        self.assertEqual(
+            [(s["nombre"], s["ventas"]) for s in sugerencias([self.coca.id, self.hielo.id])],
+            [("Pisco", 4)],
+        )
+
+        self.client.force_login(get_user_model().objects.create_user("cajero", password="x"))
+        with self.assertNumQueries(3):  # SESIÓN, USUARIO Y LA CONSULTA AL ÍNDICE
+            r = self.client.get(reverse("ventas:sugerencias"), {"ids": f"{self.pisco.id}", "k": 1})
+        self.assertEqual(r.json()["results"][0]["id"], self.coca.id)
+
+        self.assertEqual(self.client.get(reverse("ventas:sugerencias"), {"ids": "x"}).status_code, 400)
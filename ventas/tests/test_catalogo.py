@@ -0,0 +1,58 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from inventario.models import Producto
+from ventas.checkout import registrar_venta
+
+
+class CatalogoTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("caja", password="x")
+        self.client.force_login(self.user)
+        self.pisco = Producto.objects.create(
+            sku="PIS-001", nombre="Pisco Mistral", precio_unitario=Decimal("6500"), stock=10
+        )
+        self.ron = Producto.objects.create(
+            sku="RUM-001", nombre="Ron Pampero", precio_unitario=Decimal("6200"), stock=5
+        )
+        Producto.objects.create(sku="OLD-001", nombre="Descontinuado", activo=False)
+
+    def test_snapshot_solo_activos_con_version(self):
+        data = self.client.get(reverse("ventas:catalogo")).json()
+
+        self.assertEqual({p["sku"] for p in data["productos"]}, {"PIS-001", "RUM-001"})
+        self.assertGreater(data["version"], 0)
+        self.assertEqual(data["productos"][0]["precio"], 6500.0)
+
+    def test_cambios_desde_version(self):
+        version = self.client.get(reverse("ventas:catalogo")).json()["version"]
+        # FUERA DEL MARGEN DE CAMBIOS
+        version += 60 * 10 ** 6
+
+        data = self.client.get(reverse("ventas:catalogo_cambios"), {"version": version}).json()
+        self.assertEqual(data["productos"], [])
+        self.assertEqual(data["version"], version)
+        self.assertEqual(data["total_activos"], 2)
+
+    def test_venta_aparece_en_cambios(self):
+        data = self.client.get(reverse("ventas:catalogo")).json()
+        registrar_venta([{"id": self.ron.id, "cantidad": 2}])
+
+        cambios = self.client.get(
+            reverse("ventas:catalogo_cambios"), {"version": data["version"]}
+        ).json()
+        ron = next(p for p in cambios["productos"] if p["id"] == self.ron.id)
+        self.assertEqual(ron["stock"], 3)
+        self.assertGreaterEqual(cambios["version"], data["version"])
+
+    def test_version_invalida(self):
+        r = self.client.get(reverse("ventas:catalogo_cambios"), {"version": "abc"})
+        self.assertEqual(r.status_code, 400)
+
+    def test_version_fuera_de_rango(self):
+        for version in ("99999999999999999999999", "-100000000000000000"):
+            r = self.client.get(reverse("ventas:catalogo_cambios"), {"version": version})
+            self.assertEqual(r.status_code, 400)
@@ -0,0 +1,309 @@
+import json
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from inventario.models import Producto, AlertaStock
+from ventas.models import ResumenDiario, Venta, VentaItem
+
+
+class ConfirmarVentaTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("caja", password="x")
+        self.client.force_login(self.user)
+        self.productos = [
+            Producto.objects.create(
+                sku=f"SKU-{i:03d}",
+                nombre=f"Producto {i}",
+                precio_unitario=Decimal("1000.00"),
+                stock=10,
+                stock_minimo=2,
+            )
+            for i in range(20)
+        ]
+
+    def confirmar(self, items):
+        return self.client.post(
+            reverse("ventas:confirmar"),
+            data=json.dumps({"items": items}),
+            content_type="application/json",
+        )
+
+    def test_venta_descuenta_stock_y_crea_items(self):
+        p1, p2 = self.productos[:2]
+        r = self.confirmar([
+            {"id": p1.id, "cantidad": 3},
+            {"id": p2.id, "cantidad": 1},
+            {"id": p1.id, "cantidad": 1},
+        ])
+        self.assertEqual(r.status_code, 200)
+
+        venta = Venta.objects.get(id=r.json()["venta_id"])
+        self.assertEqual(venta.estado, "CONFIRMADA")
+        self.assertEqual(venta.total, Decimal("5000.00"))
+        self.assertEqual(venta.items.count(), 2)
+        self.assertEqual(venta.items.get(producto=p1).subtotal, Decimal("4000.00"))
+
+        p1.refresh_from_db()
+        p2.refresh_from_db()
+        self.assertEqual(p1.stock, 6)
+        self.assertEqual(p2.stock, 9)
+
+    def test_consultas_no_crecen_con_el_carrito(self):
+        def contar(productos):
+            with CaptureQueriesContext(connection) as ctx:
+                r = self.confirmar([{"id": p.id, "cantidad": 1} for p in productos])
+            self.assertEqual(r.status_code, 200)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(contar(self.productos[:2]), contar(self.productos[2:17]))
+
+    def test_stock_insuficiente_no_guarda_nada(self):
+        p1, p2 = self.productos[:2]
+        r = self.confirmar([
+            {"id": p1.id, "cantidad": 1},
+            {"id": p2.id, "cantidad": 11},
+        ])
+        self.assertEqual(r.status_code, 400)
+        self.assertIn("Stock insuficiente", r.content.decode())
+
+        self.assertFalse(Venta.objects.exists())
+        self.assertFalse(VentaItem.objects.exists())
+        p1.refresh_from_db()
+        self.assertEqual(p1.stock, 10)
+
+    def test_update_condicional_impide_sobreventa(self):
+        from ventas.checkout import VentaError, descontar_stock
+
+        p1 = self.productos[0]
+        # OTRA CAJA VENDIÓ ENTRE LA VALIDACIÓN Y EL UPDATE
+        Producto.objects.filter(id=p1.id).update(stock=1)
+
+        with self.assertRaises(VentaError):
+            descontar_stock({p1.id: 2})
+
+        p1.refresh_from_db()
+        self.assertEqual(p1.stock, 1)
+
+    def test_producto_bloqueado(self):
+        p1 = self.productos[0]
+        p1.bloqueado = True
+        p1.save()
+
+        r = self.confirmar([{"id": p1.id, "cantidad": 1}])
+        self.assertEqual(r.status_code, 400)
+        self.assertIn("bloqueado", r.content.decode())
+
+    def test_producto_inexistente(self):
+        r = self.confirmar([{"id": 999999, "cantidad": 1}])
+        self.assertEqual(r.status_code, 400)
+        self.assertIn("Producto no encontrado", r.content.decode())
+
+    def test_alerta_stock_una_sola_vez(self):
+        p1 = self.productos[0]
+        self.confirmar([{"id": p1.id, "cantidad": 8}])
+        self.confirmar([{"id": p1.id, "cantidad": 1}])
+
+        self.assertEqual(AlertaStock.objects.filter(producto=p1, atendida=False).count(), 1)
+
+
+class IdempotenciaVentaTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("caja", password="x")
+        self.client.force_login(self.user)
+        self.producto = Producto.objects.create(
+            sku="IDEM-001",
+            nombre="Pisco 35",
+            precio_unitario=Decimal("5000.00"),
+            stock=10,
+        )
+
+    def confirmar(self, clave):
+        return self.client.post(
+            reverse("ventas:confirmar"),
+            data=json.dumps({
+                "items": [{"id": self.producto.id, "cantidad": 2}],
+                "clave": clave,
+            }),
+            content_type="application/json",
+        )
+
+    def test_reintento_devuelve_la_venta_original(self):
+        r1 = self.confirmar("caja1-abc")
+        with CaptureQueriesContext(connection) as ctx:
+            r2 = self.confirmar("caja1-abc")
+
+        self.assertEqual(r1.status_code, 200)
+        self.assertEqual(r1.json(), r2.json())
+        self.assertEqual(r2["Idempotent-Replay"], "true")
+        self.assertEqual(Venta.objects.count(), 1)
+
+        # EL REINTENTO NO VUELVE A EJECUTAR EL CHECKOUT
+        self.assertFalse(any("UPDATE" in q["sql"] for q in ctx.captured_queries))
+
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, 8)
+
+    def test_claves_distintas_crean_ventas_distintas(self):
+        self.confirmar("caja1-abc")
+        self.confirmar("caja1-def")
+        self.assertEqual(Venta.objects.count(), 2)
+
+    def test_carrera_entre_reintentos(self):
+        from ventas.checkout import registrar_venta
+
+        items = [{"id": self.producto.id, "cantidad": 1}]
+        primera = registrar_venta(items, clave="caja1-xyz")
+        # LA SEGUNDA PETICIÓN NO VIO LA PRIMERA Y CHOCA CON EL ÍNDICE ÚNICO
+        segunda = registrar_venta(items, clave="caja1-xyz")
+
+        self.assertEqual(primera.id, segunda.id)
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, 9)
+
+
+class ConfirmarLoteTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("caja", password="x")
+        self.client.force_login(self.user)
+        self.cerveza = Producto.objects.create(
+            sku="LOT-001", nombre="Cerveza", precio_unitario=Decimal("1000"), stock=5
+        )
+        self.vino = Producto.objects.create(
+            sku="LOT-002", nombre="Vino", precio_unitario=Decimal("2500"), stock=5, bloqueado=True
+        )
+
+    def enviar(self, ventas):
+        return self.client.post(
+            reverse("ventas:confirmar_lote"),
+            data=json.dumps({"ventas": ventas}),
+            content_type="application/json",
+        )
+
+    def test_resultado_por_venta(self):
+        r = self.enviar([
+            {"clave": "a", "items": [{"id": self.cerveza.id, "cantidad": 2}]},
+            {"clave": "b", "items": [{"id": self.cerveza.id, "cantidad": 9}]},
+            {"clave": "c", "items": [{"id": self.vino.id, "cantidad": 1}]},
+            {"clave": "d", "items": [{"id": self.cerveza.id, "cantidad": 3}]},
+        ])
+        self.assertEqual(r.status_code, 200)
+        estados = [res["estado"] for res in r.json()["resultados"]]
+        self.assertEqual(estados, ["ok", "stock", "bloqueado", "ok"])
+
+        self.assertEqual(Venta.objects.count(), 2)
+        self.cerveza.refresh_from_db()
+        self.assertEqual(self.cerveza.stock, 0)
+
+    def test_reenvio_del_lote_no_duplica(self):
+        ventas = [{"clave": "a", "items": [{"id": self.cerveza.id, "cantidad": 1}]}]
+        primera = self.enviar(ventas).json()["resultados"][0]
+        segunda = self.enviar(ventas).json()["resultados"][0]
+
+        self.assertEqual(primera["venta_id"], segunda["venta_id"])
+        self.assertTrue(segunda["repetida"])
+        self.assertEqual(Venta.objects.count(), 1)
+
+    def test_lote_vacio(self):
+        self.assertEqual(self.enviar([]).status_code, 400)
+
+    def test_cuerpo_que_no_es_objeto(self):
+        for cuerpo in ("[1, 2]", '"x"', "3"):
+            r = self.client.post(reverse("ventas:confirmar_lote"), data=cuerpo, content_type="application/json")
+            self.assertEqual(r.status_code, 400)
+
+    def test_formato_invalido_por_venta(self):
+        r = self.enviar([
+            "basura",
+            {"clave": "a", "items": 5},
+            {"clave": "b", "items": [{"id": self.cerveza.id, "cantidad": 1}]},
+        ])
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual([res["estado"] for res in r.json()["resultados"]], ["invalida", "invalida", "ok"])
+        self.assertEqual(Venta.objects.count(), 1)
+
+    def test_error_de_base_de_datos_no_deshace_las_demas(self):
+        from django.db import DataError
+        from ventas import views
+
+        original = views.registrar_venta
+
+        def falla_la_segunda(items, **kwargs):
+            if kwargs["clave"] == "b":
+                raise DataError("valor fuera de rango")
+            return original(items, **kwargs)
+
+        with mock.patch.object(views, "registrar_venta", falla_la_segunda):
+            r = self.enviar([
+                {"clave": clave, "items": [{"id": self.cerveza.id, "cantidad": 1}]}
+                for clave in ("a", "b", "c")
+            ])
+
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual([res["estado"] for res in r.json()["resultados"]], ["ok", "error", "ok"])
+        self.assertEqual(
+            set(Venta.objects.values_list("clave_idempotencia", flat=True)), {"a", "c"}
+        )
+
+    def test_conserva_la_hora_original(self):
+        ahora = timezone.now()
+        hace_dos_horas = (ahora - timedelta(hours=2)).replace(microsecond=0)
+        r = self.enviar([
+            {"clave": "a", "fecha": hace_dos_horas.isoformat(), "items": [{"id": self.cerveza.id, "cantidad": 1}]},
+            # RELOJ DE LA CAJA ADELANTADO: QUEDA CON LA HORA ACTUAL
+            {"clave": "b", "fecha": (ahora + timedelta(days=1)).isoformat(), "items": [{"id": self.cerveza.id, "cantidad": 1}]},
+            {"clave": "c", "fecha": (ahora - timedelta(days=30)).isoformat(), "items": [{"id": self.cerveza.id, "cantidad": 1}]},
+            {"clave": "d", "fecha": "ayer", "items": [{"id": self.cerveza.id, "cantidad": 1}]},
+        ])
+        self.assertEqual([res["estado"] for res in r.json()["resultados"]], ["ok", "ok", "fecha", "fecha"])
+
+        self.assertEqual(Venta.objects.get(clave_idempotencia="a").fecha, hace_dos_horas)
+        self.assertLessEqual(Venta.objects.get(clave_idempotencia="b").fecha, timezone.now())
+        resumen = ResumenDiario.objects.get(fecha=timezone.localdate(hace_dos_horas))
+        self.assertGreaterEqual(resumen.ventas, 1)
+
+
+class EscanerTests(TestCase):
+    def setUp(self):
+        from inventario import cache_sku
+
+        cache_sku.limpiar()
+        self.user = get_user_model().objects.create_user("caja", password="x")
+        self.client.force_login(self.user)
+        self.producto = Producto.objects.create(
+            sku="7801234567890", nombre="Cerveza Escudo", precio_unitario=Decimal("1000"), stock=4
+        )
+
+    def test_escanear_sku_exacto(self):
+        r = self.client.get(reverse("ventas:escanear"), {"sku": "7801234567890"})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json()["id"], self.producto.id)
+
+        r = self.client.get(reverse("ventas:escanear"), {"sku": "780123"})
+        self.assertEqual(r.status_code, 404)
+
+    def test_confirmar_con_sku(self):
+        r = self.client.post(
+            reverse("ventas:confirmar"),
+            data=json.dumps({"items": [{"sku": "7801234567890", "cantidad": 3}]}),
+            content_type="application/json",
+        )
+        self.assertEqual(r.status_code, 200)
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.stock, 1)
+
+    def test_confirmar_con_sku_desconocido(self):
+        r = self.client.post(
+            reverse("ventas:confirmar"),
+            data=json.dumps({"items": [{"sku": "000", "cantidad": 1}]}),
+            content_type="application/json",
+        )
+        self.assertEqual(r.status_code, 400)
+        self.assertIn("000", r.content.decode())
@@ -0,0 +1,113 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from inventario.models import Categoria, Producto
+from ventas.anulacion import anular_ventas
+from ventas.checkout import registrar_venta
+from ventas.cierres import cerrar_turno, resumen_turno
+from ventas.models import CierreTurno, Trabajador, Turno
+
+
+class CierreTurnoTests(TestCase):
+    def setUp(self):
+        self.cerveza = Producto.objects.create(
+            sku="CT-1", nombre="Cerveza", categoria=Categoria.objects.create(nombre="Cervezas"),
+            precio_unitario=Decimal("1000"), costo=Decimal("600"), stock=100,
+        )
+        self.pisco = Producto.objects.create(
+            sku="CT-2", nombre="Pisco", precio_unitario=Decimal("5000"), costo=Decimal("4000"), stock=100,
+        )
+        self.ana = Trabajador.objects.create(nombre="Ana", turno_base="NOCHE")
+        self.turno = Turno.objects.create(
+            trabajador=self.ana, turno_tipo="NOCHE", hora_inicio=timezone.now()
+        )
+
+    def vender(self, turno=None, cerveza=2, pisco=1):
+        items = [{"id": self.cerveza.id, "cantidad": cerveza}, {"id": self.pisco.id, "cantidad": pisco}]
+        return registrar_venta(
+            [i for i in items if i["cantidad"]], trabajador=self.ana, turno=turno or self.turno,
+        )
+
+    def test_resumen_en_vivo(self):
+        self.vender()
+        anulada = self.vender()
+        anular_ventas([anulada.id])
+
+        resumen = resumen_turno(self.turno)
+        self.assertEqual(resumen["ventas"], 1)
+        self.assertEqual(resumen["total"], Decimal("7000"))
+        self.assertEqual(resumen["anuladas"], 1)
+        self.assertEqual(resumen["total_anulado"], Decimal("7000"))
+        self.assertEqual(resumen["unidades"], 3)
+        self.assertEqual(resumen["margen"], Decimal("1800"))
+        self.assertEqual(
+            [(c["categoria"], c["unidades"], Decimal(c["total"])) for c in resumen["por_categoria"]],
+            [("Sin categoría", 1, Decimal("5000")), ("Cervezas", 2, Decimal("2000"))],
+        )
+
+    def test_cerrar_guarda_el_resumen_una_vez(self):
+        self.vender()
+        cierre = cerrar_turno(self.turno)
+
+        self.turno.refresh_from_db()
+        self.assertFalse(self.turno.activo)
+        self.assertIsNotNone(self.turno.hora_fin)
+        self.assertEqual((cierre.ventas, cierre.total), (1, Decimal("7000")))
+
+        self.assertEqual(cerrar_turno(self.turno).pk, cierre.pk)
+        self.assertEqual(CierreTurno.objects.count(), 1)
+
+    def test_anular_en_turno_cerrado_actualiza_el_cierre(self):
+        venta = self.vender()
+        self.vender()
+        cerrar_turno(self.turno)
+
+        anular_ventas([venta.id])
+
+        cierre = CierreTurno.objects.get()
+        self.assertEqual((cierre.ventas, cierre.anuladas), (1, 1))
+        self.assertEqual(cierre.total, Decimal("7000"))
+
+    def test_vista_cerrar_turno_e_impresion(self):
+        self.client.force_login(get_user_model().objects.create_superuser("duenio", password="x"))
+        self.vender()
+        session = self.client.session
+        session["trabajador_id"] = self.ana.id
+        session["turno_id"] = self.turno.id
+        session.save()
+
+        self.assertContains(self.client.get(reverse("menu_trabajador")), "Resumen del turno")
+
+        parcial = self.client.get(reverse("ventas:cierre_txt", args=[self.turno.id]))
+        self.assertIn("PARCIAL", parcial.content.decode())
+
+        self.client.get(reverse("cerrar_turno"))
+        self.assertTrue(CierreTurno.objects.filter(turno=self.turno).exists())
+
+        texto = self.client.get(reverse("ventas:cierre_txt", args=[self.turno.id])).content.decode()
+        self.assertNotIn("PARCIAL", texto)
+        self.assertIn("Cervezas", texto)
+        self.assertIn("7000", texto)
+
+    def test_reporte_por_trabajador_lee_los_cierres(self):
+        self.client.force_login(get_user_model().objects.create_superuser("duenio", password="x"))
+        self.vender()
+        cerrar_turno(self.turno)
+        abierto = Turno.objects.create(trabajador=self.ana, turno_tipo="NOCHE")
+        self.vender(turno=abierto, cerveza=1, pisco=0)
+
+        r = self.client.get(reverse("lista_trabajadores"), {"periodo": "hoy"})
+        self.assertEqual(
+            r.context["estadisticas"],
+            [{"trabajador_nombre": "Ana", "total_ventas": 2, "total_monto": Decimal("8000")}],
+        )
+        self.assertEqual(len(r.context["ultimos_cierres"]), 1)
+
+        # UNA VENTA CON TRABAJADOR PERO SIN TURNO TAMBIÉN CUENTA
+        registrar_venta([{"id": self.cerveza.id, "cantidad": 1}], trabajador=self.ana)
+        r = self.client.get(reverse("lista_trabajadores"), {"periodo": "hoy"})
+        self.assertEqual(r.context["estadisticas"][0]["total_monto"], Decimal("9000"))
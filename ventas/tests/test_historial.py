@@ -0,0 +1,122 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from inventario import stock_bajo
+from inventario.models import Producto
+from ventas.checkout import registrar_venta
+from ventas.models import Trabajador, Turno, Venta
+from ventas.views import VENTAS_POR_PAGINA
+
+
+class HistorialTests(TestCase):
+    def setUp(self):
+        self.client.force_login(get_user_model().objects.create_superuser("duenio", password="x"))
+        self.cerveza = Producto.objects.create(
+            sku="H-1", nombre="Cerveza", precio_unitario=Decimal("1000"), stock=10000
+        )
+        self.vino = Producto.objects.create(
+            sku="H-2", nombre="Vino", precio_unitario=Decimal("3000"), stock=10000
+        )
+        self.ana = Trabajador.objects.create(nombre="Ana")
+        self.turno = Turno.objects.create(trabajador=self.ana, turno_tipo="DIA")
+
+    def crear_ventas(self, n, **kwargs):
+        # VARIAS VENTAS CON LA MISMA FECHA: EL id DESEMPATA EL CURSOR
+        fecha = timezone.now() - timedelta(hours=1)
+        ventas = []
+        for i in range(n):
+            venta = registrar_venta(
+                [{"id": self.cerveza.id, "cantidad": 2}, {"id": self.vino.id, "cantidad": 1}],
+                **kwargs,
+            )
+            Venta.objects.filter(id=venta.id).update(fecha=fecha - timedelta(minutes=i // 3))
+            ventas.append(venta.id)
+        return ventas
+
+    def orden_esperado(self, ventas):
+        return list(ventas.order_by("-fecha", "-id").values_list("id", flat=True))
+
+    def recorrer(self, url, params=None):
+        ids, paginas = [], 0
+        r = self.client.get(url, params or {})
+        while True:
+            paginas += 1
+            ids += [v.id for v in r.context["ventas"]]
+            if not r.context["pagina_siguiente"]:
+                return ids, paginas
+            r = self.client.get(url + r.context["pagina_siguiente"])
+
+    def test_recorre_todas_las_ventas_sin_repetir(self):
+        self.crear_ventas(VENTAS_POR_PAGINA * 2 + 7)
+        ids, paginas = self.recorrer(reverse("ventas:historial"))
+
+        self.assertEqual(paginas, 3)
+        self.assertEqual(ids, self.orden_esperado(Venta.objects.all()))
+
+    def test_volver_a_la_pagina_anterior(self):
+        self.crear_ventas(VENTAS_POR_PAGINA * 2 + 7)
+        url = reverse("ventas:historial")
+        primera = self.client.get(url).context
+        segunda = self.client.get(url + primera["pagina_siguiente"]).context
+        vuelta = self.client.get(url + segunda["pagina_anterior"]).context
+
+        self.assertEqual([v.id for v in vuelta["ventas"]], [v.id for v in primera["ventas"]])
+
+    def test_conteo_de_items_y_consultas_constantes(self):
+        self.crear_ventas(VENTAS_POR_PAGINA * 3)
+        url = reverse("ventas:historial")
+        stock_bajo.total()  # CONTADOR DEL MENÚ YA EN CACHÉ
+
+        with CaptureQueriesContext(connection) as ctx:
+            r = self.client.get(url)
+        primera = len(ctx.captured_queries)
+        venta = r.context["ventas"][0]
+        self.assertEqual((venta.n_items, venta.unidades), (2, 3))
+
+        siguiente = url + r.context["pagina_siguiente"]
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(siguiente)
+        self.assertEqual(len(ctx.captured_queries), primera)
+
+    def test_filtros(self):
+        self.crear_ventas(3)
+        del_turno = self.crear_ventas(2, trabajador=self.ana, turno=self.turno)
+        Venta.objects.get(id=del_turno[0]).anular()
+
+        url = reverse("ventas:historial")
+        self.assertEqual(
+            self.recorrer(url, {"trabajador": self.ana.id})[0],
+            self.orden_esperado(Venta.objects.filter(id__in=del_turno)),
+        )
+        self.assertEqual(self.recorrer(url, {"turno": self.turno.id, "estado": "ANULADA"})[0], del_turno[:1])
+
+        ayer = (timezone.localdate() - timedelta(days=1)).isoformat()
+        self.assertEqual(self.recorrer(url, {"hasta": ayer})[0], [])
+
+        # LOS FILTROS SE CONSERVAN AL CAMBIAR DE PÁGINA
+        self.crear_ventas(VENTAS_POR_PAGINA + 1, trabajador=self.ana)
+        r = self.client.get(url, {"trabajador": self.ana.id})
+        self.assertIn(f"trabajador={self.ana.id}", r.context["pagina_siguiente"])
+
+    def test_anular_vuelve_al_historial(self):
+        venta_id = self.crear_ventas(1)[0]
+        r = self.client.post(reverse("ventas:anular", args=[venta_id]), {"motivo": "error"})
+        self.assertRedirects(r, reverse("ventas:historial"))
+        self.assertEqual(Venta.objects.get(id=venta_id).estado, "ANULADA")
+
+    def test_cajero_no_puede_ver_ni_anular(self):
+        venta_id = self.crear_ventas(1)[0]
+        self.client.force_login(get_user_model().objects.create_user("caja", password="x"))
+
+        self.assertEqual(self.client.get(reverse("ventas:historial")).status_code, 403)
+        self.assertEqual(self.client.get(reverse("ventas:anular", args=[venta_id])).status_code, 403)
+        r = self.client.post(reverse("ventas:anular", args=[venta_id]), {"motivo": "error"})
+        self.assertEqual(r.status_code, 403)
+        self.assertEqual(Venta.objects.get(id=venta_id).estado, "CONFIRMADA")
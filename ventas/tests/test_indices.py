@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase
+from django.utils import timezone
+
+from inventario.models import Producto, AlertaStock
+from ventas.models import Venta, VentaItem
+
+
+class IndicesConsultasFrecuentesTests(TestCase):
+    """
+    Revisa con EXPLAIN que cada consulta frecuente use su índice.
+    En PostgreSQL se desactiva el seq scan para que, con tablas vacías,
+    el plan muestre si el índice es utilizable.
+    """
+
+    def setUp(self):
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def assertUsaIndice(self, queryset, indice):
+        plan = queryset.explain()
+        self.assertIn(indice, plan, plan)
+
+    def test_ventas_confirmadas_por_rango(self):
+        ahora = timezone.now()
+        qs = Venta.objects.filter(
+            estado="CONFIRMADA", fecha__gte=ahora - timedelta(days=30), fecha__lt=ahora
+        )
+        self.assertUsaIndice(qs, "venta_estado_fecha_idx")
+
+    def test_historial_por_cursor(self):
+        ahora = timezone.now()
+        qs = Venta.objects.filter(
+            Q(fecha__lt=ahora) | Q(fecha=ahora, id__lt=100), fecha__lte=ahora
+        ).order_by("-fecha", "-id")[:51]
+        self.assertUsaIndice(qs, "venta_fecha_id_idx")
+
+    def test_items_de_ventas(self):
+        qs = VentaItem.objects.filter(venta_id__in=[1, 2, 3]).values("producto_id")
+        self.assertUsaIndice(qs, "ventaitem_venta_producto_idx")
+
+    def test_productos_vendibles_por_nombre(self):
+        qs = Producto.objects.filter(activo=True, bloqueado=False).order_by("nombre")[:20]
+        self.assertUsaIndice(qs, "producto_vendible_idx")
+
+    def test_stock_bajo(self):
+        qs = Producto.objects.filter(stock_bajo=True).order_by("stock")
+        self.assertUsaIndice(qs, "producto_stock_bajo_idx")
+
+    def test_alertas_abiertas_de_productos(self):
+        qs = AlertaStock.objects.filter(producto_id__in=[1, 2], atendida=False)
+        self.assertUsaIndice(qs, "alerta_abierta_unica")
+
+    def test_alertas_abiertas_recientes(self):
+        qs = AlertaStock.objects.filter(atendida=False).order_by("-creado_en")[:20]
+        self.assertUsaIndice(qs, "alerta_abierta_creado_idx")
+
+    def test_una_alerta_abierta_por_producto(self):
+        from django.db import IntegrityError, transaction
+
+        p = Producto.objects.create(sku="IDX-001", nombre="Producto")
+        AlertaStock.objects.create(producto=p, mensaje="a", atendida=True)
+        AlertaStock.objects.create(producto=p, mensaje="b")
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            AlertaStock.objects.create(producto=p, mensaje="c")
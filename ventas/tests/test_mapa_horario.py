@@ -0,0 +1,92 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from inventario.models import Producto
+from ventas import mapa_horario
+from ventas.anulacion import anular_ventas
+from ventas.checkout import registrar_venta
+from ventas.models import Venta
+
+SANTIAGO = ZoneInfo("America/Santiago")
+
+
+class MapaHorarioTests(TestCase):
+    def setUp(self):
+        mapa_horario.limpiar()
+        self.producto = Producto.objects.create(
+            sku="MH-1", nombre="Cerveza", precio_unitario=Decimal("1000"), stock=1000
+        )
+
+    def vender(self, cuando, cantidad=1):
+        venta = registrar_venta([{"id": self.producto.id, "cantidad": cantidad}])
+        Venta.objects.filter(id=venta.id).update(fecha=cuando)
+        return venta
+
+    def test_hora_local_y_dia_de_la_semana(self):
+        # LUNES 2025-03-03 23:30 EN SANTIAGO ES MARTES 02:30 UTC
+        self.vender(datetime(2025, 3, 3, 23, 30, tzinfo=SANTIAGO), cantidad=2)
+        self.vender(datetime(2025, 3, 3, 23, 50, tzinfo=SANTIAGO))
+        # DOMINGO 2025-03-09 10:05
+        self.vender(datetime(2025, 3, 9, 10, 5, tzinfo=SANTIAGO), cantidad=4)
+
+        matriz = mapa_horario.mapa_horario(date(2025, 3, 1), date(2025, 3, 31))
+
+        self.assertEqual(matriz[0][23], [2, 3, Decimal("3000")])
+        self.assertEqual(matriz[6][10], [1, 4, Decimal("4000")])
+        self.assertEqual(sum(c[0] for fila in matriz for c in fila), 3)
+
+    def test_dias_cerrados_en_cache(self):
+        self.vender(datetime(2025, 3, 4, 12, 0, tzinfo=SANTIAGO))
+        mapa_horario.mapa_horario(date(2025, 3, 1), date(2025, 3, 31))
+
+        with self.assertNumQueries(0):
+            matriz = mapa_horario.mapa_horario(date(2025, 3, 1), date(2025, 3, 31))
+        self.assertEqual(matriz[1][12][0], 1)
+
+    def test_hoy_siempre_en_vivo(self):
+        hoy = timezone.localdate()
+        mapa_horario.mapa_horario(hoy - timedelta(days=7), hoy)
+        registrar_venta([{"id": self.producto.id, "cantidad": 1}])
+
+        with self.assertNumQueries(1):
+            matriz = mapa_horario.mapa_horario(hoy - timedelta(days=7), hoy)
+        self.assertEqual(sum(c[0] for fila in matriz for c in fila), 1)
+
+    def test_anulacion_invalida_el_dia(self):
+        venta = self.vender(datetime(2025, 3, 4, 12, 0, tzinfo=SANTIAGO))
+        mapa_horario.mapa_horario(date(2025, 3, 1), date(2025, 3, 31))
+
+        anular_ventas([venta.id])
+
+        matriz = mapa_horario.mapa_horario(date(2025, 3, 1), date(2025, 3, 31))
+        self.assertEqual(matriz[1][12], [0, 0, 0])
+
+    def test_venta_encolada_de_ayer_invalida_el_dia(self):
+        ayer = timezone.localdate() - timedelta(days=1)
+        mapa_horario.mapa_horario(ayer, ayer)
+
+        cuando = timezone.make_aware(datetime.combine(ayer, datetime.min.time()).replace(hour=12))
+        with self.captureOnCommitCallbacks(execute=True):
+            registrar_venta([{"id": self.producto.id, "cantidad": 1}], fecha=cuando)
+
+        matriz = mapa_horario.mapa_horario(ayer, ayer)
+        self.assertEqual(matriz[ayer.weekday()][12][0], 1)
+
+    def test_panel_en_analisis(self):
+        self.client.force_login(get_user_model().objects.create_superuser("duenio", password="x"))
+        self.vender(datetime(2025, 3, 4, 12, 0, tzinfo=SANTIAGO), cantidad=3)
+
+        r = self.client.get(
+            reverse("analisis:index"), {"desde": "2025-03-01", "hasta": "2025-03-31", "mapa": "unidades"}
+        )
+        fila = r.context["mapa_filas"][1]
+        self.assertEqual(fila["dia"], "Mar")
+        self.assertEqual(fila["celdas"][12]["etiqueta"], 3)
+        self.assertEqual(fila["celdas"][12]["intensidad"], 1.0)
+        self.assertContains(r, "¿Cuándo vendemos?")
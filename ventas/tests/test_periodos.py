@@ -0,0 +1,105 @@
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ventas.models import Trabajador, Venta
+from ventas.periodos import (
+    filtro_dias, hace_un_anio, leer_rango, periodos_comparados, rango_dia, rango_mes, rango_semana,
+    un_anio_despues,
+)
+
+UTC = dt_timezone.utc
+
+
+@override_settings(TIME_ZONE="America/Santiago")
+class PeriodosTests(TestCase):
+    def test_dias_con_cambio_de_horario(self):
+        # EL 2025-04-05 DURA 25 H (SE ATRASA EL RELOJ); EL 2025-09-07, 23 H (SE ADELANTA)
+        inicio, fin = rango_dia(date(2025, 4, 6))
+        self.assertEqual(inicio, datetime(2025, 4, 6, 4, tzinfo=UTC))
+        self.assertEqual(fin - inicio, timedelta(hours=24))
+        self.assertEqual(rango_dia(date(2025, 4, 5))[1] - rango_dia(date(2025, 4, 5))[0], timedelta(hours=25))
+
+        # LA MEDIANOCHE DEL 7 NO EXISTE: EL DÍA PARTE A LAS 01:00 LOCAL
+        inicio, fin = rango_dia(date(2025, 9, 7))
+        self.assertEqual(inicio, datetime(2025, 9, 7, 4, tzinfo=UTC))
+        self.assertEqual(fin - inicio, timedelta(hours=23))
+
+    def test_semana_y_mes(self):
+        self.assertEqual(rango_semana(date(2025, 9, 10)), (
+            datetime(2025, 9, 8, 3, tzinfo=UTC), datetime(2025, 9, 15, 3, tzinfo=UTC),
+        ))
+        self.assertEqual(rango_mes(date(2025, 2, 14)), (
+            datetime(2025, 2, 1, 3, tzinfo=UTC), datetime(2025, 3, 1, 3, tzinfo=UTC),
+        ))
+
+    def test_filtro_igual_a_fecha_local(self):
+        # UNA VENTA CADA HORA ALREDEDOR DE LOS DOS CAMBIOS DE HORARIO
+        instantes = []
+        for inicio in (datetime(2025, 4, 4, tzinfo=UTC), datetime(2025, 9, 5, tzinfo=UTC)):
+            instantes += [inicio + timedelta(hours=h) for h in range(96)]
+        for instante in instantes:
+            venta = Venta.objects.create(total=Decimal("1000"))
+            Venta.objects.filter(id=venta.id).update(fecha=instante)
+
+        for dia in [date(2025, 4, d) for d in range(4, 8)] + [date(2025, 9, d) for d in range(5, 9)]:
+            esperado = {i for i in instantes if timezone.localdate(i) == dia}
+            obtenido = set(Venta.objects.filter(filtro_dias(dia, dia)).values_list("fecha", flat=True))
+            self.assertEqual(obtenido, esperado, dia)
+
+    def test_rango_usa_indice_de_fecha(self):
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+        qs = Venta.objects.filter(filtro_dias(date(2025, 1, 1), date(2025, 1, 31)), estado="CONFIRMADA")
+        plan = qs.explain()
+        self.assertIn("venta_estado_fecha_idx", plan, plan)
+        self.assertNotIn("django_datetime_cast_date", str(qs.query))
+
+    def test_leer_rango(self):
+        self.assertEqual(
+            leer_rango({"desde": "2025-03-10", "hasta": "2025-03-01"}),
+            (date(2025, 3, 1), date(2025, 3, 10)),
+        )
+        hoy = timezone.localdate()
+        self.assertEqual(leer_rango({"desde": "basura"}), (hoy - timedelta(days=30), hoy))
+
+    def test_periodos_comparados(self):
+        self.assertEqual(
+            periodos_comparados(date(2025, 3, 1), date(2025, 3, 10)),
+            {
+                "actual": (date(2025, 3, 1), date(2025, 3, 10)),
+                "anterior": (date(2025, 2, 19), date(2025, 2, 28)),
+                "anio": (date(2024, 3, 1), date(2024, 3, 10)),
+            },
+        )
+        # EL 29 DE FEBRERO SE COMPARA CON EL 28 DEL AÑO ANTERIOR
+        self.assertEqual(hace_un_anio(date(2024, 2, 29)), date(2023, 2, 28))
+        self.assertEqual(un_anio_despues(date(2024, 2, 29)), date(2025, 2, 28))
+
+
+class ListaTrabajadoresPeriodoTests(TestCase):
+    def test_filtra_por_periodo(self):
+        admin = get_user_model().objects.create_superuser("duenio", password="x")
+        self.client.force_login(admin)
+        ana = Trabajador.objects.create(nombre="Ana")
+        Venta.objects.create(trabajador=ana, estado="CONFIRMADA", total=Decimal("1000"))
+        vieja = Venta.objects.create(trabajador=ana, estado="CONFIRMADA", total=Decimal("5000"))
+        Venta.objects.filter(id=vieja.id).update(fecha=timezone.now() - timedelta(days=40))
+
+        r = self.client.get(reverse("lista_trabajadores"), {"periodo": "hoy"})
+        self.assertEqual(r.context["estadisticas"][0]["total_monto"], Decimal("1000"))
+
+        r = self.client.get(reverse("lista_trabajadores"), {"periodo": "todo"})
+        self.assertEqual(r.context["estadisticas"][0]["total_monto"], Decimal("6000"))
+
+        # SIN PERIODO: TODO EL HISTORIAL
+        r = self.client.get(reverse("lista_trabajadores"))
+        self.assertEqual(r.context["periodo"], "todo")
+        self.assertEqual(r.context["estadisticas"][0]["total_monto"], Decimal("6000"))
@@ -0,0 +1,180 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from inventario.models import Categoria, Producto
+from ventas.checkout import registrar_venta
+from ventas.models import (
+    ResumenDiario,
+    ResumenDiarioProducto,
+    ResumenDiarioTrabajador,
+    Trabajador,
+    Turno,
+    Venta,
+)
+from ventas.resumenes import agregar, particiones_mensuales, reconstruir, reemplazar
+
+
+class ResumenesDiariosTests(TestCase):
+    def setUp(self):
+        cervezas = Categoria.objects.create(nombre="Cervezas")
+        self.cerveza = Producto.objects.create(
+            sku="CRV-1", nombre="Cerveza", categoria=cervezas,
+            costo=Decimal("600"), precio_unitario=Decimal("1000"), stock=100,
+        )
+        self.pisco = Producto.objects.create(
+            sku="PIS-1", nombre="Pisco",
+            costo=Decimal("4000"), precio_unitario=Decimal("6000"), stock=100,
+        )
+        self.trabajador = Trabajador.objects.create(nombre="Ana", turno_base="NOCHE")
+        self.turno = Turno.objects.create(trabajador=self.trabajador, turno_tipo="NOCHE")
+
+    def vender(self, **kwargs):
+        return registrar_venta(
+            [{"id": self.cerveza.id, "cantidad": 3}, {"id": self.pisco.id, "cantidad": 1}],
+            **kwargs,
+        )
+
+    def snapshot(self):
+        return (
+            list(ResumenDiario.objects.values_list("fecha", "ventas", "total", "unidades", "margen")),
+            sorted(ResumenDiarioProducto.objects.values_list("fecha", "producto_id", "cantidad", "monto", "margen")),
+            sorted(ResumenDiarioTrabajador.objects.values_list("fecha", "trabajador_id", "turno_tipo", "ventas", "total")),
+        )
+
+    def test_checkout_acumula(self):
+        self.vender(trabajador=self.trabajador, turno=self.turno)
+        self.vender()
+
+        dia = ResumenDiario.objects.get(fecha=timezone.localdate())
+        self.assertEqual(dia.ventas, 2)
+        self.assertEqual(dia.total, Decimal("18000"))
+        self.assertEqual(dia.unidades, 8)
+        self.assertEqual(dia.margen, Decimal("6400"))
+
+        self.assertEqual(ResumenDiarioProducto.objects.get(producto=self.cerveza).cantidad, 6)
+        por_trabajador = ResumenDiarioTrabajador.objects.get()
+        self.assertEqual((por_trabajador.turno_tipo, por_trabajador.ventas), ("NOCHE", 1))
+
+    def test_anular_descuenta(self):
+        venta = self.vender(trabajador=self.trabajador, turno=self.turno)
+        self.vender()
+        venta.anular(motivo="error")
+
+        dia = ResumenDiario.objects.get()
+        self.assertEqual((dia.ventas, dia.total), (1, Decimal("9000")))
+        self.assertEqual(ResumenDiarioTrabajador.objects.get().ventas, 0)
+
+    def test_cambio_de_costo_no_descuadra_el_margen(self):
+        venta = self.vender()
+        self.vender()
+        # EL MARGEN DE LAS VENTAS YA HECHAS SE CALCULA CON EL COSTO AL VENDER
+        Producto.objects.filter(id=self.cerveza.id).update(costo=Decimal("900"))
+        venta.anular()
+        incremental = self.snapshot()
+        self.assertEqual(ResumenDiario.objects.get().margen, Decimal("3200"))
+
+        reconstruir()
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_reemplazar_no_pierde_ventas_posteriores_a_la_agregacion(self):
+        self.vender(trabajador=self.trabajador, turno=self.turno)
+        anulada = self.vender()
+        hoy = timezone.localdate()
+        datos = agregar(hoy, hoy)
+
+        # MIENTRAS UN WORKER AGREGABA, LA CAJA SIGUIÓ VENDIENDO Y ANULANDO
+        self.vender(trabajador=self.trabajador)
+        anulada.anular()
+        incremental = self.snapshot()
+
+        reemplazar(hoy, hoy, datos)
+        self.assertEqual(self.snapshot(), incremental)
+        self.assertEqual(ResumenDiario.objects.get().ventas, 2)
+
+    def test_reconstruir_igual_a_incremental(self):
+        self.vender(trabajador=self.trabajador, turno=self.turno)
+        self.vender(trabajador=self.trabajador)
+        self.vender().anular()
+        incremental = self.snapshot()
+
+        reconstruir()
+        reconstruido = self.snapshot()
+
+        # LAS FILAS EN CERO (VENTAS ANULADAS) SOLO EXISTEN EN EL INCREMENTAL
+        self.assertEqual(incremental[0], reconstruido[0])
+        self.assertEqual(incremental[1], reconstruido[1])
+        self.assertEqual(
+            [f for f in incremental[2] if f[3]],
+            reconstruido[2],
+        )
+
+    def test_dashboards_leen_resumenes(self):
+        self.vender(trabajador=self.trabajador, turno=self.turno)
+        admin = get_user_model().objects.create_superuser("duenio", password="x")
+        self.client.force_login(admin)
+
+        r = self.client.get(reverse("analisis:index"))
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.context["top_labels"], ["Cerveza", "Pisco"])
+        # EL GRÁFICO DIARIO TIENE TODOS LOS DÍAS DEL RANGO; LA VENTA ES DE HOY
+        self.assertEqual(r.context["vd_data"][-1], 9000.0)
+        self.assertEqual(sum(r.context["vd_data"]), 9000.0)
+        self.assertEqual(list(r.context["stats_trabajadores"])[0]["total_ventas"], 1)
+
+        r = self.client.get(reverse("reportes:index"))
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.context["total_vendido_30"], Decimal("9000"))
+        self.assertEqual(r.context["margen_30"], Decimal("3200"))
+        self.assertEqual(r.context["ganancia_dia"], Decimal("3200"))
+
+
+class ReconstruirPorMesTests(TestCase):
+    def setUp(self):
+        self.producto = Producto.objects.create(
+            sku="MES-1", nombre="Ron", costo=Decimal("3000"),
+            precio_unitario=Decimal("5000"), stock=100,
+        )
+
+    def vender_el(self, dia):
+        venta = registrar_venta([{"id": self.producto.id, "cantidad": 1}])
+        fecha = timezone.make_aware(datetime.combine(dia, time(12)))
+        Venta.objects.filter(id=venta.id).update(fecha=fecha)
+
+    def test_particiones_mensuales(self):
+        self.vender_el(date(2025, 1, 20))
+        self.vender_el(date(2025, 3, 2))
+
+        self.assertEqual(particiones_mensuales(), [
+            (None, date(2025, 1, 31)),
+            (date(2025, 2, 1), date(2025, 2, 28)),
+            (date(2025, 3, 1), None),
+        ])
+        self.assertEqual(
+            particiones_mensuales(desde=date(2025, 2, 15), hasta=date(2025, 3, 10)),
+            [(date(2025, 2, 15), date(2025, 2, 28)), (date(2025, 3, 1), date(2025, 3, 10))],
+        )
+
+    def test_comando_desde_no_toca_meses_anteriores(self):
+        self.vender_el(date(2025, 1, 20))
+        self.vender_el(date(2025, 3, 2))
+        ResumenDiario.objects.all().delete()
+
+        salida = StringIO()
+        call_command("reconstruir_resumenes", procesos=1, stdout=salida)
+        self.assertIn("[3/3]", salida.getvalue())
+        self.assertEqual(
+            list(ResumenDiario.objects.values_list("fecha", "ventas")),
+            [(date(2025, 1, 20), 1), (date(2025, 3, 2), 1)],
+        )
+
+        ResumenDiario.objects.filter(fecha=date(2025, 1, 20)).update(ventas=99)
+        call_command("reconstruir_resumenes", "--desde=2025-03-01", procesos=1, stdout=StringIO())
+        self.assertEqual(ResumenDiario.objects.get(fecha=date(2025, 1, 20)).ventas, 99)
+        self.assertEqual(ResumenDiario.objects.get(fecha=date(2025, 3, 2)).ventas, 1)
@@ -7,6 +7,14 @@ urlpatterns = [
     path("", views.rapida, name="rapida"),
     path("rapida/", views.rapida, name="rapida_alt"),
     path("buscar/", views.buscar_productos, name="buscar"),
+    path("escanear/", views.escanear, name="escanear"),
+    path("sugerencias/", views.sugerencias_carrito, name="sugerencias"),
+    path("catalogo/", views.catalogo, name="catalogo"),
+    path("catalogo/cambios/", views.catalogo_cambios, name="catalogo_cambios"),
     path("confirmar/", views.confirmar_venta, name="confirmar"),
+    path("confirmar/lote/", views.confirmar_lote, name="confirmar_lote"),
     path("ticket/<int:venta_id>/txt/", views.ticket_txt, name="ticket_txt"),
+    path("turnos/<int:turno_id>/cierre.txt", views.cierre_txt, name="cierre_txt"),
+    path("historial/", views.historial, name="historial"),
+    path("<int:venta_id>/anular/", views.anular_venta, name="anular"),
 ]
@@ -1,16 +1,27 @@
 import json
 from decimal import Decimal
+from datetime import datetime, timedelta, timezone as dt_timezone
+from urllib.parse import urlencode
 
-from django.http import JsonResponse, HttpResponseBadRequest, HttpResponse
+from django.contrib import messages
+from django.http import JsonResponse, HttpResponseBadRequest, HttpResponse, HttpResponseForbidden
 from django.views.decorators.http import require_GET, require_POST
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import render, get_object_or_404
-from django.db import transaction
+from django.shortcuts import render, get_object_or_404, redirect
+from django.db import DatabaseError
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.urls import reverse
 
-from inventario.models import Producto, AlertaStock
-from .models import Venta, VentaItem, Trabajador, Turno
+from inventario import cache_sku
+from inventario.busqueda import buscar
+from inventario.models import Producto
+from .canasta import sugerencias
+from .checkout import VentaError, registrar_venta, venta_por_clave
+from .cierres import RESUMEN_CIERRE, resumen_turno
+from .models import CierreTurno, Venta, VentaItem, Trabajador, Turno
+from .periodos import filtro_dias, leer_fecha
 
 
 
@@ -26,10 +37,10 @@ def buscar_productos(request):
 
     q = request.GET.get("q", "").strip()
 
-    productos = Producto.objects.filter(activo=True, bloqueado=False)
+    productos = Producto.objects.filter(activo=True, bloqueado=False).order_by("nombre")
 
     if q:
-        productos = productos.filter(nombre__icontains=q) | productos.filter(sku__icontains=q)
+        productos = buscar(productos, q)
 
     data = [
         {
@@ -39,130 +50,296 @@ def buscar_productos(request):
             "precio": float(p.precio_unitario),
             "stock": p.stock,
         }
-        for p in productos.order_by("nombre")[:20]
+        for p in productos[:20]
     ]
 
     return JsonResponse({"results": data})
 
 
-def _crear_alerta_stock(producto):
+@require_GET
+@login_required
+def escanear(request):
+    """
+    Búsqueda exacta por SKU para el lector de código de barras.
+    Responde desde la caché en memoria, sin ir a la base de datos.
+    """
+    datos = cache_sku.obtener(request.GET.get("sku"))
 
-    if producto.stock <= producto.stock_minimo and producto.stock_minimo > 0:
-        AlertaStock.objects.get_or_create(
-            producto=producto,
-            atendida=False,
-            defaults={
-                "mensaje": f"Stock crítico: {producto.stock} unidades (mínimo {producto.stock_minimo})"
-            },
+    if datos is None or not datos["activo"]:
+        return JsonResponse({"ok": False, "error": "Producto no encontrado."}, status=404)
+    if datos["bloqueado"]:
+        return JsonResponse(
+            {"ok": False, "error": f"El producto {datos['nombre']} está bloqueado."}, status=409
         )
 
-@require_POST
+    return JsonResponse({"ok": True, **datos})
+
+
+# MÁXIMO DE PRODUCTOS DEL CARRITO QUE SE CONSIDERAN PARA SUGERIR
+CARRITO_MAX_SUGERENCIAS = 50
+
+
+@require_GET
 @login_required
-def confirmar_venta(request):
+def sugerencias_carrito(request):
+    """
+    Productos que más se compran junto a los del carrito (?ids=1,2,3&k=5).
+    Se leen de la tabla de pares ya contados (ventas/canasta.py).
+    """
     try:
-        payload = json.loads(request.body.decode("utf-8"))
-        items = payload.get("items", [])
-        metodo_pago = payload.get("metodo_pago", "EFECTIVO")
+        ids = [int(i) for i in request.GET.get("ids", "").split(",") if i.strip()]
+        k = int(request.GET.get("k", 5))
+    except ValueError:
+        return HttpResponseBadRequest("Parámetros inválidos.")
 
-        if not items:
-            return HttpResponseBadRequest("No se enviaron ítems en la venta.")
+    return JsonResponse({"results": sugerencias(ids[:CARRITO_MAX_SUGERENCIAS], k)})
+
+
+# CATÁLOGO PARA BÚSQUEDA LOCAL EN LA CAJA
 
+EPOCA = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
 
-        with transaction.atomic():
-            trabajador = None
-            turno = None
+# Margen para no perder filas de transacciones que confirmaron tarde
+MARGEN_CAMBIOS = timedelta(seconds=5)
 
-            trabajador_id = request.session.get("trabajador_id")
-            turno_id = request.session.get("turno_id")
 
-            if trabajador_id:
-                try:
-                    trabajador = Trabajador.objects.get(id=trabajador_id)
-                except Trabajador.DoesNotExist:
-                    trabajador = None
+def _a_version(fecha):
+    return (fecha - EPOCA) // timedelta(microseconds=1)
 
-            if turno_id:
-                try:
-                    turno = Turno.objects.get(id=turno_id)
-                except Turno.DoesNotExist:
-                    turno = None
 
-            venta_kwargs = {
-                "usuario": request.user,
-                "trabajador": trabajador,
-                "turno": turno,
-            }
+def _desde_version(version):
+    return EPOCA + timedelta(microseconds=version)
 
 
-            if hasattr(Venta, "metodo_pago"):
-                venta_kwargs["metodo_pago"] = metodo_pago
+def _catalogo_json(productos, version):
+    data = []
+    for p in productos.values(
+        "id", "sku", "nombre", "precio_unitario", "stock", "activo", "bloqueado", "actualizado_en"
+    ):
+        version = max(version, _a_version(p.pop("actualizado_en")))
+        p["precio"] = float(p.pop("precio_unitario"))
+        data.append(p)
 
-            venta = Venta.objects.create(**venta_kwargs)
+    return {"version": version, "productos": data}
 
-            total = Decimal("0")
 
-            for it in items:
-                prod_id = it.get("id")
-                cant = int(it.get("cantidad", 0))
+@require_GET
+@login_required
+def catalogo(request):
+    """
+    Snapshot completo del catálogo vendible. La caja lo guarda en el
+    navegador y busca localmente, sin ir al servidor en cada tecla.
+    """
+    productos = Producto.objects.filter(activo=True).order_by("id")
+    return JsonResponse(_catalogo_json(productos, 0))
 
-                if cant <= 0:
-                    return HttpResponseBadRequest("Cantidad inválida.")
 
-                producto = Producto.objects.select_for_update().get(id=prod_id)
+@require_GET
+@login_required
+def catalogo_cambios(request):
+    """
+    Productos modificados desde una versión del catálogo (según actualizado_en),
+    incluidos los desactivados o bloqueados para que la caja los quite.
+    """
+    try:
+        version = int(request.GET.get("version", ""))
+        desde = _desde_version(version) - MARGEN_CAMBIOS
+    except (OverflowError, ValueError):
+        return HttpResponseBadRequest("Versión inválida.")
 
-                if not producto.activo:
-                    return HttpResponseBadRequest(f"El producto {producto.nombre} está inactivo.")
+    productos = Producto.objects.filter(actualizado_en__gt=desde).order_by("id")
 
-                if producto.bloqueado:
-                    return HttpResponseBadRequest(
-                        f"El producto {producto.nombre} está bloqueado y no puede venderse."
-                    )
+    data = _catalogo_json(productos, version)
+    # SI NO CALZA, LA CAJA PIDE EL SNAPSHOT COMPLETO (POR EJEMPLO TRAS BORRADOS)
+    data["total_activos"] = Producto.objects.filter(activo=True).count()
+    return JsonResponse(data)
 
-                if producto.stock < cant:
-                    return HttpResponseBadRequest(f"Stock insuficiente para {producto.nombre}.")
 
-                precio = producto.precio_unitario
-                subtotal = precio * cant
+# Solo el dueño (historial y anulación de ventas)
+def duenio_required(view_func):
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_superuser:
+            return HttpResponseForbidden("No tienes permiso para ver esta sección.")
+        return view_func(request, *args, **kwargs)
+    return wrapper
 
-                # Crear ítem
-                VentaItem.objects.create(
-                    venta=venta,
-                    producto=producto,
-                    cantidad=cant,
-                    precio_unitario=precio,
-                    subtotal=subtotal,
-                )
 
-                # Actualizar stock
-                producto.stock -= cant
-                producto.save(update_fields=["stock"])
+def _trabajador_turno_sesion(request):
+    """
+    Devuelve el trabajador y el turno guardados en la sesión (o None).
+    """
+    trabajador_id = request.session.get("trabajador_id")
+    turno_id = request.session.get("turno_id")
 
-                # Generar alerta si corresponde
-                _crear_alerta_stock(producto)
+    trabajador = Trabajador.objects.filter(id=trabajador_id).first() if trabajador_id else None
+    turno = Turno.objects.filter(id=turno_id).first() if turno_id else None
 
-                total += subtotal
+    return trabajador, turno
 
-            venta.total = total
-            venta.save(update_fields=["total"])
 
+def _datos_venta(venta):
+    return {
+        "ok": True,
+        "venta_id": venta.id,
+        "total": float(venta.total),
         # URL del ticket en TXT
-        ticket_url = reverse("ventas:ticket_txt", args=[venta.id])
+        "ticket_url": reverse("ventas:ticket_txt", args=[venta.id]),
+    }
 
-        return JsonResponse(
-            {
-                "ok": True,
-                "venta_id": venta.id,
-                "total": float(total),
-                "ticket_url": ticket_url,
-            }
+
+def _respuesta_venta(venta, repetida=False):
+    """
+    Respuesta JSON de una venta registrada. Es la misma para la petición
+    original y para sus reintentos.
+    """
+    response = JsonResponse(_datos_venta(venta))
+    if repetida:
+        response["Idempotent-Replay"] = "true"
+    return response
+
+
+@require_POST
+@login_required
+def confirmar_venta(request):
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+        items = payload.get("items", [])
+        metodo_pago = payload.get("metodo_pago", "EFECTIVO")
+        clave = str(payload.get("clave") or request.headers.get("Idempotency-Key") or "").strip()[:64]
+
+        # REINTENTO DE UNA VENTA YA REGISTRADA
+        venta = venta_por_clave(clave)
+        if venta is not None:
+            return _respuesta_venta(venta, repetida=True)
+
+        if not items:
+            return HttpResponseBadRequest("No se enviaron ítems en la venta.")
+
+        trabajador, turno = _trabajador_turno_sesion(request)
+
+        venta = registrar_venta(
+            items,
+            usuario=request.user,
+            trabajador=trabajador,
+            turno=turno,
+            metodo_pago=metodo_pago,
+            clave=clave,
         )
 
-    except Producto.DoesNotExist:
-        return HttpResponseBadRequest("Producto no encontrado.")
+        return _respuesta_venta(venta)
 
     except Exception as e:
         return HttpResponseBadRequest(str(e))
 
+
+# Máximo de ventas por lote, para no mantener la transacción abierta demasiado
+MAX_VENTAS_LOTE = 200
+
+# Antigüedad máxima de la hora original de una venta encolada
+MAX_HORAS_LOTE = 72
+
+
+def _fecha_encolada(valor, ahora):
+    """
+    Hora original (ISO 8601) de una venta encolada por la caja, o None si no
+    viene. Una hora sin zona se toma como hora local; una hora futura (reloj
+    de la caja adelantado) queda en la actual. Lanza VentaError si no se
+    entiende o tiene más de MAX_HORAS_LOTE horas.
+    """
+    if valor in (None, ""):
+        return None
+    try:
+        fecha = parse_datetime(str(valor))
+    except ValueError:
+        fecha = None
+    if fecha is None:
+        raise VentaError("Fecha de la venta inválida.", "fecha")
+    if timezone.is_naive(fecha):
+        fecha = timezone.make_aware(fecha)
+    if fecha < ahora - timedelta(hours=MAX_HORAS_LOTE):
+        raise VentaError(
+            f"La venta tiene más de {MAX_HORAS_LOTE} horas; regístrala a mano.", "fecha"
+        )
+    return min(fecha, ahora)
+
+
+@require_POST
+@login_required
+def confirmar_lote(request):
+    """
+    Registra varias ventas encoladas por una caja en una sola petición.
+
+    Cada venta se registra en su propia transacción: si una falla (stock,
+    producto bloqueado, formato, fecha, error de base de datos, ...) se
+    informa en su resultado y las demás se registran igual. Las ventas cuya clave ya existe se devuelven sin
+    volver a registrarlas. Cada venta puede traer su "fecha" original.
+    """
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+    except ValueError:
+        return HttpResponseBadRequest("JSON inválido.")
+
+    ventas = payload.get("ventas") if isinstance(payload, dict) else None
+    if not isinstance(ventas, list) or not ventas:
+        return HttpResponseBadRequest("No se enviaron ventas.")
+    if len(ventas) > MAX_VENTAS_LOTE:
+        return HttpResponseBadRequest(f"Máximo {MAX_VENTAS_LOTE} ventas por lote.")
+
+    trabajador, turno = _trabajador_turno_sesion(request)
+
+    # UNA SOLA CONSULTA PARA TODOS LOS REINTENTOS DEL LOTE
+    claves = [
+        str(v.get("clave") or "").strip()[:64] if isinstance(v, dict) else "" for v in ventas
+    ]
+    registradas = {
+        v.clave_idempotencia: v
+        for v in Venta.objects.filter(clave_idempotencia__in=[c for c in claves if c])
+    }
+
+    ahora = timezone.now()
+    resultados = []
+    for datos, clave in zip(ventas, claves):
+        if not isinstance(datos, dict):
+            resultados.append(
+                {"clave": clave, "estado": "invalida", "ok": False, "error": "Formato de venta inválido."}
+            )
+            continue
+
+        venta = registradas.get(clave)
+        if venta is not None:
+            resultados.append({"clave": clave, "estado": "ok", "repetida": True, **_datos_venta(venta)})
+            continue
+
+        try:
+            items = datos.get("items") or []
+            if not isinstance(items, list):
+                raise VentaError("Formato de venta inválido.")
+            venta = registrar_venta(
+                items,
+                usuario=request.user,
+                trabajador=trabajador,
+                turno=turno,
+                metodo_pago=datos.get("metodo_pago", "EFECTIVO"),
+                clave=clave,
+                fecha=_fecha_encolada(datos.get("fecha"), ahora),
+            )
+        except VentaError as e:
+            resultados.append({"clave": clave, "estado": e.codigo, "ok": False, "error": str(e)})
+            continue
+        except DatabaseError:
+            # registrar_venta YA DESHIZO ESTA VENTA; LAS ANTERIORES QUEDAN
+            resultados.append(
+                {"clave": clave, "estado": "error", "ok": False, "error": "No se pudo registrar la venta."}
+            )
+            continue
+
+        if clave:
+            registradas[clave] = venta
+        resultados.append({"clave": clave, "estado": "ok", **_datos_venta(venta)})
+
+    return JsonResponse({"resultados": resultados})
+
+
 @login_required
 def ticket_txt(request, venta_id):
     """
@@ -223,7 +400,160 @@ def ticket_txt(request, venta_id):
     response["Content-Disposition"] = f'attachment; filename=\"ticket_{venta.id}.txt\"'
     return response
 
+
+@login_required
+def cierre_txt(request, turno_id):
+    """
+    Cierre de caja del turno en .txt para imprimir. Si el turno sigue
+    abierto imprime el resumen parcial en vivo.
+    """
+    turno = get_object_or_404(Turno.objects.select_related("trabajador"), id=turno_id)
+    cierre = CierreTurno.objects.filter(turno=turno).first()
+    if cierre:
+        resumen = {campo: getattr(cierre, campo) for campo in RESUMEN_CIERRE}
+        titulo = " Cierre de caja"
+    else:
+        resumen = resumen_turno(turno)
+        titulo = " Cierre de caja PARCIAL (turno abierto)"
+
+    def hora(valor):
+        return timezone.localtime(valor).strftime("%d-%m-%Y %H:%M") if valor else "-"
+
+    lines = []
+    lines.append(" BOTILLERÍA EL CHASCÓN")
+    lines.append(titulo)
+    lines.append("")
+    lines.append(f" Turno   : {turno.id} ({turno.turno_tipo})")
+    lines.append(f" Vendedor: {turno.trabajador.nombre}")
+    lines.append(f" Inicio  : {hora(turno.hora_inicio)}")
+    lines.append(f" Cierre  : {hora(turno.hora_fin)}")
+    lines.append("-" * 40)
+    lines.append(f"{' Ventas:':<20}{resumen['ventas']:>20}")
+    lines.append(f"{' Unidades:':<20}{resumen['unidades']:>20}")
+    lines.append(f"{' Anuladas:':<20}{resumen['anuladas']:>20}")
+    lines.append(f"{' Monto anulado:':<20}{int(resumen['total_anulado']):>20}")
+    lines.append(f"{' Margen estimado:':<20}{int(resumen['margen']):>20}")
+    lines.append("-" * 40)
+    lines.append(" Categoría            Unid.      Total")
+    lines.append("-" * 40)
+    for fila in resumen["por_categoria"]:
+        nombre = fila["categoria"][:20]
+        lines.append(f" {nombre:<20}{fila['unidades']:>6}{int(Decimal(fila['total'])):>11}")
+    lines.append("-" * 40)
+    lines.append(f"{'TOTAL:':<10}{int(resumen['total']):>30}")
+    lines.append("")
+
+    contenido = "\n".join(lines)
+
+    response = HttpResponse(contenido, content_type="text/plain; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="cierre_turno_{turno.id}.txt"'
+    return response
+
+# HISTORIAL DE VENTAS (PAGINACIÓN POR CURSOR SOBRE (fecha, id))
+
+VENTAS_POR_PAGINA = 50
+
+
+def _cursor(venta):
+    return f"{_a_version(venta.fecha)}_{venta.id}"
+
+
+def _leer_cursor(valor):
+    try:
+        version, venta_id = valor.split("_")
+        return _desde_version(int(version)), int(venta_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _filtros_historial(params):
+    """Filtros válidos del GET, para el queryset y para armar los enlaces."""
+    filtros = {}
+    if params.get("estado") in dict(Venta.ESTADOS):
+        filtros["estado"] = params["estado"]
+    for campo in ("trabajador", "turno"):
+        if (params.get(campo) or "").isdigit():
+            filtros[campo] = int(params[campo])
+    for campo in ("desde", "hasta"):
+        fecha = leer_fecha(params.get(campo))
+        if fecha:
+            filtros[campo] = fecha
+    return filtros
+
+
+@login_required
+@duenio_required
+def historial(request):
+    """
+    Historial de ventas, de la más reciente a la más antigua.
+
+    Pagina por cursor (keyset): ?antes=<cursor> trae las ventas anteriores a
+    la última mostrada con WHERE (fecha, id) < cursor, así la página 500
+    cuesta lo mismo que la primera (no hay OFFSET). ?despues=<cursor>
+    vuelve hacia las más recientes.
+    """
+    filtros = _filtros_historial(request.GET)
+
+    ventas = Venta.objects.filter(
+        filtro_dias(filtros.get("desde"), filtros.get("hasta")),
+        **{k: v for k, v in filtros.items() if k in ("estado", "trabajador", "turno")},
+    )
+
+    antes = _leer_cursor(request.GET.get("antes"))
+    despues = _leer_cursor(request.GET.get("despues"))
+    if despues:
+        fecha, venta_id = despues
+        ventas = ventas.filter(
+            Q(fecha__gt=fecha) | Q(fecha=fecha, id__gt=venta_id), fecha__gte=fecha
+        )
+        ventas = ventas.order_by("fecha", "id")
+    else:
+        if antes:
+            fecha, venta_id = antes
+            # fecha__lte REDUNDANTE: PERMITE BUSCAR EN EL ÍNDICE EN VEZ DE
+            # RECORRERLO DESDE EL PRINCIPIO Y DESCARTAR LAS FILAS DEL OR
+            ventas = ventas.filter(
+                Q(fecha__lt=fecha) | Q(fecha=fecha, id__lt=venta_id), fecha__lte=fecha
+            )
+        ventas = ventas.order_by("-fecha", "-id")
+
+    # CONTEO DE ÍTEMS CON SUBCONSULTAS CORRELACIONADAS: SOLO SE EVALÚAN
+    # PARA LAS FILAS DE LA PÁGINA, EN LA MISMA CONSULTA
+    items = VentaItem.objects.filter(venta=OuterRef("pk")).order_by().values("venta")
+    ventas = ventas.select_related("trabajador", "turno", "usuario").annotate(
+        n_items=Subquery(items.annotate(n=Count("id")).values("n")),
+        unidades=Subquery(items.annotate(u=Sum("cantidad")).values("u")),
+    )
+
+    # UNA FILA EXTRA DICE SI HAY OTRA PÁGINA SIN HACER UN COUNT
+    pagina = list(ventas[:VENTAS_POR_PAGINA + 1])
+    hay_mas = len(pagina) > VENTAS_POR_PAGINA
+    pagina = pagina[:VENTAS_POR_PAGINA]
+    if despues:
+        pagina.reverse()
+
+    base = urlencode({k: str(v) for k, v in filtros.items()})
+    anterior = siguiente = None
+    if pagina:
+        if antes or (despues and hay_mas):
+            anterior = f"?{base}&despues={_cursor(pagina[0])}"
+        if hay_mas or despues:
+            siguiente = f"?{base}&antes={_cursor(pagina[-1])}"
+
+    return render(request, "ventas/historial.html", {
+        "ventas": pagina,
+        "filtros": filtros,
+        "estados": Venta.ESTADOS,
+        "trabajadores": Trabajador.objects.order_by("nombre"),
+        "turno_filtrado": Turno.objects.filter(id=filtros["turno"]).first() if "turno" in filtros else None,
+        "pagina_anterior": anterior,
+        "pagina_siguiente": siguiente,
+        "primera_pagina": f"?{base}",
+    })
+
+
 @login_required
+@duenio_required
 def anular_venta(request, venta_id):
     venta = get_object_or_404(Venta, id=venta_id)
 
@@ -231,6 +561,6 @@ def anular_venta(request, venta_id):
         motivo = request.POST.get("motivo", "")
         venta.anular(request.user, motivo)
         messages.success(request, "La venta fue ANULADA y el stock fue actualizado.")
-        return redirect("ventas_historial")
+        return redirect("ventas:historial")
 
     return render(request, "ventas/anular.html", {"venta": venta})